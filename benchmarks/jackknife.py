@@ -0,0 +1,136 @@
+"""Benchmark of the jackknife engine against the former per-level loop.
+
+Run from the project root as
+
+    python3 -m benchmarks.jackknife
+
+Functions
+-----------------------
+legacy_jackknife()
+    Compute the jackknife scaling rebinning each level.
+mean_square()
+    Average of the squares of the arguments (any number of them).
+main()
+    Time both implementations and print the speedups.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import timeit
+from typing import Callable
+
+import numpy as np
+
+from modules.common import MAXBINS
+from modules.common import MINBINS
+from modules.common import drop_rows
+from modules.common import rebin
+from modules.common import get_stats
+from modules.drivers import jackknife_scaling
+from modules.functionals import susceptibility
+
+from benchmarks.rebin import bin_levels
+
+# (rows, columns) of the benchmarked datasets
+SHAPES = [(10**7, 2), (2**20, 64), (2**16, 1024)]
+REPEAT = 3
+
+
+def legacy_jackknife(data: np.ndarray, func: Callable) -> None:
+    """Compute the jackknife scaling rebinning each level.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The tailored 2D array.
+    func : Callable
+        Functional used to compute values and pseudovalues.
+    """
+    for nbins, binned in bin_levels(data, MAXBINS, MINBINS):
+        sums = binned.sum(axis=0)
+        val = func((sums / nbins).tolist())
+
+        ps_ave = [(s - col) / (nbins - 1) for s, col in zip(sums, binned.T)]
+        ps_val = nbins * val - (nbins - 1) * func(ps_ave)
+
+        _ = get_stats(ps_val.reshape((ps_val.shape[0], 1)))
+
+
+def mean_square(args: list[float | np.ndarray]) -> float | np.ndarray:
+    """Average of the squares of the arguments (any number of them).
+
+    Parameters
+    -----------------------
+    args : list[float | np.ndarray]
+        Input data (may be single numbers or arrays).
+
+    Returns
+    -----------------------
+    float | np.ndarray
+        The computed averages.
+    """
+    return sum(a**2.0 for a in args) / len(args)
+
+
+def main():
+    """Time both implementations and print the speedups."""
+    rng = np.random.default_rng(seed=0)
+
+    print(
+        f"{'rows':>9} {'cols':>4} {'input':>6}"
+        f" {'legacy':>9} {'new':>9} {'speedup':>8}"
+    )
+    for rows, cols in SHAPES:
+        data = drop_rows(rng.random((rows, cols)), 0, MAXBINS)
+        keep = data.shape[0]
+        func = susceptibility if cols == 2 else mean_square
+
+        # whole driver, and jackknife engine alone (on the first level)
+        for label, inp in (("rows", data), ("bins", rebin(data, MAXBINS))):
+            old = min(
+                timeit.repeat(
+                    lambda d=inp, f=func: legacy_jackknife(d, f),
+                    number=1,
+                    repeat=REPEAT,
+                )
+            )
+            new = min(
+                timeit.repeat(
+                    lambda d=inp, f=func, k=keep: jackknife_scaling(d, k, f),
+                    number=1,
+                    repeat=REPEAT,
+                )
+            )
+
+            print(
+                f"{rows:>9} {cols:>4} {label:>6} {old:>8.4f}s {new:>8.4f}s"
+                f" {old / new:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
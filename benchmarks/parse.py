@@ -0,0 +1,108 @@
+"""Benchmark of the `parse_ds()` reader backends.
+
+Run from the project root as
+
+    python3 -m benchmarks.parse
+
+Functions
+-----------------------
+write_dataset()
+    Write a random dataset to a text file.
+main()
+    Time all readers and print their throughput.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import timeit
+import tempfile
+
+import numpy as np
+
+from modules.common import READERS
+from modules.common import parse_ds
+
+
+# (rows, columns, number format) of the benchmarked datasets
+SHAPES = [
+    (10**5, 1, "%.15e"),
+    (10**6, 4, "%.15e"),
+    (10**6, 4, "%.6f"),
+    (10**5, 40, "%.15e"),
+]
+REPEAT = 3
+
+
+def write_dataset(file: str, rows: int, cols: int, fmt: str) -> None:
+    """Write a random dataset to a text file.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to write.
+    rows : int
+        Number of rows.
+    cols : int
+        Number of columns.
+    fmt : str
+        Format of the numbers.
+    """
+    rng = np.random.default_rng(seed=0)
+    with open(file, "w", encoding="utf-8") as f:
+        f.write("# benchmark dataset\n")
+        np.savetxt(f, rng.normal(size=(rows, cols)), fmt=fmt)
+
+
+def main():
+    """Time all readers and print their throughput."""
+    print(f"{'rows':>9} {'cols':>4} {'format':>6} {'MB':>7}", end="")
+    for reader in READERS:
+        print(f" {reader + ' (MB/s)':>16}", end="")
+    print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows, cols, fmt in SHAPES:
+            file = os.path.join(tmp, "ds.dat")
+            write_dataset(file, rows, cols, fmt)
+            size = os.path.getsize(file) / 1e6
+
+            print(f"{rows:>9} {cols:>4} {fmt:>6} {size:>7.1f}", end="")
+            for reader in READERS:
+                elapsed = min(
+                    timeit.repeat(
+                        lambda f=file, r=reader: parse_ds(f, None, True, r),
+                        number=1,
+                        repeat=REPEAT,
+                    )
+                )
+                print(f" {size / elapsed:>16.1f}", end="")
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Benchmark of the binning engine against the former per-bin loop.
+
+Run from the project root as
+
+    python3 -m benchmarks.rebin
+
+Functions
+-----------------------
+legacy_rebin()
+    Rebin a 2D array with a Python loop over the bins.
+legacy_levels()
+    Rebin a 2D array at all levels, allocating each one.
+bin_levels()
+    Generate successive halvings of the number of bins.
+main()
+    Time both implementations and print the speedups.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import timeit
+from typing import Iterator
+
+import numpy as np
+
+from modules.common import MAXBINS
+from modules.common import MINBINS
+from modules.common import rebin
+from modules.common import bin_pyramid
+
+# (rows, columns) of the benchmarked datasets
+SHAPES = [(2**16, 1), (2**20, 4), (2**20, 40), (2**23, 2)]
+REPEAT = 5
+
+
+def legacy_rebin(data: np.ndarray, nbins: int) -> np.ndarray:
+    """Rebin a 2D array with a Python loop over the bins.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The dataset to rebin.
+    nbins : int
+        Number of requested bins.
+
+    Returns
+    -----------------------
+    np.ndarray
+        The rebinned array.
+    """
+    size = data.shape[0] // nbins
+    data2 = np.ndarray((nbins, data.shape[1]))
+
+    for ib in range(nbins):
+        data2[ib] = data[(ib * size) : ((ib + 1) * size)].mean(axis=0)
+    return data2
+
+
+def legacy_levels(data: np.ndarray) -> None:
+    """Rebin a 2D array at all levels, allocating each one.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The dataset to rebin.
+    """
+    nbins = MAXBINS
+    data = legacy_rebin(data, nbins)
+    while nbins >= MINBINS:
+        nbins //= 2
+        data = legacy_rebin(data, nbins)
+
+
+def bin_levels(
+    data: np.ndarray,
+    maxbins: int = MAXBINS,
+    minbins: int = MINBINS,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """Generate successive halvings of the number of bins.
+
+    The first level rebins `data` in `maxbins` bins; each
+    following level pairs adjacent bins of the previous one,
+    until less than `minbins` bins would be left. Two buffers
+    are allocated once and reused across all levels.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The dataset to rebin.
+    maxbins : int, default = MAXBINS
+        Number of bins of the first level.
+    minbins : int, default = MINBINS
+        Minimum number of bins of the last level.
+
+    Yields
+    -----------------------
+    tuple[int, np.ndarray]
+        - Number of bins of the level.
+        - The rebinned array, overwritten at the next iteration.
+
+    Raises
+    -----------------------
+    TailoringError
+        If insufficient rows for binning.
+    TailoringError
+        If leftover rows after binning.
+    """
+    cols = data.shape[1]
+    buffers = [
+        np.empty((n, cols), data.dtype) for n in (maxbins, maxbins // 2)
+    ]
+
+    nbins = maxbins
+    data = rebin(data, nbins, out=buffers[0])
+
+    ilevel = 0
+    while nbins >= minbins:
+        yield (nbins, data)
+
+        nbins //= 2
+        ilevel += 1
+        if nbins >= minbins:
+            data = rebin(data, nbins, out=buffers[ilevel % 2][:nbins])
+
+
+def main():
+    """Time both implementations and print the speedups."""
+    rng = np.random.default_rng(seed=0)
+
+    print(f"{'rows':>9} {'cols':>4} {'legacy':>9} {'new':>9} {'speedup':>8}")
+    for rows, cols in SHAPES:
+        data = rng.random((rows, cols))
+
+        old = min(
+            timeit.repeat(
+                lambda d=data: legacy_levels(d), number=1, repeat=REPEAT
+            )
+        )
+        new = min(
+            timeit.repeat(
+                lambda d=data: bin_pyramid(d),
+                number=1,
+                repeat=REPEAT,
+            )
+        )
+        single = min(
+            timeit.repeat(
+                lambda d=data: rebin(d, MAXBINS), number=1, repeat=REPEAT
+            )
+        )
+
+        print(
+            f"{rows:>9} {cols:>4} {old:>8.4f}s {new:>8.4f}s"
+            f" {old / new:>7.1f}x"
+            f"  (first level only: {single:.4f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark of the start-up time of the `das` command line.
+
+The start-up time is measured as the time spent importing
+modules (`python -X importtime`), excluding the ones imported by
+the bare interpreter. Run from the project root as
+
+    python3 -m benchmarks.startup
+
+Functions
+-----------------------
+import_times()
+    Return the import time of the modules imported by a call.
+main()
+    Time the start-up of typical calls against their budgets.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import sys
+import subprocess
+
+# IMPORT-TIME BUDGETS (MS) OF TYPICAL CALLS
+BUDGETS = {
+    ("--version",): 50.0,
+}
+# CALLS REPORTED BY THE BENCHMARK (BESIDES THE BUDGETED ONES), NOT
+# WRITING TO THE CACHE OF PARSED FILES
+CALLS = [
+    ("avs", "-b", "--no-cache", "tests/data/ave-01.dat.gz"),
+    ("avs", "--no-cache", "tests/data/ave-01.dat.gz"),
+    ("jck", "-b", "--no-cache", "-f", "2,3", "tests/data/jck-01.dat.gz"),
+]
+
+
+def _top_level_imports(argv: list[str]) -> dict[str, int]:
+    """Low-level function, cumulative import times of a Python call.
+
+    Parameters
+    -----------------------
+    argv : list[str]
+        Arguments of the interpreter.
+
+    Returns
+    -----------------------
+    dict[str, int]
+        Cumulative import time (us) of each top-level import.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # nested imports are indented
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def import_times(args: tuple[str, ...]) -> dict[str, int]:
+    """Return the import time of the modules imported by a call.
+
+    Parameters
+    -----------------------
+    args : tuple[str, ...]
+        Command-line arguments of `das`.
+
+    Returns
+    -----------------------
+    dict[str, int]
+        Cumulative import time (us) of each top-level import,
+        excluding the ones of the bare interpreter.
+    """
+    bare = _top_level_imports(["-c", "pass"])
+    times = _top_level_imports(["-m", "modules.main", *args])
+
+    return {name: t for name, t in times.items() if name not in bare}
+
+
+def main():
+    """Time the start-up of typical calls against their budgets."""
+    for args in [*BUDGETS, *CALLS]:
+        times = import_times(args)
+        total = sum(times.values()) / 1000.0
+        budget = f"{BUDGETS[args]:.0f} ms" if args in BUDGETS else "-"
+        over = args in BUDGETS and total > BUDGETS[args]
+        slowest = sorted(times, key=times.get, reverse=True)[:3]
+
+        print(f"das {' '.join(args)}")
+        print(
+            f"    imports {total:.1f} ms (budget {budget})"
+            + (" OVER BUDGET" if over else "")
+        )
+        print(f"    slowest {', '.join(slowest)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""Benchmark suite of the `das` building blocks at production scales.
+
+Times parsing, tailoring, binning, statistics, drivers and
+printers on synthetic correlated datasets, records their peak
+memory, and compares both against a stored JSON baseline.
+Parsing of gzip-compressed files is timed both streamed and
+decompressed to disk beforehand. Run
+from the project root as
+
+    python3 -m benchmarks.suite [quick|full]
+
+or through `das bench`.
+
+Functions
+-----------------------
+correlated_dataset()
+    Generate a synthetic dataset with correlated rows.
+run_suite()
+    Time and profile the building blocks on datasets of given shapes.
+compare()
+    Compare results against a baseline, returning the regressions.
+main()
+    Run the suite, compare it against the baseline and report.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import io
+import sys
+import gzip
+import json
+import shutil
+import time
+import tempfile
+import tracemalloc
+from typing import Callable
+from typing import Optional
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from modules.common import MAXBINS
+from modules.common import parse_ds
+from modules.common import drop_rows
+from modules.common import rebin
+from modules.common import get_stats
+from modules.drivers import ave
+from modules.drivers import jck
+from modules.functionals import susceptibility
+from modules.print import PrintConfig
+from modules.print import print_ave
+
+
+# (ROWS, COLUMNS) OF THE BENCHMARKED DATASETS, PER SCALE
+SCALES = {
+    "quick": [(10**4, 1), (10**4, 100), (10**5, 10), (10**6, 1)],
+    "full": [
+        (10**4, 1),
+        (10**4, 1000),
+        (10**5, 100),
+        (10**6, 10),
+        (10**7, 4),
+        (10**8, 1),
+    ],
+}
+# MAXIMUM NUMBER OF VALUES WRITTEN TO TEXT FILES TO BENCHMARK PARSING
+PARSE_LIMIT = 10**7
+# ROWS OVER WHICH THE SYNTHETIC DATA IS CORRELATED
+CORRELATION = 16
+# TIMED REPETITIONS (THE BEST ONE IS KEPT)
+REPEAT = 3
+# RELATIVE INCREASE OF TIME OR MEMORY FLAGGED AS REGRESSION
+TOLERANCE = 0.25
+# TIMES (S) BELOW WHICH NO REGRESSION IS FLAGGED (TOO NOISY)
+TIME_FLOOR = 1e-2
+# STORED BASELINE (OF THE QUICK SCALE)
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def correlated_dataset(rows: int, cols: int, seed: int = 0) -> np.ndarray:
+    """Generate a synthetic dataset with correlated rows.
+
+    Each column is a moving average of Gaussian noise over
+    `CORRELATION` rows, plus a column-dependent mean.
+
+    Parameters
+    -----------------------
+    rows : int
+        Number of rows.
+    cols : int
+        Number of columns.
+    seed : int, default = 0
+        Seed of the random generator.
+
+    Returns
+    -----------------------
+    np.ndarray
+        2D array of shape `(rows, cols)`.
+    """
+    rng = np.random.default_rng(seed=seed)
+
+    # moving average as difference of cumulative sums
+    noise = rng.normal(size=(rows + CORRELATION, cols))
+    sums = np.cumsum(noise, axis=0, out=noise)
+    data = sums[CORRELATION:] - sums[:-CORRELATION]
+    data /= CORRELATION
+    data += np.arange(cols)
+
+    return data
+
+
+def _measure(func: Callable) -> tuple[float, int]:
+    """Low-level function, best time and peak memory of a call.
+
+    Parameters
+    -----------------------
+    func : Callable
+        Function without arguments to measure.
+
+    Returns
+    -----------------------
+    tuple[float, int]
+        - The best time (s) over `REPEAT` calls.
+        - The peak memory (bytes) allocated during a call.
+    """
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    # traced separately, tracing slows down the allocations
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (best, peak)
+
+
+def _print_quietly(res: tuple, basic: bool) -> None:
+    """Low-level function, print `ave` results to a discarded buffer.
+
+    Parameters
+    -----------------------
+    res : tuple
+        The results of `ave()`.
+    basic : bool
+        If `True`, uses parse-friendly formatting.
+    """
+    with redirect_stdout(io.StringIO()):
+        print_ave(*res, PrintConfig(None, False, basic))
+
+
+def _decompress_then_parse(file: str) -> np.ndarray:
+    """Low-level function, decompress a file to disk, then parse it.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the gzip-compressed file.
+
+    Returns
+    -----------------------
+    np.ndarray
+        The parsed dataset.
+    """
+    plain = f"{os.path.splitext(file)[0]}.tmp"
+    try:
+        with gzip.open(file, "rb") as src, open(plain, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        return parse_ds(plain, None, True)
+    finally:
+        os.remove(plain)
+
+
+def run_suite(shapes: list[tuple[int, int]]) -> dict[str, dict]:
+    """Time and profile the building blocks on datasets of given shapes.
+
+    Parameters
+    -----------------------
+    shapes : list[tuple[int, int]]
+        The (rows, columns) of the datasets.
+
+    Returns
+    -----------------------
+    dict[str, dict]
+        Dictionary indexed by `"<operation> <rows>x<cols>"`,
+        storing the `"time"` (s) and `"peak"` memory (bytes).
+    """
+    results = {}
+
+    for rows, cols in shapes:
+        data = correlated_dataset(rows, cols)
+        tailored = drop_rows(data, 10, MAXBINS)
+        res = ave(tailored, 0, True)
+
+        cases = {
+            "drop_rows": lambda d=data: drop_rows(d, 10, MAXBINS),
+            "rebin": lambda d=tailored: rebin(d, MAXBINS),
+            "get_stats": lambda d=data: get_stats(d),
+            "ave": lambda d=data: ave(d, 10, True),
+            "print_ave basic": lambda r=res: _print_quietly(r, True),
+            "print_ave fancy": lambda r=res: _print_quietly(r, False),
+        }
+        if cols >= 2:
+            cases["jck"] = lambda d=data[:, :2]: jck(d, 10, susceptibility)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            if rows * cols <= PARSE_LIMIT:
+                file = os.path.join(tmpdir, "data.dat")
+                np.savetxt(file, data, fmt="%.15e")
+                cases["parse_ds"] = lambda f=file: parse_ds(f, None, True)
+
+                # streamed decompression against decompress-then-parse
+                zipped = f"{file}.gz"
+                with open(file, "rb") as src:
+                    with gzip.open(zipped, "wb", compresslevel=1) as dst:
+                        shutil.copyfileobj(src, dst)
+                cases["parse_ds gzip"] = lambda f=zipped: parse_ds(
+                    f, None, True
+                )
+                cases["parse_ds gunzip"] = lambda f=zipped: (
+                    _decompress_then_parse(f)
+                )
+
+            for name, func in cases.items():
+                t, peak = _measure(func)
+                results[f"{name} {rows}x{cols}"] = {"time": t, "peak": peak}
+
+    return results
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """Compare results against a baseline, returning the regressions.
+
+    Cases missing from the baseline are not compared, nor are
+    times below `TIME_FLOOR`.
+
+    Parameters
+    -----------------------
+    results : dict[str, dict]
+        The results of `run_suite()`.
+    baseline : dict[str, dict]
+        The baseline results.
+    tolerance : float
+        Relative increase of time or memory flagged as
+        regression.
+
+    Returns
+    -----------------------
+    list[str]
+        Descriptions of the regressions.
+    """
+    regressions = []
+
+    for case, res in results.items():
+        if case not in baseline:
+            continue
+        for key, unit in [("time", "s"), ("peak", "B")]:
+            old, new = baseline[case][key], res[key]
+            if key == "time" and new < TIME_FLOOR:
+                continue
+            if new > old * (1.0 + tolerance):
+                regressions.append(
+                    f"{case}: {key} {old:.3g}{unit} -> {new:.3g}{unit}"
+                )
+
+    return regressions
+
+
+def main(
+    scale: str = "quick",
+    baseline: Optional[str] = BASELINE,
+    save: Optional[str] = None,
+    tolerance: float = TOLERANCE,
+) -> int:
+    """Run the suite, compare it against the baseline and report.
+
+    Parameters
+    -----------------------
+    scale : str, default = "quick"
+        Key of `SCALES`, the datasets to benchmark.
+    baseline : Optional[str], default = BASELINE
+        JSON file storing the baseline (`None` to skip the
+        comparison, or if missing).
+    save : Optional[str], default = None
+        If not `None`, JSON file where the results are stored.
+    tolerance : float, default = TOLERANCE
+        Relative increase of time or memory flagged as
+        regression.
+
+    Returns
+    -----------------------
+    int
+        The exit status (nonzero if regressions were found).
+    """
+    results = run_suite(SCALES[scale])
+
+    print(f"{'case':<32} {'time':>10} {'peak':>10}")
+    for case, res in results.items():
+        print(
+            f"{case:<32} {res['time']:>9.4f}s"
+            f" {res['peak'] / 2**20:>8.1f}MB"
+        )
+
+    if save is not None:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is None or not os.path.isfile(baseline):
+        return 0
+
+    with open(baseline, "r", encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), tolerance)
+
+    print()
+    print(f"{len(regressions)} regression(s) against {baseline}")
+    for regression in regressions:
+        print(f"    {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:2]))
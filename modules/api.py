@@ -0,0 +1,160 @@
+"""In-process interface to the drivers, for arrays in memory.
+
+Functions
+-----------------------
+as_dataset()
+    View an array-like object as a 2D floating-point dataset.
+analyze()
+    Analyze an array with the requested driver.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from typing import Callable
+from typing import Optional
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from modules import drivers
+from modules.common import select_fields
+from modules.results import Stats
+from modules.results import BinnedStats
+from modules.functionals import susceptibility
+from modules.functionals import compile_expression
+
+
+# DRIVERS AVAILABLE THROUGH `analyze()`
+DRIVERS = ("avs", "ave", "jck")
+
+
+def as_dataset(data: ArrayLike) -> np.ndarray:
+    """View an array-like object as a 2D floating-point dataset.
+
+    Arrays and buffer-protocol objects of floating-point type
+    are viewed without copies; other types are converted to
+    `float64`. 1D arrays are considered as a single column.
+
+    Parameters
+    -----------------------
+    data : ArrayLike
+        The dataset, rows by columns.
+
+    Returns
+    -----------------------
+    np.ndarray
+        2D view of (or copy of, if converted) the dataset.
+
+    Raises
+    -----------------------
+    ValueError
+        If the dataset has more than 2 dimensions.
+    """
+    data = np.asarray(data)
+    if not np.issubdtype(data.dtype, np.floating):
+        data = data.astype(np.float64)
+
+    if data.ndim == 1:
+        return data.reshape((-1, 1))
+    if data.ndim != 2:
+        raise ValueError(f"expected a 1D or 2D array, got {data.ndim}D")
+
+    return data
+
+
+def analyze(  # pylint: disable=too-many-arguments
+    data: ArrayLike,
+    driver: str = "ave",
+    *,
+    skip: int = 0,
+    fields: Optional[list[int]] = None,
+    actime: bool = False,
+    func: Optional[Callable | str] = None,
+) -> tuple | Stats | BinnedStats:
+    """Analyze an array with the requested driver.
+
+    Nothing is printed, and no formatting module is imported:
+    the function can be called repeatedly in-process.
+
+    Parameters
+    -----------------------
+    data : ArrayLike
+        The dataset, rows by columns (see `as_dataset()`).
+    driver : str, default = "ave"
+        The driver to run, `"avs"`, `"ave"` or `"jck"`.
+    skip : int, default = 0
+        The percentage (0-100) of rows to skip.
+    fields : Optional[list[int]], default = None
+        Columns to analyze (0-indexed), all if `None`. Evenly
+        spaced increasing columns are selected without copies.
+    actime : bool, default = False
+        If True, `"ave"` also estimates the autocorrelation
+        times (by binning).
+    func : Optional[Callable | str], default = None
+        Functional for `"jck"` (see `modules.functionals`), or
+        expression over the column aliases `a0`, `a1`, ...
+        (see `compile_expression()`); the susceptibility if
+        `None`.
+
+    Returns
+    -----------------------
+    tuple | Stats | BinnedStats
+        - `"avs"`: `Stats` object with column statistics.
+        - `"ave"`: the `ScalingStats` binsize scaling of all
+          columns, and the list of autocorrelation times (empty
+          if not computed).
+        - `"jck"`: `BinnedStats` object with the binsize scaling
+          of the jackknife estimate.
+
+    Raises
+    -----------------------
+    ValueError
+        If the driver, the dataset, `skip` or `func` are
+        invalid.
+    TypeError
+        If the functional does not accept the number of columns.
+    ParsingError
+        If requested column(s) do not exist.
+    TailoringError
+        If not enough rows are left for the driver.
+    """
+    if driver not in DRIVERS:
+        raise ValueError(f"invalid driver '{driver}'")
+
+    data = select_fields(as_dataset(data), fields)
+
+    if driver == "avs":
+        return drivers.avs(data, skip)[0]
+    if driver == "ave":
+        return drivers.ave(data, skip, actime)[:2]
+
+    if func is None:
+        func = susceptibility
+    elif isinstance(func, str):
+        func = compile_expression(func)
+
+    return drivers.jck(data, skip, func)[0]
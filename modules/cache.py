@@ -0,0 +1,374 @@
+"""Binary cache of parsed datasets.
+
+After the first parsing, all the columns of a text file are
+stored as a `.npy` file in the cache directory, and memory-mapped
+by later calls (whatever the selected fields) instead of parsing
+the file again. Entries are keyed by path, size, modification
+time and a hash of the file contents, plus the storage type, and
+evicted in least-recently-used order beyond a size cap.
+
+Functions
+-----------------------
+cache_dir()
+    Return the default cache directory.
+cache_size()
+    Return the default cache size cap.
+entry_name()
+    Compute the cache entry name of a file.
+evict()
+    Remove least recently used entries beyond a size cap.
+cached_parse_ds()
+    Parse a 2D array from a file, through the cache.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import glob
+import hashlib
+from itertools import chain
+from dataclasses import asdict
+from typing import Optional
+
+import numpy as np
+
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import is_binary
+from modules.common import parse_ds
+from modules.common import select_fields
+from modules.instrument import profiled
+from modules.tokenizer import COUNT_BYTES
+from modules.tokenizer import FILL_LINES
+from modules.tokenizer import compression
+from modules.tokenizer import count_rows
+from modules.tokenizer import fill_rows
+from modules.tokenizer import loadtxt_chunks
+from modules.tokenizer import open_data
+from modules.tokenizer import read_blocks
+
+
+# BYTES HASHED AT THE BEGINNING AND END OF A FILE
+HASH_BYTES = 2**20
+
+# DEFAULT CACHE SIZE CAP (BYTES)
+CACHE_SIZE = 8 * 2**30
+
+
+def cache_dir() -> str:
+    """Return the default cache directory.
+
+    `$DAS_CACHE_DIR` if set, otherwise `das` within
+    `$XDG_CACHE_HOME` (default `~/.cache`).
+
+    Returns
+    -----------------------
+    str
+        Path to the cache directory.
+    """
+    if "DAS_CACHE_DIR" in os.environ:
+        return os.environ["DAS_CACHE_DIR"]
+
+    base = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(base, "das")
+
+
+def cache_size() -> int:
+    """Return the default cache size cap.
+
+    `$DAS_CACHE_SIZE` (in bytes) if set, otherwise `CACHE_SIZE`.
+
+    Returns
+    -----------------------
+    int
+        Maximum total size of the cache entries, in bytes.
+    """
+    return int(os.environ.get("DAS_CACHE_SIZE", CACHE_SIZE))
+
+
+def entry_name(file: str, config: ParseConfig = ParseConfig()) -> str:
+    """Compute the cache entry name of a file.
+
+    The name is `<path hash>-<identity hash>-<variant>.npy`,
+    where the identity hash covers size, modification time and
+    the first and last `HASH_BYTES` of the file, and the variant
+    the storage type. Entries store all the columns, and do not
+    depend on the selected fields.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file.
+    config : ParseConfig, default = ParseConfig()
+        Parsing options.
+
+    Returns
+    -----------------------
+    str
+        Name of the cache entry.
+    """
+    path = os.path.abspath(file)
+    info = os.stat(path)
+
+    identity = hashlib.blake2b(
+        f"{info.st_size}:{info.st_mtime_ns}".encode(), digest_size=16
+    )
+    with open(path, "rb") as f:
+        identity.update(f.read(HASH_BYTES))
+        if info.st_size > 2 * HASH_BYTES:
+            f.seek(-HASH_BYTES, os.SEEK_END)
+        identity.update(f.read(HASH_BYTES))
+
+    path_hash = hashlib.blake2b(path.encode(), digest_size=16)
+    variant = hashlib.blake2b(config.dtype.encode(), digest_size=8)
+    return (
+        f"{path_hash.hexdigest()}-{identity.hexdigest()}"
+        f"-{variant.hexdigest()}.npy"
+    )
+
+
+def evict(directory: str, max_bytes: int) -> None:
+    """Remove least recently used entries beyond a size cap.
+
+    Parameters
+    -----------------------
+    directory : str
+        Path to the cache directory.
+    max_bytes : int
+        Maximum total size of the remaining entries.
+    """
+    entries = []
+    for path in glob.glob(os.path.join(directory, "*.npy")):
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((info.st_mtime_ns, info.st_size, path))
+
+    # most recently used first
+    entries.sort(reverse=True)
+
+    total = 0
+    for _, size, path in entries:
+        total += size
+        if total > max_bytes:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _write_entry(
+    file: str, config: ParseConfig, tmp: str, max_bytes: int
+) -> bool:
+    """Low-level function, parse all columns of a file into a `.npy` file.
+
+    The rows are counted first, then parsed chunk by chunk into
+    the memory-mapped output, so that the peak memory does not
+    depend on the size of the file; with `config.parse_jobs`
+    larger than 1, uncompressed files are parsed in memory by
+    `modules.parallel` instead, then saved.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    config : ParseConfig
+        Parsing options (`fields` are ignored).
+    tmp : str
+        Path to the `.npy` file to write.
+    max_bytes : int
+        Maximum size of the parsed dataset.
+
+    Returns
+    -----------------------
+    bool
+        `True` if written, `False` if the file has no rows or the
+        dataset would be larger than `max_bytes`.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()` with the column number test, or if
+        the file changes while parsed.
+    """
+    dtype = config.dtype
+    if config.parse_jobs > 1 and compression(file) is None:
+        data = parse_ds(
+            file, None, True, dtype=dtype, parse_jobs=config.parse_jobs
+        )
+        if data.shape[0] == 0 or data.nbytes > max_bytes:
+            return False
+        with open(tmp, "wb") as f:
+            np.save(f, data)
+        return True
+
+    rows = sum(count_rows(block) for block in read_blocks(file, COUNT_BYTES))
+
+    with open_data(file, text=True) as f:
+        chunks = loadtxt_chunks(f, None, True, dtype, FILL_LINES)
+        first = next(chunks, None)
+        if first is None:
+            return False
+
+        shape = (rows, first.shape[1])
+        if shape[0] * shape[1] * np.dtype(dtype).itemsize > max_bytes:
+            return False
+        entry = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=dtype, shape=shape
+        )
+        fill_rows(entry, chain([first], chunks))
+
+    entry.flush()
+    return True
+
+
+def _store(
+    file: str, config: ParseConfig, path: str, max_bytes: int
+) -> Optional[np.ndarray]:
+    """Parse all columns of a file into the cache, replacing old entries.
+
+    Failures to write are ignored, the cache being an
+    optimization only.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    config : ParseConfig
+        Parsing options.
+    path : str
+        Path to the cache entry.
+    max_bytes : int
+        Maximum total size of the cache.
+
+    Returns
+    -----------------------
+    Optional[np.ndarray]
+        The memory-mapped entry, `None` if not cached.
+
+    Raises
+    -----------------------
+    ParsingError
+        If the file cannot be parsed as a whole and
+        `config.colnum_test` is `True`.
+    """
+    directory = os.path.dirname(path)
+    prefix, identity, _ = os.path.basename(path).split("-")
+    tmp = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+
+        # entries of previous versions of the same file
+        for stale in glob.glob(os.path.join(directory, f"{prefix}-*.npy")):
+            if os.path.basename(stale).split("-")[1] != identity:
+                os.remove(stale)
+
+        if not _write_entry(file, config, tmp, max_bytes):
+            return None
+        os.replace(tmp, path)
+    except OSError:
+        return None
+    except ParsingError:
+        # then parsed as `parse_ds()` would, possibly without some
+        # rows or columns
+        if config.colnum_test:
+            raise
+        return None
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    evict(directory, max_bytes)
+    return np.load(path, mmap_mode="r")
+
+
+@profiled("parse")
+def cached_parse_ds(
+    file: str,
+    config: ParseConfig,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+) -> np.ndarray:
+    """Parse a 2D array from a file, through the cache.
+
+    On a hit the cached dataset is memory-mapped (read-only), and
+    the selected fields taken from it. On a miss all the columns
+    are parsed chunk by chunk into a new entry; files which
+    cannot be cached (empty, ragged, or larger than the cache)
+    are parsed as `parse_ds()` would. Binary files are never
+    cached.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    config : ParseConfig
+        Parsing options.
+    directory : Optional[str], default = None
+        Path to the cache directory, `cache_dir()` if `None`.
+    max_bytes : Optional[int], default = None
+        Maximum total size of the cache, `cache_size()` if
+        `None`.
+
+    Returns
+    -----------------------
+    np.ndarray
+        A 2D array storing the parsed dataset.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`.
+    """
+    if is_binary(file):
+        return parse_ds(file, **asdict(config))
+
+    if not os.path.isfile(file):
+        raise ParsingError("file does not exist")
+
+    directory = cache_dir() if directory is None else directory
+    max_bytes = cache_size() if max_bytes is None else max_bytes
+    path = os.path.join(directory, entry_name(file, config))
+
+    try:
+        dataset = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        dataset = _store(file, config, path, max_bytes)
+        if dataset is None:
+            return parse_ds(file, **asdict(config))
+    else:
+        try:
+            # refreshing the LRU position
+            os.utime(path)
+        except OSError:
+            pass
+
+    return select_fields(dataset, config.fields)
@@ -2,25 +2,29 @@
 
 Functions
 -----------------------
+is_binary()
+    Check if a file is in one of the binary formats.
+select_fields()
+    Select columns from a 2D array, without copies if possible.
 parse_ds()
     Parse a 2D array from a file.
+skipped_rows()
+    Compute the number of initial rows removed by `drop_rows()`.
 drop_rows()
     Remove rows from 2D array.
 rebin()
     Rebin a 2D array with perfect shape assumed.
+bin_pyramid()
+    Rebin a 2D array at all halvings of the number of bins.
+pyramid_stats()
+    Compute statistical observables at all levels of a pyramid.
 get_stats()
     Compute statistical observables for dataset.
 
 Classes
 -----------------------
-ParsingError
-    Subclassed exception for errors in dataset parsing.
-TailoringError
-    Subclassed exception for errors in dataset tailoring.
-Stats
-    Result class for `get_stats()`.
-BinnedStats
-    Results of bin number scaling (single column).
+ParseConfig
+    Common configuration for parsing functions.
 """
 
 # Copyright (c) 2023 Adriano Angelone
@@ -56,73 +60,316 @@ from typing import Optional
 
 import numpy as np
 
+from modules.errors import ParsingError
+from modules.errors import TailoringError
+from modules.results import Stats
+from modules.instrument import profiled
+from modules.tokenizer import BLOCK_SIZE
+from modules.tokenizer import COUNT_BYTES
+from modules.tokenizer import FILL_LINES
+from modules.tokenizer import compression
+from modules.tokenizer import count_rows
+from modules.tokenizer import fill_rows
+from modules.tokenizer import loadtxt_chunks
+from modules.tokenizer import loadtxt_source
+from modules.tokenizer import open_data
+from modules.tokenizer import project_fields
+from modules.tokenizer import read_blocks
+from modules.tokenizer import tokenize
+
 
 # MAX AND MIN NUM OF BINS TO CONSIDER WHEN BINNING
 MAXBINS = 1024
 MINBINS = 64
 
+# NUMBER OF VALUES REDUCED AT ONCE BY `get_stats()`
+# (COLUMN GROUPS SIZED TO KEEP THE TEMPORARIES IN CACHE)
+STATS_BLOCK = 2**16
 
-class ParsingError(Exception):
-    """Subclassed exception for errors in dataset parsing."""
-
-
-class TailoringError(Exception):
-    """Subclassed exception for errors in dataset tailoring."""
+# STORAGE TYPES OF PARSED DATASETS (SUMS ALWAYS IN FLOAT64)
+DTYPES = ("float64", "float32")
 
 
 @dataclass
-class Stats:
-    """Result class for `get_stats()`.
+class ParseConfig:
+    """Common configuration for parsing functions.
 
     Attributes
     -----------------------
-    m : list[float]
-        Column averages.
-    s : list[float]
-        Column SEMs.
-    ds : list[float]
-        Column SE(SEM)s.
+    fields : Optional[list[int]], default = None
+        List of fields to parse (0-indexed), all fields if
+        `None`.
+    colnum_test: bool, default = False
+        If `True`, checks if all rows have the same number of
+        columns.
+    reader : str, default = "loadtxt"
+        Parsing backend for text files, see `parse_ds()`.
+    columns : Optional[int], default = None
+        Number of columns of raw binary (`.f64`) files.
+    dtype : str, default = "float64"
+        Storage type of the parsed dataset, among `DTYPES`.
+    parse_jobs : int, default = 1
+        Number of processes parsing each text file.
     """
 
-    m: list[float]
-    s: list[float]
-    ds: list[float]
+    fields: Optional[list[int]] = None
+    colnum_test: bool = False
+    reader: str = "loadtxt"
+    columns: Optional[int] = None
+    dtype: str = "float64"
+    parse_jobs: int = 1
 
 
-@dataclass
-class BinnedStats:
-    """Results of bin number scaling (single column).
+def _parse_loadtxt(
+    file: str,
+    fields: Optional[list[int]],
+    colnum_test: bool,
+    dtype: str,
+) -> np.ndarray:
+    """Parse a 2D array from a file with `np.loadtxt()`.
 
-    Attributes
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    fields : Optional[list[int]]
+        List of fields to parse (0-indexed), all fields if
+        `None`.
+    colnum_test: bool
+        If `True`, checks if all rows have the same number of
+        columns.
+
+    Returns
+    -----------------------
+    np.ndarray
+        A 2D array storing the parsed dataset.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`.
+    """
+    if colnum_test and fields is not None:
+        # all columns checked chunk by chunk, selected ones copied
+        # into the output, preallocated once the rows are counted
+        # (column-major, as the selection of fields from a whole
+        # dataset)
+        rows = sum(
+            count_rows(block) for block in read_blocks(file, COUNT_BYTES)
+        )
+        data = np.empty((rows, len(fields)), dtype=dtype, order="F")
+        with open_data(file, text=True) as f:
+            chunks = loadtxt_chunks(f, fields, True, dtype, FILL_LINES)
+            fill_rows(data, chunks)
+        return data
+
+    # without `colnum_test` only selected columns are taken, others
+    # ignored (unless an empty column in or between the selected,
+    # then an exception is raised)
+    with loadtxt_source(file) as source:
+        try:
+            return np.loadtxt(
+                source,
+                comments="#",
+                dtype=dtype,
+                usecols=fields if not colnum_test else None,
+                ndmin=2,
+            )
+        except ValueError as err:
+            raise ParsingError(err) from err
+
+
+def _parse_block(
+    file: str,
+    fields: Optional[list[int]],
+    colnum_test: bool,
+    dtype: str,
+) -> np.ndarray:
+    """Parse a 2D array from a file with the block tokenizer.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    fields : Optional[list[int]]
+        List of fields to parse (0-indexed), all fields if
+        `None`.
+    colnum_test: bool
+        If `True`, checks if all rows have the same number of
+        columns.
+
+    Returns
+    -----------------------
+    np.ndarray
+        A 2D array storing the parsed dataset.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`.
+    """
+    blocks = []
+    offset = 0
+    ncols = None
+
+    for block in read_blocks(file, BLOCK_SIZE):
+        parsed, ncols = tokenize(block, fields, colnum_test, offset, ncols)
+        if parsed.shape[0] > 0:
+            # converted block by block, to limit the peak memory
+            blocks.append(parsed.astype(dtype, copy=False))
+            offset += parsed.shape[0]
+
+    if not blocks:
+        # same shape as `np.loadtxt()` on empty files
+        width = len(fields) if fields is not None else 1
+        blocks.append(np.empty((0, width), dtype=dtype))
+
+    if colnum_test and fields is not None:
+        # all rows validated, columns already selected
+        project_fields(fields, ncols or 1)
+
+    return blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+
+
+# AVAILABLE BACKENDS FOR `parse_ds()` (`block` IS NOT FASTER, AND
+# ONLY KEPT TO CHECK THE TOKENIZER OF `modules.parallel` AND
+# `modules.follow` AGAINST `np.loadtxt()`)
+READERS = {"loadtxt": _parse_loadtxt, "block": _parse_block}
+
+# EXTENSIONS OF BINARY FORMATS
+BINARY_EXTENSIONS = (".npy", ".npz", ".f64")
+
+
+def is_binary(file: str) -> bool:
+    """Check if a file is in one of the binary formats.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file.
+
+    Returns
+    -----------------------
+    bool
+        `True` if the extension is among `BINARY_EXTENSIONS`.
+    """
+    return os.path.splitext(file)[1] in BINARY_EXTENSIONS
+
+
+def select_fields(data: np.ndarray, fields: Optional[list[int]]) -> np.ndarray:
+    """Select columns from a 2D array, without copies if possible.
+
+    Evenly spaced increasing fields are selected as a view,
+    other choices require a copy.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The dataset.
+    fields : Optional[list[int]]
+        List of fields to select (0-indexed), all fields if
+        `None`.
+
+    Returns
+    -----------------------
+    np.ndarray
+        The selected columns.
+
+    Raises
     -----------------------
-    nbins: list[int]
-        List of bin numbers.
-    bsize: list[int]
-        List of binsizes.
-    m : list[float]
-        Average per binsize.
-    s : list[float]
-        SEM per binsize.
-    ds : list[float]
-        SE(SEM) per binsize.
+    ParsingError
+        If requested column(s) do not exist.
     """
+    if fields is None:
+        return data
+
+    cols = project_fields(fields, data.shape[1])
+    step = cols[1] - cols[0] if len(cols) > 1 else 1
+    if step > 0 and cols == list(range(cols[0], cols[-1] + 1, step)):
+        return data[:, cols[0] : (cols[-1] + 1) : step]
+
+    return data[:, cols]
 
-    nbins: list[int]
-    bsize: list[int]
-    m: list[float]
-    s: list[float]
-    ds: list[float]
 
+def _load_binary(file: str, columns: Optional[int], dtype: str) -> np.ndarray:
+    """Load a 2D array from a binary file, memory-mapped if possible.
 
-def parse_ds(
+    - `.npy` files are memory-mapped, 1D arrays are considered
+      as a single column.
+    - `.npz` files must contain a single array, and are loaded
+      in memory (compressed archives cannot be mapped).
+    - `.f64` files are memory-mapped as raw little-endian
+      float64 values, stored row by row.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    columns : Optional[int]
+        Number of columns of `.f64` files.
+    dtype : str
+        Storage type of the returned dataset.
+
+    Returns
+    -----------------------
+    np.ndarray
+        A 2D array storing the dataset, still memory-mapped if
+        stored as `dtype`.
+
+    Raises
+    -----------------------
+    ParsingError
+        If the file is not a valid dataset.
+    """
+    ext = os.path.splitext(file)[1]
+
+    try:
+        if ext == ".npy":
+            data = np.load(file, mmap_mode="r")
+        elif ext == ".npz":
+            with np.load(file) as archive:
+                if len(archive.files) != 1:
+                    raise ParsingError("archive should store a single array")
+                data = archive[archive.files[0]]
+        else:
+            if columns is None or columns < 1:
+                raise ParsingError("number of columns required")
+            if os.path.getsize(file) % (8 * columns) != 0:
+                raise ParsingError("file size not a multiple of row size")
+            data = np.memmap(file, dtype="<f8", mode="r")
+            data = data.reshape((-1, columns))
+    except ValueError as err:
+        raise ParsingError(err) from err
+
+    if data.ndim == 1:
+        data = data.reshape((-1, 1))
+    if data.ndim != 2:
+        raise ParsingError(f"invalid number of dimensions {data.ndim}")
+
+    # only conversions of other types require copies
+    return data.astype(dtype, copy=False)
+
+
+@profiled("parse")
+def parse_ds(  # pylint: disable=too-many-arguments
     file: str,
     fields: Optional[list[int]] = None,
     colnum_test: bool = False,
+    reader: str = "loadtxt",
+    columns: Optional[int] = None,
+    dtype: str = "float64",
+    parse_jobs: int = 1,
 ) -> np.ndarray:
     """Parse a 2D array from a file.
 
     - Empty and commented (`#`) lines are skipped.
     - Does not accept non-commented headers.
+    - Binary files (see `is_binary()`) are memory-mapped when
+      possible, and `fields` selected as a view when possible
+      (see `select_fields()`).
+    - Compressed text files (gzip, bzip2, xz, and zstd if the
+      `zstandard` package is installed) are detected by their
+      magic bytes, and decompressed on the fly.
 
     Parameters
     -----------------------
@@ -134,6 +381,19 @@ def parse_ds(
     colnum_test: bool, default = False
         If `True`, checks if all rows have the same number of
         columns.
+    reader : str, default = "loadtxt"
+        Parsing backend for text files, among the keys of
+        `READERS`: `loadtxt` uses `np.loadtxt()`, `block` the
+        vectorized tokenizer of `modules.tokenizer` (slower,
+        kept for testing).
+    columns : Optional[int], default = None
+        Number of columns of raw binary (`.f64`) files.
+    dtype : str, default = "float64"
+        Storage type of the parsed dataset, among `DTYPES`.
+    parse_jobs : int, default = 1
+        If larger than 1, uncompressed text files are split in
+        ranges of lines parsed by up to `parse_jobs` processes
+        (see `modules.parallel`), regardless of `reader`.
 
     Returns
     -----------------------
@@ -142,6 +402,10 @@ def parse_ds(
 
     Raises
     -----------------------
+    ValueError
+        If unknown `reader`.
+    ValueError
+        If unknown `dtype`.
     ParsingError
         If file not found.
     ParsingError
@@ -151,57 +415,43 @@ def parse_ds(
         regardless of `colnum_test`.
     ParsingError
         If requested column(s) do not exist.
+    ParsingError
+        If invalid binary file.
+    ParsingError
+        If unavailable compression format.
     """
+    if reader not in READERS:
+        raise ValueError(f"unknown reader '{reader}'")
+    if dtype not in DTYPES:
+        raise ValueError(f"unknown dtype '{dtype}'")
+
     if not os.path.isfile(file):
         raise ParsingError("file does not exist")
 
-    if not colnum_test:
-        # only take selected columns, others ignored
-        # (unless an empty column in or between the selected,
-        # then an exception is raised)
-        try:
-            dataset = np.loadtxt(
-                file,
-                comments="#",
-                dtype=np.float64,
-                usecols=fields,
-                ndmin=2,
-            )
-        except ValueError as err:
-            raise ParsingError(err) from err
-    else:
-        # get all columns
-        try:
-            dataset = np.loadtxt(
-                file,
-                comments="#",
-                dtype=np.float64,
-                usecols=None,
-                ndmin=2,
-            )
-        except ValueError as err:
-            raise ParsingError(err) from err
+    if is_binary(file):
+        return select_fields(_load_binary(file, columns, dtype), fields)
 
-        try:
-            if fields is not None:
-                dataset = dataset[:, fields]
-        except IndexError as err:
-            raise ParsingError(err) from err
+    if parse_jobs > 1 and compression(file) is None:
+        # pylint: disable-next=import-outside-toplevel
+        from modules.parallel import parse_parallel
 
-    return dataset
+        config = ParseConfig(fields, colnum_test, reader, columns, dtype)
+        return parse_parallel(file, config, parse_jobs)
 
+    return READERS[reader](file, fields, colnum_test, dtype)
 
-def drop_rows(
-    data: np.ndarray,
+
+def skipped_rows(
+    rows: int,
     skip_perc: int = 0,
     nbins: Optional[int] = None,
-) -> np.ndarray:
-    """Remove rows from 2D array.
+) -> int:
+    """Compute the number of initial rows removed by `drop_rows()`.
 
     Parameters
     -----------------------
-    data : np.ndarray
-        The dataset to tailor.
+    rows : int
+        Number of rows of the dataset.
     skip_perc : int, default = 0
         Percentage (1-100) of rows to skip.
     nbins : Optional[int], default = None
@@ -210,8 +460,8 @@ def drop_rows(
 
     Returns
     -----------------------
-    np.ndarray
-        The tailored array.
+    int
+        The number of rows to skip.
 
     Raises
     -----------------------
@@ -220,8 +470,6 @@ def drop_rows(
     TailoringError
         If `nbins` set and not enough rows left.
     """
-    rows = data.shape[0]
-
     if not 0 <= skip_perc <= 100:
         raise ValueError("invalid skip percentage")
 
@@ -235,23 +483,68 @@ def drop_rows(
         keep -= keep % nbins
         skip = rows - keep
 
-    return data[skip:]
+    return skip
+
 
+@profiled("tailor")
+def drop_rows(
+    data: np.ndarray,
+    skip_perc: int = 0,
+    nbins: Optional[int] = None,
+) -> np.ndarray:
+    """Remove rows from 2D array.
 
-def rebin(data: np.ndarray, nbins: int) -> np.ndarray:
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The dataset to tailor.
+    skip_perc : int, default = 0
+        Percentage (1-100) of rows to skip.
+    nbins : Optional[int], default = None
+        If not `None`, will skip additional rows to allow this
+        number of identical bins.
+
+    Returns
+    -----------------------
+    np.ndarray
+        The tailored array.
+
+    Raises
+    -----------------------
+    ValueError
+        If `skip_perc` not in [0, 100].
+    TailoringError
+        If `nbins` set and not enough rows left.
+    """
+    return data[skipped_rows(data.shape[0], skip_perc, nbins) :]
+
+
+@profiled("bin")
+def rebin(
+    data: np.ndarray,
+    nbins: int,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
     """Rebin a 2D array with perfect shape assumed.
 
+    The binning is performed as a single reshape-and-reduce
+    operation, without Python-level loops over the bins.
+
     Parameters
     -----------------------
     data : np.ndarray
         The dataset to rebin.
     nbins : int
         Number of requested bins.
+    out : Optional[np.ndarray], default = None
+        If not `None`, buffer of shape `(nbins, data.shape[1])`
+        where the result is stored. Must not overlap with `data`.
 
     Returns
     -----------------------
     np.ndarray
-        The rebinned array.
+        The rebinned array (`out`, if passed), of the same type
+        as `data` (bins are summed in float64).
 
     Raises
     -----------------------
@@ -267,16 +560,129 @@ def rebin(data: np.ndarray, nbins: int) -> np.ndarray:
         raise TailoringError("leftover rows in binning")
 
     size = data.shape[0] // nbins
-    data2 = np.ndarray((nbins, data.shape[1]))
+    if out is None:
+        # C-ordered output regardless of the input memory layout
+        out = np.empty((nbins, data.shape[1]), dtype=data.dtype)
 
-    for ib in range(nbins):
-        data2[ib] = data[(ib * size) : ((ib + 1) * size)].mean(axis=0)
-    return data2
+    # splitting the row axis is always possible without copies
+    return data.reshape((nbins, size, data.shape[1])).mean(
+        axis=1, dtype=np.float64, out=out
+    )
 
 
+@profiled("bin")
+def bin_pyramid(
+    data: np.ndarray,
+    maxbins: int = MAXBINS,
+    minbins: int = MINBINS,
+) -> tuple[list[int], np.ndarray]:
+    """Rebin a 2D array at all halvings of the number of bins.
+
+    The first level rebins `data` in `maxbins` bins, each
+    following level pairs adjacent bins of the previous one
+    until less than `minbins` bins would be left. The levels are
+    stored one after the other in a single array with one row
+    per column of `data`: each level is obtained from the
+    previous one by averaging adjacent pairs, in place.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The dataset to rebin.
+    maxbins : int, default = MAXBINS
+        Number of bins of the first level.
+    minbins : int, default = MINBINS
+        Minimum number of bins of the last level.
+
+    Returns
+    -----------------------
+    tuple[list[int], np.ndarray]
+        - Number of bins of each level.
+        - Array of shape `(data.shape[1], sum(nbins))`, of the
+          same type as `data`, storing the bins of each level in
+          consecutive slices of its rows.
+
+    Raises
+    -----------------------
+    TailoringError
+        If insufficient rows for binning.
+    TailoringError
+        If leftover rows after binning.
+    """
+    levels = []
+    nbins = maxbins
+    while nbins >= minbins:
+        levels.append(nbins)
+        nbins //= 2
+
+    pyramid = np.empty((data.shape[1], sum(levels)), dtype=data.dtype)
+    pyramid[:, :maxbins] = rebin(data, maxbins).T
+
+    start = 0
+    for nbins, half in zip(levels, levels[1:]):
+        level = pyramid[:, start : (start + nbins)]
+        out = pyramid[:, (start + nbins) : (start + nbins + half)]
+
+        np.add(level[:, 0::2], level[:, 1::2], out=out)
+        out /= 2.0
+        start += nbins
+
+    return (levels, pyramid)
+
+
+@profiled("stats")
+def pyramid_stats(levels: list[int], pyramid: np.ndarray) -> np.ndarray:
+    """Compute statistical observables at all levels of a pyramid.
+
+    Equivalent to `get_stats()` on each level, with the
+    deviations from the level averages computed for all levels
+    and columns at once.
+
+    Parameters
+    -----------------------
+    levels : list[int]
+        Number of bins of each level.
+    pyramid : np.ndarray
+        The levels, as returned by `bin_pyramid()`.
+
+    Returns
+    -----------------------
+    np.ndarray
+        Array of shape `(3, len(levels), pyramid.shape[0])`,
+        storing averages, SEMs and SE(SEM)s.
+    """
+    nbins = np.array(levels)
+    bounds = np.concatenate(([0], np.cumsum(nbins)))
+    segments = [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    res = np.empty((3, nbins.shape[0], pyramid.shape[0]))
+    m, s, ds = res
+
+    for ilevel, seg in enumerate(segments):
+        np.sum(pyramid[:, seg], axis=1, dtype=np.float64, out=m[ilevel])
+    m /= nbins[:, None]
+
+    dev = pyramid - np.repeat(m.T, nbins, axis=1)
+    dev *= dev
+
+    for ilevel, seg in enumerate(segments):
+        np.sum(dev[:, seg], axis=1, out=s[ilevel])
+    s /= (nbins - 1)[:, None]
+    np.sqrt(s, out=s)
+    s /= np.sqrt(nbins)[:, None]
+
+    np.divide(s, np.sqrt(2.0 * (nbins - 1))[:, None], out=ds)
+
+    return res
+
+
+@profiled("stats")
 def get_stats(data: np.ndarray) -> Stats:
     """Compute statistical observables for dataset.
 
+    Columns are reduced in contiguous groups, transposed if
+    needed, so that each one is summed pairwise as a whole.
+
     Parameters
     -----------------------
     data : np.ndarray
@@ -287,12 +693,28 @@ def get_stats(data: np.ndarray) -> Stats:
     Stats
         Stats object with column statistical summary.
     """
-    N = data.shape[0]
-
-    res = Stats(m=[], s=[], ds=[])
-    for col in data.T:
-        res.m.append(col.mean())
-        res.s.append(col.std(ddof=1) / sqrt(N))
-        res.ds.append(res.s[-1] / sqrt(2.0 * (N - 1)))
+    N, cols = data.shape
+
+    res = Stats(m=np.empty(cols), s=np.empty(cols), ds=np.empty(cols))
+    step = max(1, STATS_BLOCK // max(N, 1))
+    for start in range(0, cols, step):
+        group = slice(start, start + step)
+        columns = np.ascontiguousarray(data[:, group].T)
+
+        m = np.sum(columns, axis=1, dtype=np.float64, out=res.m[group])
+        m /= N
+
+        # same operations as `np.std()`, in place if float64 copy
+        if np.may_share_memory(columns, data) or columns.dtype != m.dtype:
+            dev = columns - m[:, None]
+        else:
+            dev = np.subtract(columns, m[:, None], out=columns)
+        dev *= dev
+        np.sum(dev, axis=1, out=res.s[group])
+
+    np.divide(res.s, N - 1, out=res.s)
+    np.sqrt(res.s, out=res.s)
+    np.divide(res.s, sqrt(N), out=res.s)
+    np.divide(res.s, sqrt(2.0 * (N - 1)), out=res.ds)
 
     return res
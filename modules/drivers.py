@@ -5,11 +5,30 @@ Functions
 avs()
     Compute simple average, SEMs, and SE(SEM)s of a 2D array by
     columns.
+binsize_scaling()
+    Compute binsize scaling of a tailored 2D array.
+binning_actimes()
+    Estimate autocorrelation times from binsize scaling.
+fft_actimes()
+    Estimate integrated autocorrelation times via FFT.
 ave()
     Compute binsize scaling of averages, SEMs, and SE(SEM)s of
     a 2D array by columns.
+jackknife_scaling()
+    Compute binsize scaling of the jackknife estimate of a
+    functional.
 jck()
     Compute jackknife estimate for error of passed functional.
+bootstrap_scaling()
+    Compute binsize scaling of the bootstrap estimate of a
+    functional.
+bst()
+    Compute bootstrap estimate for error of passed functional.
+
+Classes
+-----------------------
+BootstrapConfig
+    Configuration of the bootstrap resampling.
 """
 
 # Copyright (c) 2023 Adriano Angelone
@@ -38,17 +57,51 @@ jck()
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
+from functools import partial
+from dataclasses import dataclass
 from typing import Callable
+from typing import Optional
 
 import numpy as np
 
 from modules.common import MAXBINS
 from modules.common import MINBINS
-from modules.common import Stats
-from modules.common import BinnedStats
+from modules.common import TailoringError
 from modules.common import drop_rows
-from modules.common import rebin
+from modules.common import bin_pyramid
+from modules.common import pyramid_stats
 from modules.common import get_stats
+from modules.results import Stats
+from modules.results import BinnedStats
+from modules.results import ScalingStats
+
+
+# FACTOR OF THE AUTOMATIC WINDOWING RULE OF `fft_actimes()`
+ACTIME_WINDOW = 5.0
+
+# MEMORY (BYTES) OF THE RESAMPLED BINS OF A BATCH OF BOOTSTRAP
+# REPLICAS, GENERATED AT ONCE WITH A SINGLE GATHER PER LEVEL
+BST_BUDGET = 2**26
+
+
+@dataclass
+class BootstrapConfig:
+    """Configuration of the bootstrap resampling.
+
+    Attributes
+    -----------------------
+    replicas : int, default = 1000
+        Number of bootstrap replicas.
+    seed : int, default = 0
+        Seed of the random generator (results do not depend on
+        `workers`).
+    workers : int, default = 1
+        Number of processes generating batches of replicas.
+    """
+
+    replicas: int = 1000
+    seed: int = 0
+    workers: int = 1
 
 
 def avs(data: np.ndarray, skip_perc: int) -> tuple[Stats, str]:
@@ -76,9 +129,123 @@ def avs(data: np.ndarray, skip_perc: int) -> tuple[Stats, str]:
     return (get_stats(data), report)
 
 
+def binsize_scaling(
+    data: np.ndarray,
+    keep: int,
+    pyramid: Optional[tuple[list[int], np.ndarray]] = None,
+) -> ScalingStats:
+    """Compute binsize scaling of a tailored 2D array.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The tailored 2D array, or any rebinning of it with at
+        least `MAXBINS` bins.
+    keep : int
+        Number of rows of the tailored 2D array.
+    pyramid : Optional[tuple[list[int], np.ndarray]], default = None
+        Result of `bin_pyramid()` on the tailored 2D array, if
+        already available (e.g. cached), computed otherwise.
+
+    Returns
+    -----------------------
+    ScalingStats
+        Binsize scaling of all columns.
+    """
+    if pyramid is None:
+        pyramid = bin_pyramid(data, MAXBINS, MINBINS)
+    levels, pyramid = pyramid
+    bsize = [keep // nbins for nbins in levels]
+
+    return ScalingStats(levels, bsize, pyramid_stats(levels, pyramid))
+
+
+def binning_actimes(
+    unbinned: np.ndarray, scaling: ScalingStats
+) -> list[float]:
+    """Estimate autocorrelation times from binsize scaling.
+
+    Parameters
+    -----------------------
+    unbinned : np.ndarray
+        Column SEMs of the unbinned tailored array.
+    scaling : ScalingStats
+        The result of `binsize_scaling()`.
+
+    Returns
+    -----------------------
+    list[float]
+        List of autocorrelation times, 1 per column.
+    """
+    return (((scaling.values[1].max(axis=0) / unbinned) ** 2) / 2.0).tolist()
+
+
+def fft_actimes(
+    data: np.ndarray, window: float = ACTIME_WINDOW
+) -> list[tuple[float, float]]:
+    """Estimate integrated autocorrelation times via FFT.
+
+    The normalized autocorrelation function of each column is
+    computed with a zero-padded FFT, and summed up to the
+    smallest lag `W` such that `W >= window * tau(W)` (Sokal's
+    automatic windowing). The error is the Madras-Sokal estimate.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The tailored 2D array.
+    window : float, default = ACTIME_WINDOW
+        Factor of the windowing rule.
+
+    Returns
+    -----------------------
+    list[tuple[float, float]]
+        Autocorrelation times and their errors, 1 per column.
+
+    Raises
+    -----------------------
+    TailoringError
+        If insufficient rows.
+    """
+    rows = data.shape[0]
+    if rows < 2:
+        raise TailoringError("insufficient rows for autocorrelation")
+
+    # padding to at least twice the rows, to avoid wrapping around
+    nfft = 1 << (2 * rows - 1).bit_length()
+
+    # spectrum of the centered columns by linearity, without
+    # centering (copying) the data
+    spectrum = np.fft.rfft(data.astype(np.float64, copy=False), n=nfft, axis=0)
+    spectrum -= np.fft.rfft(np.ones(rows), n=nfft)[:, None] * data.mean(
+        axis=0, dtype=np.float64
+    )
+    power = spectrum.real**2 + spectrum.imag**2
+    del spectrum
+
+    acov = np.fft.irfft(power, n=nfft, axis=0)[:rows]
+    rho = acov[1:] / acov[0]
+
+    # tau(W) for W = 1, ..., rows - 1, and first lag satisfying the rule
+    tau = np.cumsum(rho, axis=0)
+    tau += 0.5
+    lags = np.arange(1, rows)
+    ok = lags[:, None] >= window * tau
+    ilag = np.where(ok.any(axis=0), ok.argmax(axis=0), rows - 2)
+
+    tau = tau[ilag, np.arange(tau.shape[1])]
+    dtau = tau * np.sqrt(2.0 * (2 * lags[ilag] + 1) / rows)
+
+    return list(zip(tau.tolist(), dtau.tolist()))
+
+
 def ave(
-    data: np.ndarray, skip_perc: int, actime: bool
-) -> tuple[list[BinnedStats], list[float], str]:
+    data: np.ndarray,
+    skip_perc: int,
+    actime: bool,
+    method: str = "binning",
+    pyramid: Optional[tuple[list[int], np.ndarray]] = None,
+) -> tuple[ScalingStats, list, str]:
     """Compute binsize scaling of averages, SEMs, and SE(SEM)s of a 2D array.
 
     Parameters
@@ -89,12 +256,20 @@ def ave(
         The percentage (1-100) of rows to skip.
     actime : bool
         If True, the autocorrelation time is computed.
+    method : str, default = "binning"
+        Estimator of the autocorrelation time, `"binning"` (see
+        `binning_actimes()`) or `"fft"` (see `fft_actimes()`).
+    pyramid : Optional[tuple[list[int], np.ndarray]], default = None
+        Result of `bin_pyramid()` on the tailored 2D array, if
+        already available (e.g. cached), computed otherwise.
 
     Returns
     -----------------------
-    tuple[list[BinnedStats], list[float], str]
-        - List of `BinnedStats` objects, 1 per column.
-        - List of autocorrelation times, 1 per column (empty if not computed).
+    tuple[ScalingStats, list, str]
+        - Binsize scaling of all columns (sequence of
+          `BinnedStats` objects, 1 per column).
+        - List of autocorrelation times, 1 per column (empty if
+          not computed); `(time, error)` pairs with `"fft"`.
         - String carrying additional information.
     """
     rows = data.shape[0]
@@ -103,42 +278,80 @@ def ave(
 
     report = f"{keep}/{rows} rows"
 
-    if actime:
-        unbinned = get_stats(data).s
+    res = binsize_scaling(data, keep, pyramid)
 
-    nbins = MAXBINS
-    bsize = keep // nbins
-    data = rebin(data, nbins=nbins)
+    actimes = []
+    if actime and method == "fft":
+        actimes = fft_actimes(data)
+    elif actime:
+        actimes = binning_actimes(get_stats(data).s, res)
 
-    cols = data.shape[1]
-    res = [
-        BinnedStats(nbins=[], bsize=[], m=[], s=[], ds=[]) for _ in range(cols)
-    ]
+    return (res, actimes, report)
 
-    while nbins >= MINBINS:
-        buffer = get_stats(data)
 
-        for r, m, s, d in zip(res, buffer.m, buffer.s, buffer.ds):
-            r.nbins.append(nbins)
-            r.bsize.append(bsize)
-            r.m.append(m)
-            r.s.append(s)
-            r.ds.append(d)
+def jackknife_scaling(
+    data: np.ndarray,
+    keep: int,
+    func: Callable,
+    pyramid: Optional[tuple[list[int], np.ndarray]] = None,
+) -> BinnedStats:
+    """Compute binsize scaling of the jackknife estimate of a functional.
 
-        nbins //= 2
-        bsize *= 2
-        data = rebin(data, nbins=nbins)
+    The leave-one-out averages of all bins of all levels are
+    computed at once from the binning pyramid, and the
+    functional evaluated on them with a single call.
 
-    actimes = []
-    if actime:
-        for s_unb, col_res in zip(unbinned, res):
-            actimes.append(((max(col_res.s) / s_unb) ** 2) / 2.0)
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The tailored 2D array, or any rebinning of it with at
+        least `MAXBINS` bins.
+    keep : int
+        Number of rows of the tailored 2D array.
+    func : Callable
+        Functional used to compute values and pseudovalues.
+    pyramid : Optional[tuple[list[int], np.ndarray]], default = None
+        Result of `bin_pyramid()` on the tailored 2D array, if
+        already available (e.g. cached), computed otherwise.
 
-    return (res, actimes, report)
+    Returns
+    -----------------------
+    BinnedStats
+        `BinnedStats` object with statistical information.
+    """
+    if pyramid is None:
+        pyramid = bin_pyramid(data, MAXBINS, MINBINS)
+    levels, pyramid = pyramid
+    nbins = np.array(levels)
+    bounds = np.concatenate(([0], np.cumsum(nbins)))
+
+    # level sums, accumulated bin after bin
+    sums = np.array(
+        [
+            np.cumsum(pyramid[:, a:b], axis=1, dtype=np.float64)[:, -1]
+            for a, b in zip(bounds[:-1], bounds[1:])
+        ]
+    ).T
+
+    # full values, 1 per level
+    val = func(list(sums / nbins))
+
+    # pseudo-averages and pseudovalues of all bins of all levels
+    rep = np.repeat(nbins, nbins)
+    ps_ave = (np.repeat(sums, nbins, axis=1) - pyramid) / (rep - 1)
+    ps_val = rep * np.repeat(val, nbins) - (rep - 1) * func(list(ps_ave))
+
+    stats = pyramid_stats(levels, ps_val.reshape((1, -1)))
+    bsize = [keep // n for n in levels]
+
+    return BinnedStats(levels, bsize, *stats[:, :, 0])
 
 
 def jck(
-    data: np.ndarray, skip_perc: int, func: Callable
+    data: np.ndarray,
+    skip_perc: int,
+    func: Callable,
+    pyramid: Optional[tuple[list[int], np.ndarray]] = None,
 ) -> tuple[BinnedStats, str]:
     """Compute jackknife estimate for error of passed functional.
 
@@ -153,6 +366,9 @@ def jck(
         The percentage (1-100) of rows to skip.
     func : Callable
         Functional used to compute values and pseudovalues.
+    pyramid : Optional[tuple[list[int], np.ndarray]], default = None
+        Result of `bin_pyramid()` on the tailored 2D array, if
+        already available (e.g. cached), computed otherwise.
 
     Returns
     -----------------------
@@ -166,34 +382,185 @@ def jck(
 
     report = f"{keep}/{rows} rows"
 
-    nbins = MAXBINS
-    bsize = keep // nbins
-    data = rebin(data, nbins=nbins)
+    return (jackknife_scaling(data, keep, func, pyramid), report)
 
-    res = BinnedStats(nbins=[], bsize=[], m=[], s=[], ds=[])
 
-    while nbins >= MINBINS:
-        sums = data.sum(axis=0)
-        # full value
-        val = func((sums / nbins).tolist())
+def _batch_size(levels: list[int], pyramid: np.ndarray) -> int:
+    """Return the number of replicas of a batch fitting `BST_BUDGET`.
 
-        # vector pseudo-averages
-        ps_ave = [(s - col) / (nbins - 1) for s, col in zip(sums, data.T)]
-        # vector of pseudovalues
-        ps_val = nbins * val - (nbins - 1) * func(ps_ave)
+    Each replica of the largest level holds the resampled bins of
+    all columns and their (64-bit) indices.
 
-        # Reshaping necessary
-        ps_val = ps_val.reshape((ps_val.shape[0], 1))
-        buffer = get_stats(ps_val)
+    Parameters
+    -----------------------
+    levels : list[int]
+        Number of bins of each level.
+    pyramid : np.ndarray
+        The levels, as returned by `bin_pyramid()`.
 
-        res.nbins.append(nbins)
-        res.bsize.append(bsize)
-        res.m.append(*buffer.m)
-        res.s.append(*buffer.s)
-        res.ds.append(*buffer.ds)
+    Returns
+    -----------------------
+    int
+        Number of replicas per batch (at least 1).
+    """
+    replica = levels[0] * (pyramid.shape[0] * pyramid.itemsize + 8)
+    return max(1, BST_BUDGET // replica)
+
+
+def _bootstrap_batch(
+    pyramid: np.ndarray,
+    levels: list[int],
+    func: Callable,
+    seed: np.random.SeedSequence,
+    size: int,
+) -> np.ndarray:
+    """Evaluate a functional on a batch of replicas of all levels.
+
+    Parameters
+    -----------------------
+    pyramid : np.ndarray
+        The levels, as returned by `bin_pyramid()`.
+    levels : list[int]
+        Number of bins of each level.
+    func : Callable
+        Functional to evaluate.
+    seed : np.random.SeedSequence
+        Seed of the batch.
+    size : int
+        Number of replicas of the batch.
+
+    Returns
+    -----------------------
+    np.ndarray
+        Array of shape `(len(levels), size)`, storing the values
+        of the functional on the replicas.
+    """
+    rng = np.random.default_rng(seed)
+    res = np.empty((len(levels), size))
+
+    start = 0
+    for ilevel, nbins in enumerate(levels):
+        level = pyramid[:, start : (start + nbins)]
+        start += nbins
+
+        # 1 row of resampled bin indices per replica
+        index = rng.integers(0, nbins, size=(size, nbins))
+        resampled = np.take(level, index, axis=1)
+        res[ilevel] = func(list(resampled.mean(axis=2, dtype=np.float64)))
+
+    return res
+
+
+def bootstrap_scaling(
+    data: np.ndarray,
+    keep: int,
+    func: Callable,
+    config: BootstrapConfig,
+    pyramid: Optional[tuple[list[int], np.ndarray]] = None,
+) -> BinnedStats:
+    """Compute binsize scaling of the bootstrap estimate of a functional.
+
+    Bins are resampled with replacement, in batches of replicas
+    whose resampled bins fit `BST_BUDGET` bytes; the error is the
+    standard deviation of the functional over the replicas.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The tailored 2D array, or any rebinning of it with at
+        least `MAXBINS` bins.
+    keep : int
+        Number of rows of the tailored 2D array.
+    func : Callable
+        Functional to estimate.
+    config : BootstrapConfig
+        Configuration of the resampling.
+    pyramid : Optional[tuple[list[int], np.ndarray]], default = None
+        Result of `bin_pyramid()` on the tailored 2D array, if
+        already available (e.g. cached), computed otherwise.
+
+    Returns
+    -----------------------
+    BinnedStats
+        `BinnedStats` object with statistical information.
+
+    Raises
+    -----------------------
+    TailoringError
+        If less than 2 replicas are requested.
+    """
+    if config.replicas < 2:
+        raise TailoringError("at least 2 bootstrap replicas required")
+
+    if pyramid is None:
+        pyramid = bin_pyramid(data, MAXBINS, MINBINS)
+    levels, pyramid = pyramid
+    nbins = np.array(levels)
+
+    # full values (also checking the functional before forking)
+    means = pyramid[:, :MAXBINS].mean(axis=1, dtype=np.float64)
+    val = np.full(nbins.shape[0], func(list(means)))
+
+    batch = _batch_size(levels, pyramid)
+    sizes = [
+        min(batch, config.replicas - start)
+        for start in range(0, config.replicas, batch)
+    ]
+    seeds = np.random.SeedSequence(config.seed).spawn(len(sizes))
+    work = partial(_bootstrap_batch, pyramid, levels, func)
+
+    if config.workers > 1 and len(sizes) > 1:
+        # pylint: disable-next=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=config.workers) as executor:
+            batches = list(executor.map(work, seeds, sizes))
+    else:
+        batches = list(map(work, seeds, sizes))
+
+    s = np.concatenate(batches, axis=1).std(axis=1, ddof=1)
+    ds = s / np.sqrt(2.0 * (nbins - 1))
+    bsize = [keep // n for n in levels]
+
+    return BinnedStats(levels, bsize, val, s, ds)
+
+
+def bst(
+    data: np.ndarray,
+    skip_perc: int,
+    func: Callable,
+    config: BootstrapConfig,
+    pyramid: Optional[tuple[list[int], np.ndarray]] = None,
+) -> tuple[BinnedStats, str]:
+    """Compute bootstrap estimate for error of passed functional.
+
+    See `modules.functionals` for blueprint of acceptable
+    functionals.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The 2D array to analyze.
+    skip_perc : int
+        The percentage (1-100) of rows to skip.
+    func : Callable
+        Functional to estimate.
+    config : BootstrapConfig
+        Configuration of the resampling.
+    pyramid : Optional[tuple[list[int], np.ndarray]], default = None
+        Result of `bin_pyramid()` on the tailored 2D array, if
+        already available (e.g. cached), computed otherwise.
+
+    Returns
+    -----------------------
+    tuple[BinnedStats, str]
+        - `BinnedStats` objects with statistical information.
+        - String carrying additional information.
+    """
+    rows = data.shape[0]
+    data = drop_rows(data, skip_perc, nbins=MAXBINS)
+    keep = data.shape[0]
 
-        nbins //= 2
-        bsize *= 2
-        data = rebin(data, nbins=nbins)
+    report = f"{keep}/{rows} rows, {config.replicas} replicas"
 
-    return (res, report)
+    return (bootstrap_scaling(data, keep, func, config, pyramid), report)
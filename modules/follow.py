@@ -0,0 +1,331 @@
+"""Incremental analysis of text files still being written.
+
+Functions
+-----------------------
+state_paths()
+    Return the paths of the persisted state of a followed file.
+
+Classes
+-----------------------
+FollowState
+    Incremental analysis state of a growing text file.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import json
+import hashlib
+
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import TailoringError
+from modules.common import is_binary
+from modules.results import Stats
+from modules.results import ScalingStats
+from modules.drivers import binning_actimes
+from modules.stream import LogBinAccumulator
+from modules.tokenizer import BLOCK_SIZE
+from modules.tokenizer import compression
+from modules.tokenizer import project_fields
+from modules.tokenizer import tokenize
+
+
+HEAD_BYTES = 4096
+
+COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz", ".zst")
+
+
+def state_paths(
+    directory: str, file: str, config: ParseConfig
+) -> tuple[str, str]:
+    """Return the paths of the persisted state of a followed file.
+
+    Parameters
+    -----------------------
+    directory : str
+        Path to the directory storing the state.
+    file : str
+        Path to the followed file.
+    config : ParseConfig
+        Parsing options.
+
+    Returns
+    -----------------------
+    tuple[str, str]
+        - Path to the JSON metadata.
+        - Path to the checkpoint of the accumulator.
+    """
+    ident = f"{os.path.abspath(file)}:{config.fields}:{config.colnum_test}"
+    key = hashlib.blake2b(ident.encode(), digest_size=16).hexdigest()
+    base = os.path.join(directory, f"follow-{key}")
+
+    return (f"{base}.json", f"{base}.npz")
+
+
+class FollowState:
+    """Incremental analysis state of a growing text file.
+
+    Only complete lines are parsed: a partially written last
+    line is left for the next update. The parsed rows are not
+    stored, but fed to a `LogBinAccumulator` (blocking analysis
+    with bin sizes as powers of 2): each update costs time
+    proportional to the new rows, and memory logarithmic in the
+    total rows. The accumulator can be persisted to disk, so
+    that a restart does not parse the file again.
+
+    Attributes
+    -----------------------
+    file : str
+        Path to the followed file.
+    config : ParseConfig
+        Parsing options (`reader`, `columns` and `dtype` are
+        ignored).
+    offset : int
+        Number of bytes of the file already parsed.
+    columns : Optional[int]
+        Number of columns of the file, if checked (only the
+        selected ones are accumulated).
+    head : bytes
+        First bytes of the file, to detect replacements.
+    acc : LogBinAccumulator
+        Accumulator of the parsed rows.
+    """
+
+    def __init__(self, file: str, config: ParseConfig):
+        """Initialize the state of a file not parsed yet.
+
+        Parameters
+        -----------------------
+        file : str
+            Path to the followed file.
+        config : ParseConfig
+            Parsing options.
+
+        Raises
+        -----------------------
+        ParsingError
+            If the file is binary or compressed.
+        """
+        if (
+            is_binary(file)
+            or os.path.splitext(file)[1] in COMPRESSED_EXTENSIONS
+            or (os.path.isfile(file) and compression(file) is not None)
+        ):
+            raise ParsingError("only plain text files can be followed")
+
+        self.file = file
+        self.config = config
+
+        self.offset = 0
+        self.columns = None
+        self.head = b""
+        self.acc = LogBinAccumulator()
+
+    @property
+    def rows(self) -> int:
+        """Number of parsed rows."""
+        return self.acc.rows
+
+    def reset(self) -> None:
+        """Discard the accumulated rows, restarting from the beginning."""
+        self.offset = 0
+        self.columns = None
+        self.head = b""
+        self.acc = LogBinAccumulator()
+
+    def update(self) -> int:
+        """Parse and accumulate the lines appended since the last update.
+
+        If the file was truncated or replaced, it is parsed again
+        from the beginning.
+
+        Returns
+        -----------------------
+        int
+            Number of new rows.
+
+        Raises
+        -----------------------
+        ParsingError
+            If file not found.
+        ParsingError
+            Same as `parse_ds()`, for the new lines.
+        """
+        if not os.path.isfile(self.file):
+            raise ParsingError("file does not exist")
+
+        with open(self.file, "rb") as f:
+            if f.read(len(self.head)) != self.head or (
+                os.fstat(f.fileno()).st_size < self.offset
+            ):
+                self.reset()
+
+            before = self.rows
+            f.seek(self.offset)
+
+            rest = b""
+            while buf := f.read(BLOCK_SIZE):
+                block = rest + buf
+                cut = block.rfind(b"\n") + 1
+                rest = block[cut:]
+                if cut == 0:
+                    continue
+
+                parsed, self.columns = tokenize(
+                    block[:cut],
+                    self.config.fields,
+                    self.config.colnum_test,
+                    self.rows,
+                    self.columns,
+                )
+                if self.config.fields and self.columns is not None:
+                    # columns selected while parsing, once rows checked
+                    project_fields(self.config.fields, self.columns)
+
+                self.acc.add(parsed)
+                self.offset += cut
+
+            if len(self.head) < HEAD_BYTES:
+                f.seek(0)
+                self.head = f.read(min(self.offset, HEAD_BYTES))
+
+        return self.rows - before
+
+    def avs(self) -> tuple[Stats, str]:
+        """Return the column statistics of the parsed rows, as `avs`.
+
+        Returns
+        -----------------------
+        tuple[Stats, str]
+            - Stats object with column statistics.
+            - String carrying additional information.
+
+        Raises
+        -----------------------
+        TailoringError
+            If less than 2 rows were parsed.
+        """
+        if self.rows < 2:
+            raise TailoringError("insufficient rows left")
+
+        return (self.acc.moments[0].stats(), f"{self.rows}/{self.rows} rows")
+
+    def ave(self, actime: bool) -> tuple[ScalingStats, list, str]:
+        """Return the binsize scaling of the parsed rows, as `ave --online`.
+
+        Parameters
+        -----------------------
+        actime : bool
+            If True, the autocorrelation time is computed.
+
+        Returns
+        -----------------------
+        tuple[ScalingStats, list, str]
+            - Binsize scaling of all columns.
+            - List of autocorrelation times, 1 per column (empty
+              if not computed).
+            - String carrying additional information.
+
+        Raises
+        -----------------------
+        TailoringError
+            If insufficient rows for binning.
+        """
+        res = self.acc.scaling()
+
+        actimes = []
+        if actime:
+            actimes = binning_actimes(res.values[1, 0], res)
+
+        return (res, actimes, f"{self.rows}/{self.rows} rows")
+
+    def save(self, directory: str) -> None:
+        """Persist the state (accumulator and file position).
+
+        Parameters
+        -----------------------
+        directory : str
+            Path to the directory storing the state.
+        """
+        meta, checkpoint = state_paths(directory, self.file, self.config)
+        os.makedirs(directory, exist_ok=True)
+
+        self.acc.save(checkpoint)
+
+        # metadata written last, atomically
+        tmp = f"{meta}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "offset": self.offset,
+                    "rows": self.rows,
+                    "columns": self.columns,
+                    "head": self.head.hex(),
+                },
+                f,
+            )
+        os.replace(tmp, meta)
+
+    @classmethod
+    def load(
+        cls, directory: str, file: str, config: ParseConfig
+    ) -> "FollowState":
+        """Restore a persisted state, or create a new one.
+
+        Parameters
+        -----------------------
+        directory : str
+            Path to the directory storing the state.
+        file : str
+            Path to the followed file.
+        config : ParseConfig
+            Parsing options.
+
+        Returns
+        -----------------------
+        FollowState
+            The restored state (empty if none was persisted, or
+            if the checkpoint does not match the metadata).
+        """
+        state = cls(file, config)
+        meta, checkpoint = state_paths(directory, file, config)
+
+        try:
+            with open(meta, encoding="utf-8") as f:
+                info = json.load(f)
+            state.acc = LogBinAccumulator.load(checkpoint)
+            if state.rows != info["rows"]:
+                return cls(file, config)
+
+            state.columns = info["columns"]
+            state.offset = info["offset"]
+            state.head = bytes.fromhex(info["head"])
+        except (OSError, ValueError, KeyError):
+            return cls(file, config)
+
+        return state
@@ -5,19 +5,57 @@ the following features:
     - Receive as arguments a list of floating-point or numpy arrays.
     - Be defined in terms of mean values of quantities.
     - Check the length of the passed list, and raise a
-      TypeError in case the number of arguments is invalid.
+      TypeError (`TailoringError` for `Expression`) in case the
+      number of arguments is invalid.
 
 Functions
 -----------------------
 susceptibility()
     Computes `l[0] - l[1]^2`, where `l` is the passed argument
     list.
+compile_expression()
+    Compile an arithmetic expression over column aliases into a
+    functional.
+
+Classes
+-----------------------
+Expression
+    Functional defined by an arithmetic expression.
 """
 
 
+import ast
+import operator
+from functools import lru_cache
+from typing import Callable
+
 import numpy as np
 
+from modules.errors import TailoringError
+from modules.instrument import profiled
+
+
+# OPERATORS AND FUNCTIONS ALLOWED IN EXPRESSIONS
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+}
+
 
+@profiled("functional")
 def susceptibility(args: list[float | np.ndarray]) -> float | np.ndarray:
     """Susceptibility function for jackknife estimates.
 
@@ -41,3 +79,164 @@ def susceptibility(args: list[float | np.ndarray]) -> float | np.ndarray:
     if len(args) != 2:
         raise TypeError("invalid number of arguments in susceptibility()")
     return args[0] - args[1] ** 2.0
+
+
+class Expression:
+    """Functional defined by an arithmetic expression.
+
+    The expression is written in terms of the aliases `a0`,
+    `a1`, ..., denoting the mean values of the selected columns
+    in order. It is parsed and validated once, and translated
+    into a tree of numpy operations: evaluation is vectorized
+    over arrays of pseudo-averages, and involves no `eval()`.
+
+    Instances are pickled by their source, and recompiled on
+    unpickling.
+
+    Attributes
+    -----------------------
+    source : str
+        The expression.
+    nargs : int
+        Number of required arguments (highest alias + 1).
+    """
+
+    def __init__(self, source: str):
+        """Parse and validate the expression.
+
+        Parameters
+        -----------------------
+        source : str
+            The expression.
+
+        Raises
+        -----------------------
+        ValueError
+            If the expression is invalid, or uses unsupported
+            operations.
+        """
+        self.source = source
+        self.nargs = 0
+
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as err:
+            raise ValueError(f"invalid expression '{source}'") from err
+
+        self._kernel = self._compile(tree.body)
+        if self.nargs == 0:
+            raise ValueError(f"no column aliases in '{source}'")
+
+    def _compile(self, node: ast.AST) -> Callable:
+        """Translate an expression node into a callable on the arguments.
+
+        Parameters
+        -----------------------
+        node : ast.AST
+            The node to translate.
+
+        Returns
+        -----------------------
+        Callable
+            Function of the argument list evaluating the node.
+
+        Raises
+        -----------------------
+        ValueError
+            If the node is not supported.
+        """
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            func = BINARY_OPERATORS[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            return lambda args: func(left(args), right(args))
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            func = UNARY_OPERATORS[type(node.op)]
+            operand = self._compile(node.operand)
+            return lambda args: func(operand(args))
+
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            value = float(node.value)
+            return lambda args: value
+
+        if isinstance(node, ast.Name) and node.id[:1] == "a":
+            if node.id[1:].isdigit():
+                index = int(node.id[1:])
+                self.nargs = max(self.nargs, index + 1)
+                return lambda args: args[index]
+
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in FUNCTIONS
+            and len(node.args) == 1
+            and not node.keywords
+        ):
+            func = FUNCTIONS[node.func.id]
+            operand = self._compile(node.args[0])
+            return lambda args: func(operand(args))
+
+        raise ValueError(
+            f"unsupported '{ast.unparse(node)}' in '{self.source}'"
+        )
+
+    @profiled("functional")
+    def __call__(self, args: list[float | np.ndarray]) -> float | np.ndarray:
+        """Evaluate the expression.
+
+        Parameters
+        -----------------------
+        args : list[float | np.ndarray]
+            Input data (may be single numbers or arrays).
+
+        Returns
+        -----------------------
+        float | np.ndarray
+            The computed values.
+
+        Raises
+        -----------------------
+        TailoringError
+            If invalid length of the passed list.
+        """
+        if len(args) != self.nargs:
+            raise TailoringError(
+                f"invalid number of arguments in '{self.source}'"
+            )
+        return self._kernel(args)
+
+    def __reduce__(self):
+        """Pickle by source, to send to worker processes."""
+        return (compile_expression, (self.source,))
+
+    def __repr__(self) -> str:
+        """Return the expression."""
+        return f"Expression({self.source!r})"
+
+
+@lru_cache(maxsize=None)
+def compile_expression(source: str) -> Expression:
+    """Compile an arithmetic expression over column aliases into a functional.
+
+    Compiled expressions are cached, so that repeated calls
+    (e.g., once per file) return the same functional.
+
+    Parameters
+    -----------------------
+    source : str
+        The expression, in terms of the aliases `a0`, `a1`, ...
+        of the selected columns, e.g. `"a0 / a1**2"`. Supports
+        `+`, `-`, `*`, `/`, `**`, numbers and the functions
+        `abs`, `sqrt`, `exp` and `log`.
+
+    Returns
+    -----------------------
+    Expression
+        The compiled functional.
+
+    Raises
+    -----------------------
+    ValueError
+        If the expression is invalid.
+    """
+    return Expression(source)
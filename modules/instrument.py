@@ -0,0 +1,172 @@
+"""Per-stage timing and memory instrumentation (`--profile`).
+
+Stages are delimited by the `stage()` context manager, or by
+functions decorated with `profiled()`. While disabled (default),
+both reduce to a flag check; once enabled, the wall time and the
+peak of the memory traced by `tracemalloc` are accumulated for
+each stage. Nested stages are attributed to the outermost one.
+
+Functions
+-----------------------
+enable()
+    Start recording stages (and tracing memory).
+disable()
+    Stop recording stages.
+stage()
+    Context manager recording a stage.
+profiled()
+    Record each call of the decorated function as a stage.
+records()
+    Return the accumulated records, in order of first entry.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import time
+import tracemalloc
+from functools import wraps
+from contextlib import contextmanager
+from contextlib import nullcontext
+from typing import Callable
+from typing import Iterator
+
+
+# STATE OF THE INSTRUMENTATION: FLAG, RECORDS, ACTIVE STAGE
+_state = {"enabled": False, "records": {}, "active": None}
+
+
+def enable() -> None:
+    """Start recording stages (and tracing memory).
+
+    Previous records are discarded.
+    """
+    _state["enabled"] = True
+    _state["records"] = {}
+    _state["active"] = None
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    """Stop recording stages.
+
+    The records are kept, and available through `records()`.
+    """
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state["enabled"] = False
+    _state["active"] = None
+
+
+@contextmanager
+def _record(name: str) -> Iterator[None]:
+    """Low-level function, record the time and memory of a stage.
+
+    Parameters
+    -----------------------
+    name : str
+        Name of the stage.
+    """
+    _state["active"] = name
+    start_mem, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        _state["active"] = None
+
+        rec = _state["records"].setdefault(
+            name, {"calls": 0, "time": 0.0, "peak": 0}
+        )
+        rec["calls"] += 1
+        rec["time"] += elapsed
+        rec["peak"] = max(rec["peak"], peak - start_mem)
+
+
+def stage(name: str):
+    """Context manager recording a stage.
+
+    Does nothing if disabled, or within another stage.
+
+    Parameters
+    -----------------------
+    name : str
+        Name of the stage.
+
+    Returns
+    -----------------------
+    contextlib.AbstractContextManager
+        The context manager.
+    """
+    if not _state["enabled"] or _state["active"] is not None:
+        return nullcontext()
+    return _record(name)
+
+
+def profiled(name: str) -> Callable:
+    """Record each call of the decorated function as a stage.
+
+    Parameters
+    -----------------------
+    name : str
+        Name of the stage.
+
+    Returns
+    -----------------------
+    Callable
+        The decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"] or _state["active"] is not None:
+                return func(*args, **kwargs)
+            with _record(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def records() -> dict[str, dict]:
+    """Return the accumulated records, in order of first entry.
+
+    Returns
+    -----------------------
+    dict[str, dict]
+        Dictionary indexed by stage, storing the number of
+        `"calls"`, the total `"time"` (s) and the largest
+        `"peak"` memory (bytes) above the one at the start of
+        the stage.
+    """
+    return dict(_state["records"])
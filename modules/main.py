@@ -26,66 +26,852 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
+# Modules are imported where needed, so that each invocation only
+# pays for the selected driver and printer (and `--version` for
+# none of them).
+# pylint: disable=import-outside-toplevel
+
+from __future__ import annotations
+
 import sys
+import glob
+import argparse
+from functools import partial
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from typing import TYPE_CHECKING
 
-from modules.functionals import susceptibility
 from modules.parser import build_parser
-from modules.common import parse_ds
-from modules.drivers import avs
-from modules.drivers import ave
-from modules.drivers import jck
-from modules.print import PrintConfig
-from modules.print import print_avs
-from modules.print import print_ave
-from modules.print import print_jck
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from modules.common import ParseConfig
 
 
 __version__ = "1.2.5-1"
 
 
-def main():
-    """Implement main entrypoint."""
-    parser = build_parser()
-    args = parser.parse_args()
+def expand_files(patterns: list[str]) -> list[str]:
+    """Expand glob patterns into file paths, preserving the order.
 
-    if args.version:
-        print(f"das v{__version__}")
-        sys.exit(0)
+    Patterns without matches are kept as they are (and will
+    fail as missing files).
+
+    Parameters
+    -----------------------
+    patterns : list[str]
+        Paths or glob patterns.
+
+    Returns
+    -----------------------
+    list[str]
+        The paths to analyze.
+    """
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else []
+        files.extend(matches if matches else [pattern])
+
+    return files
+
+
+def parse_config(args: argparse.Namespace) -> ParseConfig:
+    """Build the parsing options from the command-line arguments.
+
+    `args.fields` is converted to a list of (1-indexed)
+    integers, raising `ValueError` if invalid.
+
+    Parameters
+    -----------------------
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    ParseConfig
+        The parsing options (fields 0-indexed).
+    """
+    from modules.common import ParseConfig
 
-    # converting to list of integers,
-    # raises ValueError and terminates if invalid value
     if args.fields is not None:
         args.fields = [int(s) for s in args.fields.split(",")]
         numpy_fields = [(f - 1) for f in args.fields]
     else:
         numpy_fields = args.fields
 
-    # parsing (common)
-    data = parse_ds(args.file, numpy_fields, not args.quick)
-    print_config = PrintConfig(args.fields, args.verbose, args.basic)
+    return ParseConfig(
+        numpy_fields,
+        not args.quick,
+        columns=args.columns,
+        dtype=args.dtype,
+        parse_jobs=args.parse_jobs,
+    )
+
+
+def output_format(args: argparse.Namespace) -> Optional[str]:
+    """Resolve the output format from the command-line arguments.
+
+    `args.output_format` is set to `"basic"` with `-b`, and to
+    `"table"` by default; `args.basic` is set for all formats
+    but `"table"`, which is the only one using `rich`.
+
+    Parameters
+    -----------------------
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    Optional[str]
+        The error message if the options conflict, `None`
+        otherwise.
+    """
+    if args.output_format is None:
+        args.output_format = "basic" if args.basic else "table"
+    elif args.basic and args.output_format != "basic":
+        return "-b/--basic conflicts with --output-format"
+
+    args.basic = args.output_format != "table"
+
+    if args.output_format == "npz" and args.output is None:
+        return "--output-format npz requires --output"
+    if getattr(args, "follow", False) and (
+        args.output_format not in ("table", "basic") or args.output
+    ):
+        return "--follow prints table or basic output, on stdout"
+
+    return None
+
+
+def functional(args: argparse.Namespace) -> Callable:
+    """Return the functional requested for `jck` and `bst`.
+
+    Parameters
+    -----------------------
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    Callable
+        The compiled `--func` expression (cached), or the
+        susceptibility by default.
+
+    Raises
+    -----------------------
+    ValueError
+        If the expression is invalid.
+    """
+    from modules.functionals import susceptibility
+    from modules.functionals import compile_expression
+
+    if getattr(args, "func", None) is None:
+        return susceptibility
+    return compile_expression(args.func)
+
+
+def check_func(args: argparse.Namespace) -> Optional[str]:
+    """Validate the `--func` expression against the selected fields.
+
+    The number of fields can only be checked if `--fields` is
+    passed, otherwise a mismatch is reported for each file.
+
+    Parameters
+    -----------------------
+    args : argparse.Namespace
+        The command-line arguments (`args.fields` already
+        converted by `parse_config()`).
+
+    Returns
+    -----------------------
+    Optional[str]
+        The error message if the expression is invalid, or
+        takes a different number of fields, `None` otherwise.
+    """
+    if getattr(args, "func", None) is None:
+        return None
+
+    try:
+        func = functional(args)
+    except ValueError as err:
+        return str(err)
+
+    if args.fields is not None and len(args.fields) != func.nargs:
+        return (
+            f"--func '{args.func}' takes {func.nargs} field(s),"
+            f" {len(args.fields)} given with --fields"
+        )
+
+    return None
+
+
+def run_driver(
+    data: np.ndarray,
+    args: argparse.Namespace,
+    pyramid: Optional[tuple[list[int], np.ndarray]] = None,
+) -> tuple:
+    """Run the requested driver on a parsed dataset.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        2D array storing the dataset.
+    args : argparse.Namespace
+        The command-line arguments.
+    pyramid : Optional[tuple[list[int], np.ndarray]], default = None
+        Result of `bin_pyramid()` on the tailored dataset, if
+        already available (ignored by `avs`).
+
+    Returns
+    -----------------------
+    tuple
+        The results of the driver.
+
+    Raises
+    -----------------------
+    TailoringError
+        Same as the drivers.
+    """
+    from modules import drivers
 
     if args.command == "avs":
-        stats, report = avs(data, args.skip)
-        print_avs(
-            stats,
-            report,
-            print_config,
+        return drivers.avs(data, args.skip)
+    if args.command == "ave":
+        method = "fft" if args.fft else "binning"
+        return drivers.ave(
+            data, args.skip, args.actime or args.fft, method, pyramid
         )
-    elif args.command == "ave":
-        stats, actimes, report = ave(data, args.skip, args.actime)
-        print_ave(
-            stats,
-            actimes,
-            report,
-            print_config,
+
+    if args.command == "bst":
+        config = drivers.BootstrapConfig(
+            args.replicas, args.seed, args.workers
         )
-    elif args.command == "jck":
-        stats, report = jck(data, args.skip, susceptibility)
-        print_jck(
-            stats,
-            report,
-            print_config,
+        return drivers.bst(data, args.skip, functional(args), config, pyramid)
+
+    return drivers.jck(data, args.skip, functional(args), pyramid)
+
+
+def analyze(
+    file: str,
+    args: argparse.Namespace,
+    config: ParseConfig,
+) -> tuple[tuple | None, str | None]:
+    """Parse and analyze a single file with the requested driver.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to analyze.
+    args : argparse.Namespace
+        The command-line arguments.
+    config : ParseConfig
+        Parsing options.
+
+    Returns
+    -----------------------
+    tuple[tuple | None, str | None]
+        - The results of the driver (`None` on failure).
+        - The error message (`None` on success).
+    """
+    from modules.common import ParsingError
+    from modules.common import TailoringError
+
+    try:
+        # parsing deferred to the drivers if streaming
+        if args.command == "ave" and args.online:
+            from modules.stream import online_ave
+
+            res = online_ave(file, config, args.skip, args.actime)
+        elif args.stream:
+            from modules import stream
+
+            if args.command == "avs":
+                res = stream.stream_avs(file, config, args.skip)
+            elif args.command == "ave":
+                res = stream.stream_ave(file, config, args.skip, args.actime)
+            else:
+                res = stream.stream_jck(
+                    file, config, args.skip, functional(args)
+                )
+        elif args.no_cache:
+            from dataclasses import asdict
+            from modules.common import parse_ds
+
+            res = run_driver(parse_ds(file, **asdict(config)), args)
+        else:
+            from modules.cache import cached_parse_ds
+
+            res = run_driver(cached_parse_ds(file, config), args)
+    except (ParsingError, TailoringError) as err:
+        return (None, str(err))
+
+    return (res, None)
+
+
+def print_results(res: tuple, args: argparse.Namespace) -> None:
+    """Print the results of the requested driver.
+
+    Parameters
+    -----------------------
+    res : tuple
+        The results of the driver.
+    args : argparse.Namespace
+        The command-line arguments (fields 1-indexed).
+    """
+    from modules import print as printer
+    from modules.instrument import stage
+
+    print_config = printer.PrintConfig(args.fields, args.verbose, args.basic)
+    with stage("print"):
+        getattr(printer, f"print_{args.command}")(*res, print_config)
+
+
+def followable(files: list[str], args: argparse.Namespace) -> bool:
+    """Check that the options allow following the files.
+
+    Followed files are accumulated incrementally, without
+    storing the rows: only a single file, analyzed with `avs` or
+    `ave` without skipping rows, can be followed.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the files to analyze.
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    bool
+        `True` if the files can be followed.
+    """
+    options = [
+        args.stream,
+        getattr(args, "online", False),
+        getattr(args, "fft", False),
+    ]
+
+    return (
+        len(files) == 1
+        and args.command in ("avs", "ave")
+        and args.skip == 0
+        and not any(options)
+    )
+
+
+def follow(file: str, args: argparse.Namespace, config: ParseConfig) -> int:
+    """Analyze a growing file repeatedly, accumulating only new lines.
+
+    The state of the analysis (not the rows) is persisted in the
+    cache directory (unless `--no-cache`), so that a restart
+    resumes where it stopped. `ave` results have bin sizes as
+    powers of 2, as with `--online`. Runs until interrupted.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to follow.
+    args : argparse.Namespace
+        The command-line arguments.
+    config : ParseConfig
+        Parsing options.
+
+    Returns
+    -----------------------
+    int
+        The exit status.
+    """
+    import time
+    from modules.common import ParsingError
+    from modules.common import TailoringError
+    from modules.cache import cache_dir
+    from modules.follow import FollowState
+    from modules.print import PrintConfig
+    from modules.print import print_file
+
+    directory = None if args.no_cache else cache_dir()
+
+    try:
+        if directory is None:
+            state = FollowState(file, config)
+        else:
+            state = FollowState.load(directory, file, config)
+    except ParsingError as err:
+        print(f"das: {file}: {err}", file=sys.stderr)
+        return 1
+
+    print_config = PrintConfig(args.fields, args.verbose, args.basic)
+    first = True
+
+    try:
+        while True:
+            try:
+                if state.update() > 0 or first:
+                    if directory is not None:
+                        state.save(directory)
+                    if args.command == "avs":
+                        res = state.avs()
+                    else:
+                        res = state.ave(args.actime)
+                    print_file(f"{file} ({state.rows} rows)", print_config)
+                    print_results(res, args)
+            except (ParsingError, TailoringError) as err:
+                # the file may be fixed or grow enough later
+                print(f"das: {file}: {err}", file=sys.stderr)
+            first = False
+
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+def run_batch(
+    files: list[str], args: argparse.Namespace, config: ParseConfig
+) -> int:
+    """Analyze several files, possibly in parallel, printing the results.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the files to analyze.
+    args : argparse.Namespace
+        The command-line arguments.
+    config : ParseConfig
+        Parsing options.
+
+    Returns
+    -----------------------
+    int
+        The exit status (nonzero if any file failed).
+    """
+    worker = partial(analyze, args=args, config=config)
+
+    # stages are only recorded in this process
+    if args.jobs > 1 and len(files) > 1 and not profiling(args):
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
+        results = executor.map(worker, files)
+    else:
+        executor = None
+        results = map(worker, files)
+
+    status = print_batch(files, results, args)
+
+    if executor is not None:
+        executor.shutdown()
+
+    return status
+
+
+def print_batch(
+    files: list[str], results: Iterable[tuple], args: argparse.Namespace
+) -> int:
+    """Print the results of several files, in input order.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the analyzed files.
+    results : Iterable[tuple]
+        The `(results, error)` pairs returned by `analyze()`, 1
+        per file (printed as soon as available).
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    int
+        The exit status (nonzero if any file failed).
+    """
+    if args.output_format not in ("table", "basic"):
+        return write_batch(files, results, args)
+
+    from contextlib import ExitStack
+    from contextlib import redirect_stdout
+    from modules.print import PrintConfig
+    from modules.print import print_file
+
+    status = 0
+    with ExitStack() as stack:
+        if args.output is not None:
+            stream = stack.enter_context(
+                open(args.output, "w", encoding="utf-8")
+            )
+            stack.enter_context(redirect_stdout(stream))
+
+        for file, (res, error) in zip(files, results):
+            if len(files) > 1:
+                print_file(
+                    file, PrintConfig(args.fields, args.verbose, args.basic)
+                )
+
+            if error is not None:
+                print(f"das: {file}: {error}", file=sys.stderr)
+                status = 1
+            else:
+                print_results(res, args)
+
+    return status
+
+
+def write_batch(
+    files: list[str], results: Iterable[tuple], args: argparse.Namespace
+) -> int:
+    """Write the results of several files in a machine-readable format.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the analyzed files.
+    results : Iterable[tuple]
+        The `(results, error)` pairs returned by `analyze()`, 1
+        per file (written as soon as available).
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    int
+        The exit status (nonzero if any file failed).
+    """
+    from modules.writers import Writer
+
+    status = 0
+    with Writer(
+        args.output_format, args.command, args.fields, args.output
+    ) as writer:
+        for file, (res, error) in zip(files, results):
+            if error is not None:
+                print(f"das: {file}: {error}", file=sys.stderr)
+                status = 1
+            else:
+                writer.write(file, res)
+
+    return status
+
+
+def remote(files: list[str], args: argparse.Namespace) -> int:
+    """Analyze the files through the daemon, printing the results.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the files to analyze.
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    int
+        The exit status (nonzero if any file failed).
+    """
+    import os
+    from modules.remote import request
+    from modules.remote import socket_path
+
+    # forwarded as typed, the daemon parsing them again
+    argv = [arg for arg in sys.argv[1:] if arg != "--remote"]
+    path = socket_path()
+
+    try:
+        reply = request(path, argv, [os.path.abspath(f) for f in files])
+    except OSError as err:
+        print(
+            f"das: cannot reach the daemon at {path}: {err}", file=sys.stderr
         )
+        return 1
+
+    if "error" in reply:
+        print(f"das: {reply['error']}", file=sys.stderr)
+        return 1
+
+    return print_batch(files, reply["results"], args)
+
+
+def summarize_file(
+    file: str, args: argparse.Namespace, config: ParseConfig
+) -> Optional[str]:
+    """Write the summary of a file, see `modules.summary`.
+
+    The summary is written to `<file>.summary.npz`, in
+    `args.directory` if set (next to the file otherwise).
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to summarize.
+    args : argparse.Namespace
+        The command-line arguments.
+    config : ParseConfig
+        Parsing options.
+
+    Returns
+    -----------------------
+    Optional[str]
+        The error message (`None` on success).
+    """
+    import os
+    from modules.common import ParsingError
+    from modules.summary import summarize
+
+    path = f"{file}.summary.npz"
+    if args.directory is not None:
+        path = os.path.join(args.directory, os.path.basename(path))
+
+    try:
+        summarize(file, config, args.skip).save(path)
+    except (ParsingError, OSError) as err:
+        return str(err)
+
+    return None
+
+
+def summarize_files(
+    files: list[str], args: argparse.Namespace, config: ParseConfig
+) -> int:
+    """Write the summaries of several files, possibly in parallel.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the files to summarize.
+    args : argparse.Namespace
+        The command-line arguments.
+    config : ParseConfig
+        Parsing options.
+
+    Returns
+    -----------------------
+    int
+        The exit status (nonzero if any file failed).
+    """
+    worker = partial(summarize_file, args=args, config=config)
+
+    if args.jobs > 1 and len(files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            errors = list(executor.map(worker, files))
+    else:
+        errors = [worker(file) for file in files]
+
+    status = 0
+    for file, error in zip(files, errors):
+        if error is not None:
+            print(f"das: {file}: {error}", file=sys.stderr)
+            status = 1
+
+    return status
+
+
+def merge(files: list[str], args: argparse.Namespace) -> int:
+    """Merge the summaries of independent runs, printing the results.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the summaries.
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    int
+        The exit status.
+    """
+    from modules.common import ParsingError
+    from modules.common import TailoringError
+    from modules.summary import merge_summaries
+
+    try:
+        summary = merge_summaries(files, args.jobs)
+        if args.driver == "avs":
+            res = summary.avs()
+        else:
+            res = summary.ave(args.actime)
+    except (ParsingError, TailoringError) as err:
+        print(f"das: {err}", file=sys.stderr)
+        return 1
+
+    # printed as the results of the driver, on the summarized fields
+    args.command = args.driver
+    if summary.fields is not None:
+        args.fields = [f + 1 for f in summary.fields]
+    else:
+        args.fields = None
+
+    return print_batch(["merged"], [(res, None)], args)
+
+
+def profiling(args: argparse.Namespace) -> bool:
+    """Return whether the stages of the run should be profiled.
+
+    Parameters
+    -----------------------
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    bool
+        `True` if `--profile` or `--profile-json` was passed.
+    """
+    return args.profile or args.profile_json is not None
+
+
+def report_profile(args: argparse.Namespace, total: float) -> None:
+    """Print and/or store the profile of the run.
+
+    Parameters
+    -----------------------
+    args : argparse.Namespace
+        The command-line arguments.
+    total : float
+        Wall time (s) of the run.
+    """
+    import json
+    from modules import instrument
+    from modules.print import PrintConfig
+    from modules.print import print_profile
+
+    instrument.disable()
+    records = instrument.records()
+
+    if args.profile:
+        print_config = PrintConfig(args.fields, args.verbose, args.basic)
+        print_profile(records, total, print_config)
+
+    if args.profile_json == "-":
+        print(json.dumps({"total": total, "stages": records}))
+    elif args.profile_json is not None:
+        with open(args.profile_json, "w", encoding="utf-8") as f:
+            json.dump({"total": total, "stages": records}, f, indent=2)
+
+
+def run(
+    files: list[str], args: argparse.Namespace, config: ParseConfig
+) -> int:
+    """Analyze the files (or follow one), profiling if requested.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the files to analyze.
+    args : argparse.Namespace
+        The command-line arguments.
+    config : ParseConfig
+        Parsing options.
+
+    Returns
+    -----------------------
+    int
+        The exit status.
+    """
+    import time
+    from modules import instrument
+
+    if profiling(args):
+        instrument.enable()
+    start = time.perf_counter()
+
+    if args.follow:
+        status = follow(files[0], args, config)
+    else:
+        status = run_batch(files, args, config)
+
+    if profiling(args):
+        report_profile(args, time.perf_counter() - start)
+
+    return status
+
+
+def service(args: argparse.Namespace) -> int:
+    """Run the commands analyzing no file (`bench` and `serve`).
+
+    Parameters
+    -----------------------
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -----------------------
+    int
+        The exit status.
+    """
+    if args.command == "bench":
+        try:
+            from benchmarks import suite
+        except ImportError:
+            # not distributed, only available in the source tree
+            print(
+                "das: bench runs from the source tree of das"
+                " (python3 -m benchmarks.suite)",
+                file=sys.stderr,
+            )
+            return 1
+
+        baseline = suite.BASELINE if args.baseline is None else args.baseline
+        return suite.main(args.scale, baseline, args.save, args.tolerance)
+
+    from modules.server import serve
+
+    return serve(args.socket, args.max_bytes)
+
+
+def main():
+    """Implement main entrypoint."""
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.version:
+        print(f"das v{__version__}")
+        sys.exit(0)
+
+    if args.command in ("bench", "serve"):
+        sys.exit(service(args))
+
+    error = output_format(args)
+    if error is not None:
+        parser.error(error)
+
+    if args.command == "merge":
+        sys.exit(merge(expand_files(args.file), args))
+
+    config = parse_config(args)
+    files = expand_files(args.file)
+
+    if args.command == "summarize":
+        sys.exit(summarize_files(files, args, config))
+
+    # validated once, before any parsing
+    error = check_func(args)
+    if error is not None:
+        parser.error(error)
+
+    if args.command == "bst" and args.stream:
+        parser.error("--stream is not available with bst")
+
+    if getattr(args, "fft", False) and (args.stream or args.online):
+        parser.error("--fft is not available with --stream or --online")
+
+    if args.follow and not followable(files, args):
+        parser.error(
+            "--follow takes a single file of avs or ave, without --skip,"
+            " --stream, --online or --fft"
+        )
+
+    if args.remote:
+        if args.stream or args.follow or getattr(args, "online", False):
+            parser.error(
+                "--remote is not available with --stream,"
+                " --follow or --online"
+            )
+        sys.exit(remote(files, args))
+
+    sys.exit(run(files, args, config))
 
 
 if __name__ == "__main__":
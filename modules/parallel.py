@@ -0,0 +1,321 @@
+"""Parallel parsing of large text files.
+
+The file is split in byte ranges aligned to line boundaries, whose
+data rows are counted first; a single buffer, shared with the
+worker processes, is then sized for the whole dataset, and each
+range parsed with the block tokenizer by a worker writing its rows
+in place. Errors are reported as by a serial parse (the first one
+in the file, with row numbers relative to the whole file).
+
+Functions
+-----------------------
+split_spans()
+    Split a file in byte ranges aligned to line boundaries.
+parse_parallel()
+    Parse a 2D array from a text file with several processes.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import mmap
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from modules.common import ParseConfig
+from modules.errors import ParsingError
+from modules.tokenizer import BLOCK_SIZE
+from modules.tokenizer import count_rows
+from modules.tokenizer import project_fields
+from modules.tokenizer import read_blocks
+from modules.tokenizer import shift_rows
+from modules.tokenizer import tokenize
+
+
+# MINIMUM NUMBER OF BYTES PARSED BY EACH PROCESS
+SPAN_BYTES = 2**24
+
+# DATASET IN SHARED MEMORY, INHERITED BY THE FORKED WORKERS
+_shared: dict[str, np.ndarray] = {}
+
+
+def split_spans(
+    file: str, jobs: int, span_bytes: int
+) -> list[tuple[int, int]]:
+    """Split a file in byte ranges aligned to line boundaries.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the (uncompressed) file.
+    jobs : int
+        Maximum number of ranges.
+    span_bytes : int
+        Minimum number of bytes of each range.
+
+    Returns
+    -----------------------
+    list[tuple[int, int]]
+        The (start, end) byte offsets of the ranges, each
+        beginning at the start of a line.
+    """
+    size = os.path.getsize(file)
+    jobs = max(1, min(jobs, size // max(span_bytes, 1)))
+    bounds = [0]
+
+    with open(file, "rb") as f:
+        for k in range(1, jobs):
+            # end of the line containing the byte before the target
+            f.seek(max(k * size // jobs, bounds[-1] + 1) - 1)
+            f.readline()
+            bounds.append(min(f.tell(), size))
+        bounds.append(size)
+
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _first_columns(file: str) -> Optional[int]:
+    """Low-level function, number of columns of the first data row.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the (uncompressed) file.
+
+    Returns
+    -----------------------
+    Optional[int]
+        The number of columns, `None` if there are no data rows.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`, for the first data row.
+    """
+    with open(file, "rb") as f:
+        for line in f:
+            _, ncols = tokenize(line, None, True, 0, None)
+            if ncols is not None:
+                return ncols
+
+    return None
+
+
+def _count_span(file: str, span: tuple[int, int]) -> int:
+    """Low-level function, count the data rows of a byte range.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the (uncompressed) file.
+    span : tuple[int, int]
+        The (start, end) byte offsets of the range.
+
+    Returns
+    -----------------------
+    int
+        The number of data rows.
+    """
+    return sum(
+        count_rows(block) for block in read_blocks(file, BLOCK_SIZE, span)
+    )
+
+
+def _parse_span(
+    file: str,
+    span: tuple[int, int],
+    config: ParseConfig,
+    ncols: Optional[int],
+    out: np.ndarray,
+) -> Optional[ParsingError]:
+    """Low-level function, parse a byte range into its rows of the dataset.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the (uncompressed) file.
+    span : tuple[int, int]
+        The (start, end) byte offsets of the range.
+    config : ParseConfig
+        Parsing options (`reader` and `columns` are ignored).
+    ncols : Optional[int]
+        Number of columns of the first data row of the file, if
+        checked (with `colnum_test` or without `fields`).
+    out : np.ndarray
+        The rows of the dataset of the range, as counted by
+        `_count_span()`.
+
+    Returns
+    -----------------------
+    Optional[ParsingError]
+        The error, with row numbers relative to the range (`None`
+        on success).
+    """
+    rows = 0
+
+    try:
+        for block in read_blocks(file, BLOCK_SIZE, span):
+            parsed, _ = tokenize(
+                block, config.fields, config.colnum_test, rows, ncols
+            )
+            if rows + parsed.shape[0] > out.shape[0]:
+                raise ParsingError("file modified while reading")
+            # no columns if any field is out of bounds (raised later)
+            if parsed.shape[1] == out.shape[1]:
+                out[rows : (rows + parsed.shape[0])] = parsed
+            rows += parsed.shape[0]
+    except ParsingError as err:
+        return err
+
+    if rows != out.shape[0]:
+        return ParsingError("file modified while reading")
+
+    return None
+
+
+def _parse_shared(
+    file: str,
+    config: ParseConfig,
+    ncols: Optional[int],
+    span: tuple[int, int],
+    rows: tuple[int, int],
+) -> Optional[ParsingError]:
+    """Low-level function, parse a byte range into the shared dataset.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the (uncompressed) file.
+    config : ParseConfig
+        Parsing options.
+    ncols : Optional[int]
+        Number of columns of the first data row of the file, if
+        checked.
+    span : tuple[int, int]
+        The (start, end) byte offsets of the range.
+    rows : tuple[int, int]
+        The (start, end) rows of the range in the dataset.
+
+    Returns
+    -----------------------
+    Optional[ParsingError]
+        Same as `_parse_span()`.
+    """
+    out = _shared["dataset"][rows[0] : rows[1]]
+    return _parse_span(file, span, config, ncols, out)
+
+
+def parse_parallel(
+    file: str,
+    config: ParseConfig,
+    jobs: int,
+    span_bytes: int = SPAN_BYTES,
+) -> np.ndarray:
+    """Parse a 2D array from a text file with several processes.
+
+    Follows the same rules and raises the same errors as
+    `parse_ds()` on uncompressed text files. The worker processes
+    are forked, to inherit the (anonymous) shared buffer of the
+    dataset: where forking is not available, the file is parsed
+    by the calling process only.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the (uncompressed) file.
+    config : ParseConfig
+        Parsing options (`reader` and `columns` are ignored).
+    jobs : int
+        Maximum number of processes.
+    span_bytes : int, default = SPAN_BYTES
+        Minimum number of bytes parsed by each process.
+
+    Returns
+    -----------------------
+    np.ndarray
+        A 2D array storing the parsed dataset.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`.
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        jobs = 1
+
+    # all columns checked without a selection, as for `colnum_test`
+    checked = config.colnum_test or config.fields is None
+    ncols = _first_columns(file) if checked else None
+    spans = split_spans(file, jobs, span_bytes)
+    context = multiprocessing.get_context("fork") if len(spans) > 1 else None
+
+    if context is not None:
+        with ProcessPoolExecutor(len(spans), context) as executor:
+            counts = list(executor.map(partial(_count_span, file), spans))
+    else:
+        counts = [_count_span(file, span) for span in spans]
+    starts = np.cumsum([0, *counts]).tolist()
+    bounds = list(zip(starts[:-1], starts[1:]))
+
+    # same shape as `np.loadtxt()` on empty files
+    fields = config.fields
+    width = len(fields) if fields is not None else (ncols or 1)
+    shape = (starts[-1], width)
+    nbytes = shape[0] * shape[1] * np.dtype(config.dtype).itemsize
+
+    if context is not None:
+        buffer = mmap.mmap(-1, max(nbytes, 1))
+        dataset = np.ndarray(shape, dtype=config.dtype, buffer=buffer)
+        task = partial(_parse_shared, file, config, ncols)
+
+        _shared["dataset"] = dataset
+        try:
+            with ProcessPoolExecutor(len(spans), context) as executor:
+                errors = list(executor.map(task, spans, bounds))
+        finally:
+            del _shared["dataset"]
+    else:
+        dataset = np.empty(shape, dtype=config.dtype)
+        errors = [
+            _parse_span(file, span, config, ncols, dataset[a:b])
+            for span, (a, b) in zip(spans, bounds)
+        ]
+
+    # the first error in the file
+    for err, start in zip(errors, starts):
+        if err is not None:
+            raise shift_rows(err, start) from err
+
+    if config.colnum_test and fields is not None:
+        # all rows validated, columns already selected
+        project_fields(fields, ncols or 1)
+
+    return dataset
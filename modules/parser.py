@@ -65,19 +65,95 @@ def build_parser() -> argparse.ArgumentParser:
         help="skip row integrity check",
         action="store_true",
     )
+    parent_parser.add_argument(
+        "--columns",
+        help="number of columns of raw binary (.f64) files",
+        type=int,
+        default=None,
+    )
+    parent_parser.add_argument(
+        "--dtype",
+        help="storage type of the parsed data, sums are always float64"
+        " (default = float64)",
+        choices=["float64", "float32"],
+        default="float64",
+    )
+    parent_parser.add_argument(
+        "--no-cache",
+        help="do not use (nor fill) the cache of parsed files",
+        action="store_true",
+    )
+    parent_parser.add_argument(
+        "--stream",
+        help="process the file in chunks, with bounded memory",
+        action="store_true",
+    )
+    parent_parser.add_argument(
+        "--follow",
+        help="analyze the file again whenever it grows, until interrupted",
+        action="store_true",
+    )
+    parent_parser.add_argument(
+        "--interval",
+        help="seconds between checks of a followed file (default = 10)",
+        type=float,
+        default=10.0,
+    )
     parent_parser.add_argument(
         "-b",
         "--basic",
         help="simplified, parsing-friendly output formatting",
         action="store_true",
     )
+    parent_parser.add_argument(
+        "--output-format",
+        help="output format (default = table, basic with -b)",
+        choices=["table", "basic", "jsonl", "csv", "npz"],
+        default=None,
+    )
+    parent_parser.add_argument(
+        "--output",
+        help="file to write the results on (default = stdout, required"
+        " with npz)",
+        type=str,
+        default=None,
+    )
     parent_parser.add_argument(
         "-v",
         "--verbose",
         help="verbose output",
         action="store_true",
     )
-    parent_parser.add_argument("file", help="file to analyze")
+    parent_parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of files analyzed in parallel (default = 1)",
+        type=int,
+        default=1,
+    )
+    parent_parser.add_argument(
+        "--parse-jobs",
+        help="number of processes parsing each text file (default = 1)",
+        type=int,
+        default=1,
+    )
+    parent_parser.add_argument(
+        "--profile",
+        help="print time and memory of each stage (on stderr)",
+        action="store_true",
+    )
+    parent_parser.add_argument(
+        "--profile-json",
+        help="write time and memory of each stage to a JSON file"
+        " ('-' for stdout)",
+        type=str,
+        default=None,
+    )
+    parent_parser.add_argument(
+        "file",
+        nargs="+",
+        help="file(s) to analyze, glob patterns are expanded",
+    )
 
     # main parser
     parser = argparse.ArgumentParser(prog="das")
@@ -86,6 +162,11 @@ def build_parser() -> argparse.ArgumentParser:
         help="display version number and exit",
         action="store_true",
     )
+    parser.add_argument(
+        "--remote",
+        help="analyze through the daemon started with `das serve`",
+        action="store_true",
+    )
 
     subp = parser.add_subparsers(dest="command")
     _ = subp.add_parser(
@@ -105,11 +186,172 @@ def build_parser() -> argparse.ArgumentParser:
         help="computes autocorrelation time",
         action="store_true",
     )
+    subp_ave.add_argument(
+        "--fft",
+        help="computes autocorrelation time (with error) via FFT",
+        action="store_true",
+    )
+    subp_ave.add_argument(
+        "--online",
+        help="constant-memory blocking, with binsizes as powers of 2",
+        action="store_true",
+    )
+
+    # shared by jck and bst
+    func_parser = argparse.ArgumentParser(add_help=False)
+    func_parser.add_argument(
+        "--func",
+        help="expression of the averages a0, a1, ... of the fields "
+        "(default = a0 - a1**2)",
+        type=str,
+        default=None,
+    )
 
     _ = subp.add_parser(
         "jck",
-        description="performs susceptibility error estimation via jackknife",
+        description="performs functional error estimation via jackknife",
+        parents=[parent_parser, func_parser],
+    )
+
+    subp_bst = subp.add_parser(
+        "bst",
+        description="performs functional error estimation via bootstrap",
+        parents=[parent_parser, func_parser],
+    )
+    subp_bst.add_argument(
+        "-r",
+        "--replicas",
+        help="number of bootstrap replicas (default = 1000)",
+        type=int,
+        default=1000,
+    )
+    subp_bst.add_argument(
+        "--seed",
+        help="seed of the random generator (default = 0)",
+        type=int,
+        default=0,
+    )
+    subp_bst.add_argument(
+        "--workers",
+        help="number of processes generating replicas (default = 1)",
+        type=int,
+        default=1,
+    )
+
+    subp_summarize = subp.add_parser(
+        "summarize",
+        description="writes mergeable summaries of independent runs"
+        " (processed in chunks, as with --stream)",
         parents=[parent_parser],
     )
+    subp_summarize.add_argument(
+        "--directory",
+        help="directory of the summaries (default = next to the files)",
+        type=str,
+        default=None,
+    )
+
+    # summaries instead of datasets, hence no parent parser
+    subp_merge = subp.add_parser(
+        "merge",
+        description="merges summaries of independent runs",
+    )
+    subp_merge.add_argument(
+        "driver",
+        help="driver whose results are computed (ave as with --online)",
+        choices=["avs", "ave"],
+    )
+    subp_merge.add_argument(
+        "file",
+        nargs="+",
+        help="summaries written by `das summarize`, glob patterns are"
+        " expanded",
+    )
+    subp_merge.add_argument(
+        "-t",
+        "--actime",
+        help="computes autocorrelation time (ave)",
+        action="store_true",
+    )
+    subp_merge.add_argument(
+        "-j",
+        "--jobs",
+        help="number of processes merging summaries (default = 1)",
+        type=int,
+        default=1,
+    )
+    subp_merge.add_argument(
+        "-b",
+        "--basic",
+        help="simplified, parsing-friendly output formatting",
+        action="store_true",
+    )
+    subp_merge.add_argument(
+        "-v",
+        "--verbose",
+        help="verbose output",
+        action="store_true",
+    )
+    subp_merge.add_argument(
+        "--output-format",
+        help="output format (default = table, basic with -b)",
+        choices=["table", "basic", "jsonl", "csv", "npz"],
+        default=None,
+    )
+    subp_merge.add_argument(
+        "--output",
+        help="file to write the results on (default = stdout, required"
+        " with npz)",
+        type=str,
+        default=None,
+    )
+
+    # no dataset, hence no parent parser
+    subp_serve = subp.add_parser(
+        "serve",
+        description="keeps parsed datasets in memory, serving --remote calls",
+    )
+    subp_serve.add_argument(
+        "--socket",
+        help="path of the socket (default = $DAS_SOCKET, or"
+        " das-<uid>/das.sock in $XDG_RUNTIME_DIR)",
+        type=str,
+        default=None,
+    )
+    subp_serve.add_argument(
+        "--max-bytes",
+        help="memory budget of the cached datasets (default = 4 GiB)",
+        type=int,
+        default=None,
+    )
+
+    subp_bench = subp.add_parser(
+        "bench",
+        description="benchmarks the building blocks on synthetic datasets",
+    )
+    subp_bench.add_argument(
+        "--scale",
+        help="size of the benchmarked datasets (default = quick)",
+        choices=["quick", "full"],
+        default="quick",
+    )
+    subp_bench.add_argument(
+        "--baseline",
+        help="JSON baseline to compare against (default = stored one)",
+        type=str,
+        default=None,
+    )
+    subp_bench.add_argument(
+        "--save",
+        help="JSON file where the results are stored",
+        type=str,
+        default=None,
+    )
+    subp_bench.add_argument(
+        "--tolerance",
+        help="relative slowdown flagged as regression (default = 0.25)",
+        type=float,
+        default=0.25,
+    )
 
     return parser
@@ -2,6 +2,12 @@
 
 Functions
 -----------------------
+console()
+    Return the shared `rich` console, importing `rich` on first use.
+_table()
+    Low-level function, return an empty `rich` table.
+print_file()
+    Print the name of the analyzed file (multi-file mode).
 print_avs()
     Print `avs` results in formatted way.
 _print_fancy_ave()
@@ -12,6 +18,10 @@ print_ave()
     Print `ave` results in formatted way.
 print_jck()
     Print `jck` results in formatted way.
+print_bst()
+    Print `bst` results in formatted way.
+print_profile()
+    Print the time and memory of each stage (on stderr).
 """
 
 # Copyright (c) 2023 Adriano Angelone
@@ -40,17 +50,50 @@ print_jck()
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
+import sys
 from typing import Optional
 from dataclasses import dataclass
+from functools import lru_cache
 
-from rich.console import Console
-from rich.table import Table
+from modules.results import Stats
+from modules.results import BinnedStats
+from modules.results import ScalingStats
 
-from modules.common import Stats
-from modules.common import BinnedStats
 
+# `rich` is imported only for fancy output (slow to import)
+# pylint: disable=import-outside-toplevel
 
-console = Console()
+
+@lru_cache(maxsize=None)
+def console(stderr: bool = False):
+    """Return the shared `rich` console, importing `rich` on first use.
+
+    Parameters
+    -----------------------
+    stderr : bool, default = False
+        If `True`, returns the console writing on stderr.
+
+    Returns
+    -----------------------
+    rich.console.Console
+        The console used for fancy output.
+    """
+    from rich.console import Console
+
+    return Console(stderr=stderr)
+
+
+def _table():
+    """Low-level function, return an empty `rich` table.
+
+    Returns
+    -----------------------
+    rich.table.Table
+        The table.
+    """
+    from rich.table import Table
+
+    return Table()
 
 
 @dataclass
@@ -72,6 +115,22 @@ class PrintConfig:
     basic: bool
 
 
+def print_file(file: str, config: PrintConfig) -> None:
+    """Print the name of the analyzed file (multi-file mode).
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the analyzed file.
+    config : PrintConfig
+        The printout configuration.
+    """
+    if not config.basic:
+        console().rule(file)
+    else:
+        print(f"# {file}")
+
+
 def print_avs(
     stats: Stats,
     report: str,
@@ -94,10 +153,10 @@ def print_avs(
 
     if not config.basic:
         if config.verbose:
-            console.print(report)
-            console.print()
+            console().print(report)
+            console().print()
 
-        table = Table()
+        table = _table()
         table.add_column("column")
         table.add_column("mean")
         table.add_column("SEM")
@@ -109,19 +168,43 @@ def print_avs(
                 f"{s:.1e}",
             )
 
-        console.print(table)
+        console().print(table)
     else:
         if config.verbose:
             print(report)
             print()
 
-        for c, m, s in zip(cols, stats.m, stats.s):
-            print(f"{c} {m:+.11e} {s:.1e}")
+        sys.stdout.write(
+            "".join(
+                f"{c} {m:+.11e} {s:.1e}\n"
+                for c, m, s in zip(cols, stats.m.tolist(), stats.s.tolist())
+            )
+        )
+
+
+def _format_actime(actime: float | tuple[float, float], sep: str) -> str:
+    """Low-level function, format an autocorrelation time.
+
+    Parameters
+    -----------------------
+    actime : float | tuple[float, float]
+        The autocorrelation time, possibly with its error.
+    sep : str
+        Separator between time and error.
+
+    Returns
+    -----------------------
+    str
+        The formatted autocorrelation time.
+    """
+    if isinstance(actime, tuple):
+        return f"{actime[0]:.1e}{sep}{actime[1]:.1e}"
+    return f"{actime:.1e}"
 
 
 def _print_fancy_ave(
-    stats: list[BinnedStats],
-    actimes: list[float],
+    stats: ScalingStats,
+    actimes: list[float | tuple[float, float]],
     report: str,
     config: PrintConfig,
 ) -> None:
@@ -129,20 +212,21 @@ def _print_fancy_ave(
 
     Parameters
     -----------------------
-    stats : list[BinnedStats]
+    stats : ScalingStats
         The result from a call to ave().
-    actimes : list[float]
-        List of the autocorrelation times (empty if not computed).
+    actimes : list[float | tuple[float, float]]
+        List of the autocorrelation times, possibly with errors
+        (empty if not computed).
     report : str
         The report string.
     config : PrintConfig
         The printout configuration.
     """
     if config.verbose:
-        console.print(report)
-        console.print()
+        console().print(report)
+        console().print()
 
-    table = Table()
+    table = _table()
     table.add_column("col")
     table.add_column("bins")
     table.add_column("binsize")
@@ -170,7 +254,7 @@ def _print_fancy_ave(
                     f"{m:.11e}",
                     f"{s:.1e}",
                     f"{ds:.1e}",
-                    f"{t:.1e}" if irow == 0 else "",
+                    _format_actime(t, " ± ") if irow == 0 else "",
                 )
             table.add_section()
     else:
@@ -192,12 +276,12 @@ def _print_fancy_ave(
                 )
             table.add_section()
 
-    console.print(table)
+    console().print(table)
 
 
 def _print_basic_ave(
-    stats: list[BinnedStats],
-    actimes: list[float],
+    stats: ScalingStats,
+    actimes: list[float | tuple[float, float]],
     report: str,
     config: PrintConfig,
 ) -> None:
@@ -205,10 +289,11 @@ def _print_basic_ave(
 
     Parameters
     -----------------------
-    stats : list[BinnedStats]
+    stats : ScalingStats
         The result from a call to ave().
-    actimes : list[float]
-        List of the autocorrelation times (empty if not computed).
+    actimes : list[float | tuple[float, float]]
+        List of the autocorrelation times, possibly with errors
+        (empty if not computed).
     report : str
         The report string.
     config : PrintConfig
@@ -218,36 +303,28 @@ def _print_basic_ave(
         print(report)
         print()
 
-    if actimes:
-        for col, scaling, t in zip(config.fields, stats, actimes):
-            for irow, (nb, bs, m, s, ds) in enumerate(
-                zip(
-                    scaling.nbins,
-                    scaling.bsize,
-                    scaling.m,
-                    scaling.s,
-                    scaling.ds,
-                )
-            ):
-                print(
-                    f"{col} {nb:04d} {bs:04d} {m:+.11e} {s:.1e} {ds:.1e}",
-                    f" {t:.1e}" if irow == 0 else "",
-                )
-    else:
-        for col, scaling in zip(config.fields, stats):
-            for nb, bs, m, s, ds in zip(
-                scaling.nbins,
-                scaling.bsize,
-                scaling.m,
-                scaling.s,
-                scaling.ds,
-            ):
-                print(f"{col} {nb:04d} {bs:04d} {m:+.11e} {s:.1e} {ds:.1e}")
+    # all lines formatted from lists, and written at once
+    nbins, bsize = stats.nbins.tolist(), stats.bsize.tolist()
+    values = stats.values.transpose((2, 1, 0)).tolist()
+
+    lines = []
+    for icol, (col, col_values) in enumerate(zip(config.fields, values)):
+        for irow, (nb, bs, (m, s, ds)) in enumerate(
+            zip(nbins, bsize, col_values)
+        ):
+            line = f"{col} {nb:04d} {bs:04d} {m:+.11e} {s:.1e} {ds:.1e}"
+            if actimes:
+                # separated as by print(), with an empty actime
+                actime = _format_actime(actimes[icol], " ")
+                line += f"  {actime}" if irow == 0 else " "
+            lines.append(line + "\n")
+
+    sys.stdout.write("".join(lines))
 
 
 def print_ave(
-    stats: list[BinnedStats],
-    actimes: list[float],
+    stats: ScalingStats,
+    actimes: list[float | tuple[float, float]],
     report: str,
     config: PrintConfig,
 ) -> None:
@@ -255,10 +332,11 @@ def print_ave(
 
     Parameters
     -----------------------
-    stats : list[BinnedStats]
+    stats : ScalingStats
         The result from a call to ave().
-    actimes : list[float]
-        List of the autocorrelation times (empty if not computed).
+    actimes : list[float | tuple[float, float]]
+        List of the autocorrelation times, possibly with errors
+        (empty if not computed).
     report : str
         The report string.
     config : PrintConfig
@@ -294,10 +372,10 @@ def print_jck(
     if not config.basic:
         if config.verbose:
             report = report + f" :: fields {config.fields}"
-            console.print(report)
-            console.print()
+            console().print(report)
+            console().print()
 
-        table = Table()
+        table = _table()
         table.add_column("bins")
         table.add_column("binsize")
         table.add_column("mean")
@@ -319,18 +397,84 @@ def print_jck(
                 f"{ds:.1e}",
             )
 
-        console.print(table)
+        console().print(table)
     else:
         if config.verbose:
             report = report + f" :: fields {config.fields}"
             print(report)
             print()
 
-        for nb, bs, m, s, ds in zip(
-            stats.nbins,
-            stats.bsize,
-            stats.m,
-            stats.s,
-            stats.ds,
-        ):
-            print(f"{nb:04d} {bs:04d} {m:+.11e} {s:.1e} {ds:.1e}")
+        sys.stdout.write(
+            "".join(
+                f"{nb:04d} {bs:04d} {m:+.11e} {s:.1e} {ds:.1e}\n"
+                for nb, bs, (m, s, ds) in zip(
+                    stats.nbins.tolist(),
+                    stats.bsize.tolist(),
+                    stats.values.T.tolist(),
+                )
+            )
+        )
+
+
+def print_bst(
+    stats: BinnedStats,
+    report: str,
+    config: PrintConfig,
+) -> None:
+    """Print `bst` results in formatted way (same layout as `jck`).
+
+    Parameters
+    -----------------------
+    stats : BinnedStats
+        The result from a call to bst().
+    report : str
+        The report string.
+    config : PrintConfig
+        The printout configuration.
+    """
+    print_jck(stats, report, config)
+
+
+def print_profile(
+    records: dict[str, dict],
+    total: float,
+    config: PrintConfig,
+) -> None:
+    """Print the time and memory of each stage (on stderr).
+
+    Parameters
+    -----------------------
+    records : dict[str, dict]
+        The records of the stages, see `instrument.records()`.
+    total : float
+        Wall time (s) of the run.
+    config : PrintConfig
+        The printout configuration.
+    """
+    other = total - sum(rec["time"] for rec in records.values())
+    rows = [
+        (
+            name,
+            f"{rec['calls']}",
+            f"{rec['time']:.4f}",
+            f"{100.0 * rec['time'] / total:.1f}",
+            f"{rec['peak'] / 2**20:.1f}",
+        )
+        for name, rec in records.items()
+    ]
+    rows.append(
+        ("other", "", f"{other:.4f}", f"{100.0 * other / total:.1f}", "")
+    )
+    rows.append(("total", "", f"{total:.4f}", "100.0", ""))
+
+    if not config.basic:
+        table = _table()
+        for column in ["stage", "calls", "time (s)", "%", "peak (MB)"]:
+            table.add_column(column)
+        for row in rows:
+            table.add_row(*row)
+
+        console(stderr=True).print(table)
+    else:
+        for row in rows:
+            print(" ".join(r for r in row if r), file=sys.stderr)
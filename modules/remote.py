@@ -0,0 +1,222 @@
+"""Client side of the analysis daemon (`das --remote`).
+
+Only the standard library is imported (the result classes once
+the reply arrives), so that forwarding a command line to the
+daemon (see `modules.server`) costs no more than the printing of
+its results. Requests and replies are JSON documents, and the
+socket is only trusted if owned by the current user.
+
+Functions
+-----------------------
+socket_path()
+    Return the default path of the daemon socket.
+check_owner()
+    Check that a socket and its directory belong to the current user.
+send_message()
+    Send a length-prefixed message on a socket.
+recv_message()
+    Receive a length-prefixed message from a socket.
+request()
+    Forward a command line to the daemon, returning its reply.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import json
+import socket
+import struct
+import tempfile
+
+
+# HEADER OF EACH MESSAGE, THE LENGTH OF THE PAYLOAD
+HEADER = struct.Struct("!Q")
+
+# CREDENTIALS OF THE PEER OF A UNIX SOCKET (PID, UID, GID)
+PEERCRED = struct.Struct("3i")
+
+
+def socket_path() -> str:
+    """Return the default path of the daemon socket.
+
+    `$DAS_SOCKET` if set, otherwise `das.sock` within the
+    private directory `das-<uid>` of `$XDG_RUNTIME_DIR` (default
+    the temporary directory).
+
+    Returns
+    -----------------------
+    str
+        Path to the socket.
+    """
+    if "DAS_SOCKET" in os.environ:
+        return os.environ["DAS_SOCKET"]
+
+    base = os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir())
+    return os.path.join(base, f"das-{os.getuid()}", "das.sock")
+
+
+def check_owner(path: str) -> None:
+    """Check that a socket and its directory belong to the current user.
+
+    Parameters
+    -----------------------
+    path : str
+        Path to the socket (which may not exist yet).
+
+    Raises
+    -----------------------
+    PermissionError
+        If the socket or its directory belong to another user.
+    OSError
+        If the directory cannot be accessed.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if os.stat(directory).st_uid != os.getuid():
+        raise PermissionError(f"{directory} belongs to another user")
+    if os.path.exists(path) and os.stat(path).st_uid != os.getuid():
+        raise PermissionError(f"{path} belongs to another user")
+
+
+def send_message(sock: socket.socket, payload: bytes) -> None:
+    """Send a length-prefixed message on a socket.
+
+    Parameters
+    -----------------------
+    sock : socket.socket
+        The connected socket.
+    payload : bytes
+        The message.
+    """
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    """Low-level function, receive a given number of bytes.
+
+    Parameters
+    -----------------------
+    sock : socket.socket
+        The connected socket.
+    size : int
+        Number of bytes to receive.
+
+    Returns
+    -----------------------
+    bytes
+        The received bytes.
+
+    Raises
+    -----------------------
+    ConnectionError
+        If the connection is closed before `size` bytes.
+    """
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 2**20))
+        if not chunk:
+            raise ConnectionError("connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+
+    return b"".join(chunks)
+
+
+def recv_message(sock: socket.socket) -> bytes:
+    """Receive a length-prefixed message from a socket.
+
+    Parameters
+    -----------------------
+    sock : socket.socket
+        The connected socket.
+
+    Returns
+    -----------------------
+    bytes
+        The message.
+
+    Raises
+    -----------------------
+    ConnectionError
+        If the connection is closed before the whole message.
+    """
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return _recv_exactly(sock, size)
+
+
+def request(path: str, argv: list[str], files: list[str]) -> dict:
+    """Forward a command line to the daemon, returning its reply.
+
+    Both request and reply are JSON documents, the reply
+    encoding the results as `modules.results.to_json()`. The
+    socket is checked to belong to the current user, and so is
+    the daemon process where the system reports it
+    (`SO_PEERCRED`).
+
+    Parameters
+    -----------------------
+    path : str
+        Path to the daemon socket.
+    argv : list[str]
+        Command-line arguments of the analysis (without
+        `--remote`).
+    files : list[str]
+        Absolute paths to the files to analyze.
+
+    Returns
+    -----------------------
+    dict
+        Either `"results"`, a list of `(results, error)` pairs
+        (1 per file, as returned by `modules.main.analyze()`),
+        or `"error"`, the reason why the request failed.
+
+    Raises
+    -----------------------
+    PermissionError
+        If the socket or the daemon belong to another user.
+    OSError
+        If the daemon cannot be reached.
+    """
+    check_owner(path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+
+        if hasattr(socket, "SO_PEERCRED"):
+            creds = sock.getsockopt(
+                socket.SOL_SOCKET, socket.SO_PEERCRED, PEERCRED.size
+            )
+            _, uid, _ = PEERCRED.unpack(creds)
+            if uid != os.getuid():
+                raise PermissionError("the daemon belongs to another user")
+
+        send_message(sock, json.dumps({"argv": argv, "files": files}).encode())
+        reply = json.loads(recv_message(sock))
+
+    # pylint: disable-next=import-outside-toplevel
+    from modules.results import from_json
+
+    return from_json(reply)
@@ -0,0 +1,322 @@
+"""Result classes of the statistical drivers.
+
+Classes
+-----------------------
+Stats
+    Result class for `get_stats()`.
+BinnedStats
+    Results of bin number scaling (single column).
+ScalingStats
+    Results of bin number scaling (all columns).
+
+Functions
+-----------------------
+to_json()
+    Convert driver results to JSON-serializable objects.
+from_json()
+    Rebuild driver results from their JSON form.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from typing import Any
+from typing import Iterator
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+class Stats:
+    """Result class for `get_stats()`.
+
+    The statistics are stored in a single contiguous array, of
+    which the attributes are views.
+
+    Attributes
+    -----------------------
+    values : np.ndarray
+        Array of shape `(3, columns)`, storing `m`, `s` and `ds`.
+    m : np.ndarray
+        Column averages.
+    s : np.ndarray
+        Column SEMs.
+    ds : np.ndarray
+        Column SE(SEM)s.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, m: ArrayLike, s: ArrayLike, ds: ArrayLike):
+        """Store the statistics of each column.
+
+        Parameters
+        -----------------------
+        m : ArrayLike
+            Column averages.
+        s : ArrayLike
+            Column SEMs.
+        ds : ArrayLike
+            Column SE(SEM)s.
+        """
+        self.values = np.array([m, s, ds], dtype=np.float64)
+
+    @property
+    def m(self) -> np.ndarray:
+        """Column averages."""
+        return self.values[0]
+
+    @property
+    def s(self) -> np.ndarray:
+        """Column SEMs."""
+        return self.values[1]
+
+    @property
+    def ds(self) -> np.ndarray:
+        """Column SE(SEM)s."""
+        return self.values[2]
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the stored values exactly."""
+        if not isinstance(other, Stats):
+            return NotImplemented
+        return np.array_equal(self.values, other.values)
+
+    def __repr__(self) -> str:
+        """Return the constructor call rebuilding the object."""
+        return f"Stats(m={self.m!r}, s={self.s!r}, ds={self.ds!r})"
+
+
+class BinnedStats:
+    """Results of bin number scaling (single column).
+
+    Attributes
+    -----------------------
+    nbins : np.ndarray
+        Bin numbers.
+    bsize : np.ndarray
+        Binsizes.
+    values : np.ndarray
+        Array of shape `(3, len(nbins))`, storing `m`, `s` and
+        `ds`.
+    m : np.ndarray
+        Average per binsize.
+    s : np.ndarray
+        SEM per binsize.
+    ds : np.ndarray
+        SE(SEM) per binsize.
+    """
+
+    __slots__ = ("nbins", "bsize", "values")
+
+    def __init__(
+        self,
+        nbins: ArrayLike,
+        bsize: ArrayLike,
+        m: ArrayLike,
+        s: ArrayLike,
+        ds: ArrayLike,
+    ):
+        """Store the statistics of each binsize.
+
+        Parameters
+        -----------------------
+        nbins : ArrayLike
+            Bin numbers.
+        bsize : ArrayLike
+            Binsizes.
+        m : ArrayLike
+            Average per binsize.
+        s : ArrayLike
+            SEM per binsize.
+        ds : ArrayLike
+            SE(SEM) per binsize.
+        """
+        self.nbins = np.asarray(nbins, dtype=np.int64)
+        self.bsize = np.asarray(bsize, dtype=np.int64)
+        self.values = np.array([m, s, ds], dtype=np.float64)
+
+    @property
+    def m(self) -> np.ndarray:
+        """Average per binsize."""
+        return self.values[0]
+
+    @property
+    def s(self) -> np.ndarray:
+        """SEM per binsize."""
+        return self.values[1]
+
+    @property
+    def ds(self) -> np.ndarray:
+        """SE(SEM) per binsize."""
+        return self.values[2]
+
+    def __eq__(self, other: object) -> bool:
+        """Compare binsizes and stored values exactly."""
+        if not isinstance(other, BinnedStats):
+            return NotImplemented
+        return (
+            np.array_equal(self.nbins, other.nbins)
+            and np.array_equal(self.bsize, other.bsize)
+            and np.array_equal(self.values, other.values)
+        )
+
+    def __repr__(self) -> str:
+        """Return the constructor call rebuilding the object."""
+        return (
+            f"BinnedStats(nbins={self.nbins!r}, bsize={self.bsize!r},"
+            f" m={self.m!r}, s={self.s!r}, ds={self.ds!r})"
+        )
+
+
+class ScalingStats:
+    """Results of bin number scaling (all columns).
+
+    Behaves as a sequence of `BinnedStats`, 1 per column.
+
+    Attributes
+    -----------------------
+    nbins : np.ndarray
+        Bin numbers.
+    bsize : np.ndarray
+        Binsizes.
+    values : np.ndarray
+        Array of shape `(3, len(nbins), columns)`, storing
+        averages, SEMs and SE(SEM)s per binsize and column.
+    """
+
+    __slots__ = ("nbins", "bsize", "values")
+
+    def __init__(self, nbins: ArrayLike, bsize: ArrayLike, values: ArrayLike):
+        """Store the statistics of each binsize and column.
+
+        Parameters
+        -----------------------
+        nbins : ArrayLike
+            Bin numbers.
+        bsize : ArrayLike
+            Binsizes.
+        values : ArrayLike
+            Array of shape `(3, len(nbins), columns)`.
+        """
+        self.nbins = np.asarray(nbins, dtype=np.int64)
+        self.bsize = np.asarray(bsize, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    def __len__(self) -> int:
+        """Return the number of columns."""
+        return self.values.shape[2]
+
+    def __getitem__(self, icol: int) -> BinnedStats:
+        """Return the scaling of column `icol`."""
+        return BinnedStats(self.nbins, self.bsize, *self.values[:, :, icol])
+
+    def __iter__(self) -> Iterator[BinnedStats]:
+        """Iterate over the scalings of the columns."""
+        return (self[icol] for icol in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        """Compare binsizes and stored values exactly."""
+        if not isinstance(other, ScalingStats):
+            return NotImplemented
+        return (
+            np.array_equal(self.nbins, other.nbins)
+            and np.array_equal(self.bsize, other.bsize)
+            and np.array_equal(self.values, other.values)
+        )
+
+    def __repr__(self) -> str:
+        """Return the constructor call rebuilding the object."""
+        return (
+            f"ScalingStats(nbins={self.nbins!r}, bsize={self.bsize!r},"
+            f" values={self.values!r})"
+        )
+
+
+# CONSTRUCTORS OF THE TAGGED OBJECTS OF `to_json()`, FROM THEIR
+# (DECODED) ATTRIBUTES
+DECODERS = {
+    "$Stats": lambda attrs: Stats(*attrs[0]),
+    "$BinnedStats": lambda attrs: BinnedStats(*attrs[:2], *attrs[2]),
+    "$ScalingStats": lambda attrs: ScalingStats(*attrs),
+    "$tuple": tuple,
+}
+
+
+def to_json(obj: Any) -> Any:
+    """Convert driver results to JSON-serializable objects.
+
+    Result classes and tuples, which JSON cannot tell apart from
+    lists, are stored as single-key dicts tagged by their type
+    (e.g. `{"$tuple": [...]}`); floats are stored exactly.
+
+    Parameters
+    -----------------------
+    obj : Any
+        Driver results, possibly nested in lists, tuples and
+        dicts.
+
+    Returns
+    -----------------------
+    Any
+        The JSON-serializable form, see `from_json()`.
+    """
+    if isinstance(obj, (Stats, BinnedStats, ScalingStats)):
+        attrs = [getattr(obj, name).tolist() for name in obj.__slots__]
+        return {f"${type(obj).__name__}": attrs}
+    if isinstance(obj, (list, tuple)):
+        items = [to_json(item) for item in obj]
+        return {"$tuple": items} if isinstance(obj, tuple) else items
+    if isinstance(obj, dict):
+        return {key: to_json(value) for key, value in obj.items()}
+
+    return obj.item() if isinstance(obj, np.generic) else obj
+
+
+def from_json(obj: Any) -> Any:
+    """Rebuild driver results from their JSON form.
+
+    Parameters
+    -----------------------
+    obj : Any
+        The result of `to_json()`, after a JSON round trip.
+
+    Returns
+    -----------------------
+    Any
+        The driver results.
+    """
+    if isinstance(obj, list):
+        return [from_json(item) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+
+    decoded = {key: from_json(value) for key, value in obj.items()}
+    if len(decoded) == 1 and next(iter(decoded)) in DECODERS:
+        ((tag, value),) = decoded.items()
+        return DECODERS[tag](value)
+
+    return decoded
@@ -0,0 +1,409 @@
+"""Persistent analysis daemon (`das serve`).
+
+The daemon listens on a local Unix socket for command lines
+forwarded by `das --remote` (see `modules.remote`), and keeps
+the parsed datasets and their binning pyramids in a memory cache
+with a byte budget, evicting the least recently used entries.
+Entries are invalidated when the size or the modification time
+of their file changes.
+
+Functions
+-----------------------
+serve()
+    Run the daemon until interrupted.
+
+Classes
+-----------------------
+MemoryCache
+    LRU memory cache of parsed datasets and binning pyramids.
+DasServer
+    Unix socket server analyzing forwarded command lines.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import sys
+import json
+import signal
+import socket
+import socketserver
+import traceback
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any
+from typing import Optional
+
+import numpy as np
+
+from modules.common import MAXBINS
+from modules.common import MINBINS
+from modules.common import ParseConfig
+from modules.common import ParsingError
+from modules.common import TailoringError
+from modules.common import bin_pyramid
+from modules.common import drop_rows
+from modules.common import parse_ds
+from modules.main import parse_config
+from modules.main import run_driver
+from modules.parser import build_parser
+from modules.remote import check_owner
+from modules.remote import recv_message
+from modules.remote import send_message
+from modules.remote import socket_path
+from modules.results import to_json
+
+
+# DEFAULT MEMORY BUDGET OF THE CACHE (BYTES)
+SERVE_BYTES = 4 * 2**30
+
+# COMMANDS SERVED BY THE DAEMON
+COMMANDS = ("avs", "ave", "jck", "bst")
+
+
+def _stamp(file: str) -> tuple[int, int]:
+    """Low-level function, size and modification time of a file.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file.
+
+    Returns
+    -----------------------
+    tuple[int, int]
+        The size (bytes) and modification time (ns).
+
+    Raises
+    -----------------------
+    ParsingError
+        If file not found.
+    """
+    try:
+        info = os.stat(file)
+    except OSError as err:
+        raise ParsingError("file does not exist") from err
+
+    return (info.st_size, info.st_mtime_ns)
+
+
+class MemoryCache:
+    """LRU memory cache of parsed datasets and binning pyramids.
+
+    Each entry is stored with the size and modification time of
+    its file, and discarded if they changed.
+
+    Attributes
+    -----------------------
+    max_bytes : int
+        Maximum total size of the entries.
+    nbytes : int
+        Total size of the entries.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Initialize an empty cache.
+
+        Parameters
+        -----------------------
+        max_bytes : int
+            Maximum total size of the entries.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self._entries)
+
+    def _get(self, key: tuple, stamp: tuple[int, int]) -> Optional[Any]:
+        """Return a valid entry (refreshing it), `None` if missing."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != stamp:
+            self._drop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(
+        self, key: tuple, stamp: tuple[int, int], value: Any, nbytes: int
+    ) -> None:
+        """Store an entry, evicting the least recently used ones."""
+        if nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = (stamp, value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: tuple) -> None:
+        """Remove an entry."""
+        self.nbytes -= self._entries.pop(key)[2]
+
+    def dataset(self, file: str, config: ParseConfig) -> np.ndarray:
+        """Return a parsed dataset, through the cache.
+
+        As for `cached_parse_ds()`, the file is parsed as
+        `parse_ds()` would, keeping only the selected fields, and
+        cached with the parsing options shaping the dataset.
+
+        Parameters
+        -----------------------
+        file : str
+            Absolute path to the file.
+        config : ParseConfig
+            Parsing options.
+
+        Returns
+        -----------------------
+        np.ndarray
+            A 2D array storing the parsed dataset.
+
+        Raises
+        -----------------------
+        ParsingError
+            Same as `parse_ds()`.
+        """
+        stamp = _stamp(file)
+        fields = None if config.fields is None else tuple(config.fields)
+        key = (
+            "dataset",
+            file,
+            config.reader,
+            config.columns,
+            config.colnum_test,
+            config.dtype,
+            fields,
+        )
+
+        data = self._get(key, stamp)
+        if data is None:
+            data = parse_ds(file, **asdict(config))
+            self._put(key, stamp, data, data.nbytes)
+
+        return data
+
+    def pyramid(
+        self, file: str, config: ParseConfig, skip: int, data: np.ndarray
+    ) -> tuple[list[int], np.ndarray]:
+        """Return the binning pyramid of a dataset, through the cache.
+
+        Parameters
+        -----------------------
+        file : str
+            Absolute path to the file.
+        config : ParseConfig
+            Parsing options.
+        skip : int
+            The percentage (1-100) of rows to skip.
+        data : np.ndarray
+            The dataset, as returned by `dataset()`.
+
+        Returns
+        -----------------------
+        tuple[list[int], np.ndarray]
+            The result of `bin_pyramid()` on the tailored dataset.
+
+        Raises
+        -----------------------
+        TailoringError
+            Same as `drop_rows()` and `bin_pyramid()`.
+        """
+        stamp = _stamp(file)
+        fields = None if config.fields is None else tuple(config.fields)
+        key = (
+            "pyramid",
+            file,
+            config.reader,
+            config.columns,
+            config.colnum_test,
+            config.dtype,
+            fields,
+            skip,
+        )
+
+        pyramid = self._get(key, stamp)
+        if pyramid is None:
+            tailored = drop_rows(data, skip, MAXBINS)
+            pyramid = bin_pyramid(tailored, MAXBINS, MINBINS)
+            self._put(key, stamp, pyramid, pyramid[1].nbytes)
+
+        return pyramid
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Handler of a single forwarded command line."""
+
+    def handle(self):
+        """Reply to a command line, with the error if it fails."""
+        try:
+            request = json.loads(recv_message(self.request))
+            request = {"argv": request["argv"], "files": request["files"]}
+        except (ConnectionError, ValueError, KeyError, TypeError) as err:
+            reply = {"error": f"invalid request ({err})"}
+        else:
+            try:
+                reply = self.server.analyze(request)
+            # reported to the client, the daemon serving the next ones
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                traceback.print_exc()
+                reply = {
+                    "error": "".join(
+                        traceback.format_exception_only(err)
+                    ).strip()
+                }
+
+        try:
+            send_message(self.request, json.dumps(to_json(reply)).encode())
+        except OSError:
+            pass
+
+
+class DasServer(socketserver.UnixStreamServer):
+    """Unix socket server analyzing forwarded command lines.
+
+    Requests are served one at a time, sharing the cache.
+
+    Attributes
+    -----------------------
+    cache : MemoryCache
+        The cache of datasets and pyramids.
+    """
+
+    def __init__(self, path: str, cache: MemoryCache):
+        """Bind the server to a socket.
+
+        Parameters
+        -----------------------
+        path : str
+            Path to the socket.
+        cache : MemoryCache
+            The cache of datasets and pyramids.
+        """
+        self.cache = cache
+        super().__init__(path, _Handler)
+
+    def analyze(self, request: dict) -> dict:
+        """Analyze the files of a forwarded command line.
+
+        Parameters
+        -----------------------
+        request : dict
+            `"argv"`, the command-line arguments (already
+            validated by the client), and `"files"`, the absolute
+            paths to the files to analyze.
+
+        Returns
+        -----------------------
+        dict
+            See `modules.remote.request()`.
+        """
+        try:
+            args = build_parser().parse_args(request["argv"])
+        except SystemExit:
+            return {"error": "invalid command line"}
+
+        if args.command not in COMMANDS:
+            return {"error": f"'{args.command}' is not served"}
+        config = parse_config(args)
+
+        results = []
+        for file in request["files"]:
+            try:
+                data = self.cache.dataset(file, config)
+                pyramid = None
+                if args.command != "avs":
+                    pyramid = self.cache.pyramid(file, config, args.skip, data)
+                results.append((run_driver(data, args, pyramid), None))
+            except (ParsingError, TailoringError) as err:
+                results.append((None, str(err)))
+
+        return {"results": results}
+
+
+def serve(path: Optional[str] = None, max_bytes: Optional[int] = None) -> int:
+    """Run the daemon until interrupted (or terminated).
+
+    The socket is only accessible by the current user, and its
+    directory (created private if missing) must belong to them.
+
+    Parameters
+    -----------------------
+    path : Optional[str], default = None
+        Path to the socket, `socket_path()` if `None`.
+    max_bytes : Optional[int], default = None
+        Memory budget of the cache, `SERVE_BYTES` if `None`.
+
+    Returns
+    -----------------------
+    int
+        The exit status.
+    """
+    path = socket_path() if path is None else path
+    max_bytes = SERVE_BYTES if max_bytes is None else max_bytes
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), 0o700, True)
+        check_owner(path)
+    except OSError as err:
+        print(f"das: cannot serve on {path}: {err}", file=sys.stderr)
+        return 1
+
+    if os.path.exists(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex(path) == 0:
+                print(
+                    f"das: a daemon is already serving {path}", file=sys.stderr
+                )
+                return 1
+        # stale socket of a terminated daemon
+        os.remove(path)
+
+    umask = os.umask(0o077)
+    try:
+        server = DasServer(path, MemoryCache(max_bytes))
+    finally:
+        os.umask(umask)
+
+    # terminated cleanly by SIGTERM too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    print(f"das: serving on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+
+    return 0
@@ -0,0 +1,776 @@
+"""Out-of-core analysis of files larger than the available memory.
+
+Files are parsed in chunks of lines, which are fed to online
+accumulators: only the accumulators (and a single chunk) are
+resident in memory at any time.
+
+Functions
+-----------------------
+open_text()
+    Open a (possibly compressed) text file for reading.
+count_file_rows()
+    Count the data rows of a file.
+iter_chunks()
+    Parse a 2D array from a file, chunk by chunk.
+stream_avs()
+    Out-of-core version of `avs()`.
+stream_ave()
+    Out-of-core version of `ave()`.
+stream_jck()
+    Out-of-core version of `jck()`.
+log_bins()
+    Accumulate the rows left after skipping in a `LogBinAccumulator`.
+online_ave()
+    Constant-memory version of `ave()`, with logarithmic binning.
+
+Classes
+-----------------------
+MomentAccumulator
+    Running column averages and sums of squared deviations.
+BinAccumulator
+    Running column sums over a fixed number of bins.
+LogBinAccumulator
+    Online blocking analysis, with bin sizes growing as powers of 2.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+from math import sqrt
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+from typing import TextIO
+
+import numpy as np
+
+from modules.common import MAXBINS
+from modules.common import MINBINS
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import TailoringError
+from modules.common import skipped_rows
+from modules.common import is_binary
+from modules.common import parse_ds
+from modules.results import Stats
+from modules.results import BinnedStats
+from modules.results import ScalingStats
+from modules.drivers import binsize_scaling
+from modules.drivers import binning_actimes
+from modules.drivers import jackknife_scaling
+from modules.tokenizer import CHUNK_LINES
+from modules.tokenizer import loadtxt_chunks
+from modules.tokenizer import open_data
+
+
+class MomentAccumulator:
+    """Running column averages and sums of squared deviations.
+
+    Chunks are merged with the pairwise update of Chan et al.,
+    which is stable even for large averages.
+
+    Attributes
+    -----------------------
+    n : int
+        Number of accumulated rows.
+    mean : Optional[np.ndarray]
+        Column averages (`None` until the first chunk).
+    m2 : Optional[np.ndarray]
+        Column sums of squared deviations from the averages.
+    """
+
+    def __init__(self):
+        """Initialize an empty accumulator."""
+        self.n = 0
+        self.mean = None
+        self.m2 = None
+
+    def add(self, chunk: np.ndarray) -> None:
+        """Accumulate a chunk of rows.
+
+        Parameters
+        -----------------------
+        chunk : np.ndarray
+            2D array of rows to accumulate.
+        """
+        nb = chunk.shape[0]
+        if nb == 0:
+            return
+
+        mean_b = chunk.mean(axis=0)
+        m2_b = ((chunk - mean_b) ** 2).sum(axis=0)
+
+        self._combine(nb, mean_b, m2_b)
+
+    def _combine(self, nb: int, mean_b: np.ndarray, m2_b: np.ndarray) -> None:
+        """Low-level method, merge the moments of a set of rows.
+
+        Parameters
+        -----------------------
+        nb : int
+            Number of rows of the set.
+        mean_b : np.ndarray
+            Column averages of the set.
+        m2_b : np.ndarray
+            Column sums of squared deviations of the set.
+        """
+        if self.mean is None:
+            self.n, self.mean, self.m2 = nb, mean_b, m2_b
+            return
+
+        n = self.n + nb
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (nb / n)
+        self.m2 = self.m2 + m2_b + delta**2 * (self.n * nb / n)
+        self.n = n
+
+    def merge(self, other: "MomentAccumulator") -> None:
+        """Accumulate the rows of another accumulator.
+
+        Parameters
+        -----------------------
+        other : MomentAccumulator
+            The accumulator to merge (unchanged).
+        """
+        if other.n > 0:
+            self._combine(other.n, other.mean, other.m2)
+
+    def stats(self) -> Stats:
+        """Return the statistical summary of the accumulated rows.
+
+        Returns
+        -----------------------
+        Stats
+            Stats object with column statistical summary.
+        """
+        s = np.sqrt(self.m2 / (self.n - 1)) / sqrt(self.n)
+        ds = s / sqrt(2.0 * (self.n - 1))
+
+        return Stats(m=self.mean, s=s, ds=ds)
+
+
+class BinAccumulator:
+    """Running column sums over a fixed number of bins.
+
+    Rows are assigned to bins in order of arrival.
+
+    Attributes
+    -----------------------
+    nbins : int
+        Number of bins.
+    bsize : int
+        Number of rows per bin.
+    count : int
+        Number of accumulated rows.
+    sums : Optional[np.ndarray]
+        Column sums per bin (`None` until the first chunk).
+    """
+
+    def __init__(self, nbins: int, bsize: int):
+        """Initialize empty bins.
+
+        Parameters
+        -----------------------
+        nbins : int
+            Number of bins.
+        bsize : int
+            Number of rows per bin.
+        """
+        self.nbins = nbins
+        self.bsize = bsize
+        self.count = 0
+        self.sums = None
+
+    def add(self, chunk: np.ndarray) -> None:
+        """Accumulate a chunk of rows.
+
+        Parameters
+        -----------------------
+        chunk : np.ndarray
+            2D array of rows to accumulate.
+
+        Raises
+        -----------------------
+        TailoringError
+            If the bins would overflow, i.e. the file has more
+            rows than counted before streaming.
+        """
+        n = chunk.shape[0]
+        if n == 0:
+            return
+        if self.count + n > self.nbins * self.bsize:
+            raise TailoringError(
+                "more rows than counted, file modified while reading"
+            )
+
+        if self.sums is None:
+            self.sums = np.zeros((self.nbins, chunk.shape[1]))
+
+        # chunk offsets where a new bin starts
+        first = (-self.count) % self.bsize
+        starts = np.arange(first, n, self.bsize)
+        if first != 0:
+            starts = np.concatenate(([0], starts))
+
+        ib = (self.count + starts[0]) // self.bsize
+        self.sums[ib : (ib + starts.shape[0])] += np.add.reduceat(
+            chunk, starts, axis=0
+        )
+        self.count += n
+
+    def means(self) -> np.ndarray:
+        """Return the bin averages.
+
+        Returns
+        -----------------------
+        np.ndarray
+            2D array of bin averages, 1 row per bin.
+        """
+        return self.sums / self.bsize
+
+
+class LogBinAccumulator:
+    """Online blocking analysis, with bin sizes growing as powers of 2.
+
+    Level `l` holds the moments of the completed blocks of `2**l`
+    consecutive rows: each block is accumulated as a single
+    sample, and averaged with the previous one (if pending) into
+    a block of the next level. Only the moments and one pending
+    block per level are stored, i.e. O(log N) values per column,
+    and no row is discarded to fit a given number of bins.
+
+    Attributes
+    -----------------------
+    moments : list[MomentAccumulator]
+        Moments of the completed blocks, 1 per level.
+    pending : list[Optional[np.ndarray]]
+        Block waiting for its pair, 1 per level (`None` if
+        there is none).
+    """
+
+    def __init__(self):
+        """Initialize an accumulator without levels."""
+        self.moments = []
+        self.pending = []
+
+    @property
+    def rows(self) -> int:
+        """Number of accumulated rows."""
+        return self.moments[0].n if self.moments else 0
+
+    def add(self, chunk: np.ndarray) -> None:
+        """Accumulate a chunk of rows.
+
+        Parameters
+        -----------------------
+        chunk : np.ndarray
+            2D array of rows to accumulate.
+        """
+        blocks = chunk
+        level = 0
+
+        while blocks.shape[0] > 0:
+            if level == len(self.moments):
+                self.moments.append(MomentAccumulator())
+                self.pending.append(None)
+            self.moments[level].add(blocks)
+
+            # pairing with the pending block first, if any
+            head = self.pending[level]
+            rest = blocks if head is None else blocks[1:]
+            npairs = rest.shape[0] // 2
+
+            nxt = np.empty((npairs + (head is not None), blocks.shape[1]))
+            if head is not None:
+                np.add(head, blocks[0], out=nxt[0])
+            np.add(
+                rest[0 : (2 * npairs) : 2],
+                rest[1 : (2 * npairs) : 2],
+                out=nxt[(head is not None) :],
+            )
+            nxt /= 2.0
+
+            self.pending[level] = (
+                rest[-1].copy() if rest.shape[0] % 2 == 1 else None
+            )
+            blocks = nxt
+            level += 1
+
+    def merge(self, other: "LogBinAccumulator") -> None:
+        """Accumulate the blocks of an independent run, level by level.
+
+        Blocks cannot span independent runs: the pending blocks
+        of both accumulators are discarded, and no further rows
+        should be added.
+
+        Parameters
+        -----------------------
+        other : LogBinAccumulator
+            The accumulator to merge (unchanged).
+        """
+        for level, acc in enumerate(other.moments):
+            if level == len(self.moments):
+                self.moments.append(MomentAccumulator())
+            self.moments[level].merge(acc)
+
+        self.pending = [None] * len(self.moments)
+
+    def scaling(self, minbins: int = MINBINS) -> ScalingStats:
+        """Return the statistics of all levels with enough blocks.
+
+        Parameters
+        -----------------------
+        minbins : int, default = MINBINS
+            Minimum number of blocks of the reported levels.
+
+        Returns
+        -----------------------
+        ScalingStats
+            Binsize scaling of all columns, from the unbinned
+            rows to the largest reported blocks.
+
+        Raises
+        -----------------------
+        TailoringError
+            If insufficient rows for binning.
+        """
+        levels = [
+            (2**level, acc)
+            for level, acc in enumerate(self.moments)
+            if acc.n >= max(minbins, 2)
+        ]
+        if not levels:
+            raise TailoringError("insufficient rows for binning")
+
+        return ScalingStats(
+            [acc.n for _, acc in levels],
+            [bsize for bsize, _ in levels],
+            np.stack([acc.stats().values for _, acc in levels], axis=1),
+        )
+
+    def save(self, file: str) -> None:
+        """Checkpoint the state of the accumulator to a `.npz` file.
+
+        Parameters
+        -----------------------
+        file : str
+            Path to the checkpoint file, overwritten atomically.
+        """
+        cols = self.moments[0].mean.shape[0] if self.moments else 0
+        waiting = np.array([block is not None for block in self.pending])
+        pending = np.zeros((len(self.pending), cols))
+        for level, block in enumerate(self.pending):
+            if block is not None:
+                pending[level] = block
+
+        tmp = f"{file}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                n=np.array([acc.n for acc in self.moments], dtype=np.int64),
+                mean=np.array([acc.mean for acc in self.moments]),
+                m2=np.array([acc.m2 for acc in self.moments]),
+                pending=pending,
+                waiting=waiting,
+            )
+        os.replace(tmp, file)
+
+    @classmethod
+    def load(cls, file: str) -> "LogBinAccumulator":
+        """Restore an accumulator from a checkpoint file.
+
+        Parameters
+        -----------------------
+        file : str
+            Path to a checkpoint written by `save()`.
+
+        Returns
+        -----------------------
+        LogBinAccumulator
+            The restored accumulator.
+        """
+        acc = cls()
+        with np.load(file) as state:
+            for n, mean, m2, block, waiting in zip(
+                state["n"],
+                state["mean"],
+                state["m2"],
+                state["pending"],
+                state["waiting"],
+            ):
+                level = MomentAccumulator()
+                level.n, level.mean, level.m2 = int(n), mean, m2
+                acc.moments.append(level)
+                acc.pending.append(block if waiting else None)
+
+        return acc
+
+
+def open_text(file: str) -> TextIO:
+    """Open a (possibly compressed) text file for reading.
+
+    Compressed files are detected by their magic bytes, and
+    decompressed on the fly.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+
+    Returns
+    -----------------------
+    TextIO
+        The opened file.
+
+    Raises
+    -----------------------
+    ParsingError
+        If file not found.
+    ParsingError
+        If the compression format is not available.
+    """
+    if not os.path.isfile(file):
+        raise ParsingError("file does not exist")
+
+    return open_data(file, text=True)
+
+
+def count_file_rows(file: str, columns: Optional[int] = None) -> int:
+    """Count the data rows of a file.
+
+    Empty and commented (`#`) lines are not counted.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    columns : Optional[int], default = None
+        Number of columns of raw binary (`.f64`) files.
+
+    Returns
+    -----------------------
+    int
+        The number of data rows.
+
+    Raises
+    -----------------------
+    ParsingError
+        If file not found.
+    """
+    if is_binary(file):
+        return parse_ds(file, columns=columns).shape[0]
+
+    with open_text(file) as f:
+        return sum(1 for line in f if line.partition("#")[0].strip())
+
+
+def iter_chunks(
+    file: str,
+    config: ParseConfig,
+    chunk_lines: int = CHUNK_LINES,
+) -> Iterator[np.ndarray]:
+    """Parse a 2D array from a file, chunk by chunk.
+
+    Follows the same rules and raises the same errors as
+    `parse_ds()`, with row numbers relative to the whole file.
+    Binary files are memory-mapped and yielded in chunks of
+    `chunk_lines` rows.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    config : ParseConfig
+        Parsing options.
+    chunk_lines : int, default = CHUNK_LINES
+        Number of lines (including empty and commented ones)
+        read per chunk.
+
+    Yields
+    -----------------------
+    np.ndarray
+        2D array storing the parsed rows of a chunk.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`.
+    """
+    if is_binary(file):
+        data = parse_ds(
+            file, config.fields, config.colnum_test, columns=config.columns
+        )
+        for start in range(0, data.shape[0], chunk_lines):
+            yield data[start : (start + chunk_lines)]
+        return
+
+    with open_text(file) as f:
+        yield from loadtxt_chunks(
+            f, config.fields, config.colnum_test, np.float64, chunk_lines
+        )
+
+
+def _kept_chunks(
+    file: str,
+    config: ParseConfig,
+    skip: int,
+    chunk_lines: int,
+) -> Iterator[np.ndarray]:
+    """Parse a file chunk by chunk, without its initial rows.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    config : ParseConfig
+        Parsing options.
+    skip : int
+        Number of initial rows to drop.
+    chunk_lines : int
+        Number of lines read per chunk.
+
+    Yields
+    -----------------------
+    np.ndarray
+        2D array storing the kept rows of a chunk.
+    """
+    for chunk in iter_chunks(file, config, chunk_lines):
+        if skip >= chunk.shape[0]:
+            skip -= chunk.shape[0]
+            continue
+
+        yield chunk[skip:]
+        skip = 0
+
+
+def stream_avs(
+    file: str,
+    config: ParseConfig,
+    skip_perc: int,
+    chunk_lines: int = CHUNK_LINES,
+) -> tuple[Stats, str]:
+    """Out-of-core version of `avs()`.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to analyze.
+    config : ParseConfig
+        Parsing options.
+    skip_perc : int
+        The percentage (1-100) of rows to skip.
+    chunk_lines : int, default = CHUNK_LINES
+        Number of lines read per chunk.
+
+    Returns
+    -----------------------
+    tuple[Stats, str]
+        - Stats object with column statistics.
+        - String carrying additional information.
+    """
+    rows = count_file_rows(file, config.columns)
+    skip = skipped_rows(rows, skip_perc, nbins=None)
+
+    acc = MomentAccumulator()
+    for chunk in _kept_chunks(file, config, skip, chunk_lines):
+        acc.add(chunk)
+
+    report = f"{rows - skip}/{rows} rows"
+
+    return (acc.stats(), report)
+
+
+def stream_ave(
+    file: str,
+    config: ParseConfig,
+    skip_perc: int,
+    actime: bool,
+    chunk_lines: int = CHUNK_LINES,
+) -> tuple[ScalingStats, list[float], str]:
+    """Out-of-core version of `ave()`.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to analyze.
+    config : ParseConfig
+        Parsing options.
+    skip_perc : int
+        The percentage (1-100) of rows to skip.
+    actime : bool
+        If True, the autocorrelation time is computed.
+    chunk_lines : int, default = CHUNK_LINES
+        Number of lines read per chunk.
+
+    Returns
+    -----------------------
+    tuple[ScalingStats, list[float], str]
+        - Binsize scaling of all columns.
+        - List of autocorrelation times, 1 per column (empty if not computed).
+        - String carrying additional information.
+    """
+    rows = count_file_rows(file, config.columns)
+    skip = skipped_rows(rows, skip_perc, nbins=MAXBINS)
+    keep = rows - skip
+
+    moments = MomentAccumulator()
+    bins = BinAccumulator(MAXBINS, keep // MAXBINS)
+    for chunk in _kept_chunks(file, config, skip, chunk_lines):
+        bins.add(chunk)
+        if actime:
+            moments.add(chunk)
+
+    report = f"{keep}/{rows} rows"
+
+    res = binsize_scaling(bins.means(), keep)
+
+    actimes = []
+    if actime:
+        actimes = binning_actimes(moments.stats().s, res)
+
+    return (res, actimes, report)
+
+
+def stream_jck(
+    file: str,
+    config: ParseConfig,
+    skip_perc: int,
+    func: Callable,
+    chunk_lines: int = CHUNK_LINES,
+) -> tuple[BinnedStats, str]:
+    """Out-of-core version of `jck()`.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to analyze.
+    config : ParseConfig
+        Parsing options.
+    skip_perc : int
+        The percentage (1-100) of rows to skip.
+    func : Callable
+        Functional used to compute values and pseudovalues.
+    chunk_lines : int, default = CHUNK_LINES
+        Number of lines read per chunk.
+
+    Returns
+    -----------------------
+    tuple[BinnedStats, str]
+        - `BinnedStats` objects with statistical information.
+        - String carrying additional information.
+    """
+    rows = count_file_rows(file, config.columns)
+    skip = skipped_rows(rows, skip_perc, nbins=MAXBINS)
+    keep = rows - skip
+
+    bins = BinAccumulator(MAXBINS, keep // MAXBINS)
+    for chunk in _kept_chunks(file, config, skip, chunk_lines):
+        bins.add(chunk)
+
+    report = f"{keep}/{rows} rows"
+
+    return (jackknife_scaling(bins.means(), keep, func), report)
+
+
+def log_bins(
+    file: str,
+    config: ParseConfig,
+    skip_perc: int,
+    chunk_lines: int = CHUNK_LINES,
+) -> tuple[LogBinAccumulator, int]:
+    """Accumulate the rows left after skipping in a `LogBinAccumulator`.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to analyze.
+    config : ParseConfig
+        Parsing options.
+    skip_perc : int
+        The percentage (1-100) of rows to skip.
+    chunk_lines : int, default = CHUNK_LINES
+        Number of lines read per chunk.
+
+    Returns
+    -----------------------
+    tuple[LogBinAccumulator, int]
+        - The accumulator of the kept rows.
+        - The number of rows of the file.
+    """
+    # rows counted only if needed, to read the file once otherwise
+    rows = count_file_rows(file, config.columns) if skip_perc > 0 else None
+    skip = 0 if rows is None else skipped_rows(rows, skip_perc, nbins=None)
+
+    acc = LogBinAccumulator()
+    for chunk in _kept_chunks(file, config, skip, chunk_lines):
+        acc.add(chunk)
+
+    return (acc, acc.rows if rows is None else rows)
+
+
+def online_ave(
+    file: str,
+    config: ParseConfig,
+    skip_perc: int,
+    actime: bool,
+    chunk_lines: int = CHUNK_LINES,
+) -> tuple[ScalingStats, list[float], str]:
+    """Constant-memory version of `ave()`, with logarithmic binning.
+
+    Bin sizes are powers of 2, starting from the unbinned rows,
+    and all the rows left after skipping are used.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to analyze.
+    config : ParseConfig
+        Parsing options.
+    skip_perc : int
+        The percentage (1-100) of rows to skip.
+    actime : bool
+        If True, the autocorrelation time is computed.
+    chunk_lines : int, default = CHUNK_LINES
+        Number of lines read per chunk.
+
+    Returns
+    -----------------------
+    tuple[ScalingStats, list[float], str]
+        - Binsize scaling of all columns.
+        - List of autocorrelation times, 1 per column (empty if not computed).
+        - String carrying additional information.
+    """
+    acc, rows = log_bins(file, config, skip_perc, chunk_lines)
+    report = f"{acc.rows}/{rows} rows"
+
+    res = acc.scaling()
+
+    actimes = []
+    if actime:
+        actimes = binning_actimes(res.values[1, 0], res)
+
+    return (res, actimes, report)
@@ -0,0 +1,336 @@
+"""Mergeable summaries of independent runs.
+
+A summary stores, for the rows of a run left after skipping, the
+moments (count, column averages and sums of squared deviations)
+of the blocks of `2**l` rows at each level `l` of a
+`LogBinAccumulator`. Block sizes being independent of the length
+of the run, the summaries of independent runs are merged level by
+level, without the raw data, into the statistics of `avs` and of
+`ave --online`.
+
+Functions
+-----------------------
+summarize()
+    Summarize the rows of a file left after skipping.
+merge_summaries()
+    Merge summary files, as a tree reduction.
+
+Classes
+-----------------------
+Summary
+    Mergeable summary of one or more independent runs.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from modules.common import ParseConfig
+from modules.common import ParsingError
+from modules.common import TailoringError
+from modules.results import Stats
+from modules.results import ScalingStats
+from modules.drivers import binning_actimes
+from modules.stream import MomentAccumulator
+from modules.stream import LogBinAccumulator
+from modules.stream import log_bins
+
+
+class Summary:
+    """Mergeable summary of one or more independent runs.
+
+    Attributes
+    -----------------------
+    acc : LogBinAccumulator
+        Moments of the blocks of all levels (without pending
+        blocks).
+    rows : int
+        Total number of rows of the runs, before skipping.
+    runs : int
+        Number of summarized runs.
+    fields : Optional[list[int]]
+        The summarized fields (0-indexed), all if `None`.
+    """
+
+    def __init__(
+        self,
+        acc: LogBinAccumulator,
+        rows: int,
+        runs: int = 1,
+        fields: Optional[list[int]] = None,
+    ):
+        """Wrap the accumulated moments of a set of runs.
+
+        Parameters
+        -----------------------
+        acc : LogBinAccumulator
+            Moments of the blocks of all levels.
+        rows : int
+            Total number of rows of the runs, before skipping.
+        runs : int, default = 1
+            Number of summarized runs.
+        fields : Optional[list[int]], default = None
+            The summarized fields (0-indexed), all if `None`.
+        """
+        self.acc = acc
+        self.rows = rows
+        self.runs = runs
+        self.fields = fields
+
+    @property
+    def columns(self) -> int:
+        """Number of summarized columns, 0 if no rows."""
+        return self.acc.moments[0].mean.shape[0] if self.acc.moments else 0
+
+    @property
+    def report(self) -> str:
+        """String carrying additional information."""
+        return f"{self.acc.rows}/{self.rows} rows, {self.runs} runs"
+
+    def merge(self, other: "Summary") -> None:
+        """Accumulate the summary of other independent runs.
+
+        Parameters
+        -----------------------
+        other : Summary
+            The summary to merge (unchanged).
+
+        Raises
+        -----------------------
+        ParsingError
+            If the summaries have different fields or columns.
+        """
+        if self.fields != other.fields or (
+            self.columns and other.columns and self.columns != other.columns
+        ):
+            raise ParsingError("summaries of different fields")
+
+        self.acc.merge(other.acc)
+        self.rows += other.rows
+        self.runs += other.runs
+
+    def avs(self) -> tuple[Stats, str]:
+        """Return the column statistics of the summarized rows, as `avs`.
+
+        Returns
+        -----------------------
+        tuple[Stats, str]
+            - Stats object with column statistics.
+            - String carrying additional information.
+
+        Raises
+        -----------------------
+        TailoringError
+            If less than 2 rows were summarized.
+        """
+        if self.acc.rows < 2:
+            raise TailoringError("insufficient rows left")
+
+        return (self.acc.moments[0].stats(), self.report)
+
+    def ave(self, actime: bool) -> tuple[ScalingStats, list, str]:
+        """Return the binsize scaling of the summarized rows, as `ave`.
+
+        Parameters
+        -----------------------
+        actime : bool
+            If True, the autocorrelation time is computed.
+
+        Returns
+        -----------------------
+        tuple[ScalingStats, list, str]
+            - Binsize scaling of all columns.
+            - List of autocorrelation times, 1 per column (empty
+              if not computed).
+            - String carrying additional information.
+
+        Raises
+        -----------------------
+        TailoringError
+            If insufficient rows for binning.
+        """
+        res = self.acc.scaling()
+
+        actimes = []
+        if actime:
+            actimes = binning_actimes(res.values[1, 0], res)
+
+        return (res, actimes, self.report)
+
+    def save(self, file: str) -> None:
+        """Write the summary to a `.npz` file.
+
+        Parameters
+        -----------------------
+        file : str
+            Path to the summary file.
+        """
+        moments = self.acc.moments
+        with open(file, "wb") as f:
+            np.savez(
+                f,
+                n=np.array([acc.n for acc in moments], dtype=np.int64),
+                mean=np.array([acc.mean for acc in moments]),
+                m2=np.array([acc.m2 for acc in moments]),
+                rows=self.rows,
+                runs=self.runs,
+                fields=np.array(
+                    [] if self.fields is None else self.fields,
+                    dtype=np.int64,
+                ),
+            )
+
+    @classmethod
+    def load(cls, file: str) -> "Summary":
+        """Read a summary from a file written by `save()`.
+
+        Parameters
+        -----------------------
+        file : str
+            Path to the summary file.
+
+        Returns
+        -----------------------
+        Summary
+            The summary.
+
+        Raises
+        -----------------------
+        ParsingError
+            If the file does not exist, or is not a summary.
+        """
+        acc = LogBinAccumulator()
+        try:
+            with np.load(file) as state:
+                for n, mean, m2 in zip(state["n"], state["mean"], state["m2"]):
+                    level = MomentAccumulator()
+                    level.n, level.mean, level.m2 = int(n), mean, m2
+                    acc.moments.append(level)
+                    acc.pending.append(None)
+                rows, runs = int(state["rows"]), int(state["runs"])
+                fields = np.asarray(state["fields"]).tolist() or None
+        except FileNotFoundError as err:
+            raise ParsingError(f"{file}: file does not exist") from err
+        except (OSError, ValueError, KeyError) as err:
+            raise ParsingError(f"{file}: not a summary") from err
+
+        return cls(acc, rows, runs, fields)
+
+
+def summarize(file: str, config: ParseConfig, skip_perc: int) -> Summary:
+    """Summarize the rows of a file left after skipping.
+
+    The file is processed in chunks, with constant memory.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to summarize.
+    config : ParseConfig
+        Parsing options.
+    skip_perc : int
+        The percentage (1-100) of rows to skip.
+
+    Returns
+    -----------------------
+    Summary
+        The summary of the run.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `iter_chunks()`.
+    """
+    acc, rows = log_bins(file, config, skip_perc)
+    acc.pending = [None] * len(acc.moments)
+
+    return Summary(acc, rows, fields=config.fields)
+
+
+def _merge_group(group: list[str | Summary]) -> Summary:
+    """Low-level function, merge a group of summaries (or their files).
+
+    Parameters
+    -----------------------
+    group : list[str | Summary]
+        The summaries, or the paths to their files.
+
+    Returns
+    -----------------------
+    Summary
+        The merged summary.
+    """
+    summaries = [Summary.load(s) if isinstance(s, str) else s for s in group]
+    for summary in summaries[1:]:
+        summaries[0].merge(summary)
+
+    return summaries[0]
+
+
+def merge_summaries(files: list[str], jobs: int = 1) -> Summary:
+    """Merge summary files, as a tree reduction.
+
+    Summaries are merged in pairs, level after level of the
+    tree, the pairs of each level in parallel if `jobs > 1`.
+    Only summaries are exchanged between processes.
+
+    Parameters
+    -----------------------
+    files : list[str]
+        Paths to the (at least 1) summary files.
+    jobs : int, default = 1
+        Number of worker processes.
+
+    Returns
+    -----------------------
+    Summary
+        The summary of all the runs.
+
+    Raises
+    -----------------------
+    ParsingError
+        If a file is not a summary, or the summaries have
+        different fields.
+    """
+    level = list(files)
+
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        while len(level) > 1 or isinstance(level[0], str):
+            groups = [level[i : (i + 2)] for i in range(0, len(level), 2)]
+            if executor is not None and len(groups) > 1:
+                level = list(executor.map(_merge_group, groups))
+            else:
+                level = [_merge_group(group) for group in groups]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return level[0]
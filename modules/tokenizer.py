@@ -0,0 +1,694 @@
+"""Tokenizers of text datasets, shared by the parsing backends.
+
+Both tokenizers validate every row (column count and numeric
+tokens) while materializing only the selected columns, so that
+the integrity check costs no more memory than the selection.
+
+Functions
+-----------------------
+compression()
+    Detect the compression format of a file from its magic bytes.
+open_data()
+    Open a (possibly compressed) file, decompressing on the fly.
+loadtxt_source()
+    Open a (possibly compressed) file for `np.loadtxt()`.
+read_blocks()
+    Read a (possibly compressed) file in blocks of complete lines.
+project_fields()
+    Normalize selected fields against a number of columns.
+count_rows()
+    Count the data rows of a block of complete lines.
+tokenize()
+    Parse a block of complete lines with vectorized tokenization.
+shift_rows()
+    Convert a chunk-level parsing error to a file-level one.
+loadtxt_chunks()
+    Parse lines of a text file with `np.loadtxt()`, chunk by chunk.
+fill_rows()
+    Copy parsed chunks into the rows of a preallocated array.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import re
+import os
+import bz2
+import gzip
+import lzma
+import warnings
+from itertools import islice
+from contextlib import AbstractContextManager
+from contextlib import nullcontext
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import IO
+from typing import TextIO
+
+import numpy as np
+
+from modules.errors import ParsingError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# BYTES READ AT ONCE BY THE BLOCK PARSER (ITS TEMPORARIES TAKE
+# SEVERAL TIMES AS MUCH), AND MAX NUMBER OF COMMENTS PER BLOCK
+# BLANKED ONE BY ONE
+BLOCK_SIZE = 2**22
+COMMENT_LOOP = 256
+
+# LINES (INCLUDING EMPTY AND COMMENTED ONES) PARSED AT ONCE BY
+# `loadtxt_chunks()`
+CHUNK_LINES = 2**16
+
+# BYTES READ AT ONCE TO COUNT ROWS BEFORE PREALLOCATING A DATASET,
+# AND LINES PARSED AT ONCE TO FILL IT (SMALLER THAN `BLOCK_SIZE`
+# AND `CHUNK_LINES`, THE PEAK MEMORY BEING THE DATASET PLUS A CHUNK)
+COUNT_BYTES = 2**18
+FILL_LINES = 2**12
+
+# MAGIC BYTES OF THE SUPPORTED COMPRESSION FORMATS
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+# OPENERS OF THE COMPRESSION FORMATS, ZSTD ONLY IF INSTALLED
+OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+if zstandard is not None:
+    OPENERS["zstd"] = zstandard.open
+
+# EXTENSIONS DECOMPRESSED BY `np.loadtxt()` ITSELF
+LOADTXT_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+
+def compression(file: str) -> Optional[str]:
+    """Detect the compression format of a file from its magic bytes.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file.
+
+    Returns
+    -----------------------
+    Optional[str]
+        The format (a key of `MAGIC`), `None` if uncompressed.
+    """
+    with open(file, "rb") as f:
+        head = f.read(max(len(magic) for magic in MAGIC))
+
+    for magic, codec in MAGIC.items():
+        if head.startswith(magic):
+            return codec
+
+    return None
+
+
+def open_data(file: str, text: bool = False) -> IO:
+    """Open a (possibly compressed) file, decompressing on the fly.
+
+    The format is detected from the magic bytes, independently
+    of the extension; the decompressed contents are streamed,
+    never held in full.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    text : bool, default = False
+        If `True`, opens the file in text mode.
+
+    Returns
+    -----------------------
+    IO
+        The opened file.
+
+    Raises
+    -----------------------
+    ParsingError
+        If the compression format is not available.
+    """
+    codec = compression(file)
+    opener = open if codec is None else OPENERS.get(codec)
+    if opener is None:
+        raise ParsingError(f"{codec} files require the `zstandard` package")
+
+    if text:
+        return opener(file, "rt", encoding="utf-8")
+    return opener(file, "rb")
+
+
+def loadtxt_source(file: str) -> AbstractContextManager:
+    """Open a (possibly compressed) file for `np.loadtxt()`.
+
+    `np.loadtxt()` reads paths in large blocks, but file objects
+    line by line: the path itself is returned if `np.loadtxt()`
+    detects the same format from the extension, an opened file
+    (see `open_data()`) otherwise.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+
+    Returns
+    -----------------------
+    AbstractContextManager
+        Context manager returning the path or the opened file.
+
+    Raises
+    -----------------------
+    ParsingError
+        If the compression format is not available.
+    """
+    ext = os.path.splitext(file)[1]
+    if LOADTXT_EXTENSIONS.get(ext) == compression(file):
+        return nullcontext(file)
+
+    return open_data(file, text=True)
+
+
+def read_blocks(
+    file: str,
+    block_size: int,
+    span: Optional[tuple[int, int]] = None,
+) -> Iterator[bytes]:
+    """Read a (possibly compressed) file in blocks of complete lines.
+
+    Parameters
+    -----------------------
+    file : str
+        Path to the file to open for reading.
+    block_size : int
+        Number of bytes read at once.
+    span : Optional[tuple[int, int]], default = None
+        If not `None`, the (start, end) byte offsets of the part
+        of the (decompressed) file to read, the whole file
+        otherwise.
+
+    Yields
+    -----------------------
+    bytes
+        Blocks of complete lines (the last one may lack the
+        final newline).
+    """
+    start, end = (0, None) if span is None else span
+
+    with open_data(file) as f:
+        f.seek(start)
+        rest = b""
+        while buf := f.read(
+            block_size if end is None else min(block_size, end - f.tell())
+        ):
+            block = rest + buf
+            cut = block.rfind(b"\n") + 1
+            rest = block[cut:]
+            if cut > 0:
+                yield block[:cut]
+
+        if rest:
+            yield rest
+
+
+def project_fields(fields: list[int], ncols: int) -> list[int]:
+    """Normalize selected fields against a number of columns.
+
+    Parameters
+    -----------------------
+    fields : list[int]
+        List of fields to select (0-indexed, negative ones
+        counted from the last column).
+    ncols : int
+        Number of columns of the dataset.
+
+    Returns
+    -----------------------
+    list[int]
+        The non-negative indices of the fields.
+
+    Raises
+    -----------------------
+    ParsingError
+        If requested column(s) do not exist.
+    """
+    for f in fields:
+        if not -ncols <= f < ncols:
+            raise ParsingError(
+                f"index {f} is out of bounds for axis 1 with size {ncols}"
+            )
+
+    return [f % ncols for f in fields]
+
+
+def count_rows(block: bytes) -> int:
+    """Count the data rows of a block of complete lines.
+
+    Rows are the lines whose first non-blank character is not a
+    comment (`#`); their tokens are not checked.
+
+    Parameters
+    -----------------------
+    block : bytes
+        The lines to count.
+
+    Returns
+    -----------------------
+    int
+        The number of data rows.
+    """
+    buf = np.frombuffer(block, dtype=np.uint8)
+    ends = np.append(np.flatnonzero(buf == ord("\n")), buf.shape[0])
+
+    # tokens start at non-blank characters after blank ones
+    blank = buf <= ord(" ")
+    starts = np.flatnonzero(blank[:-1] & ~blank[1:]) + 1
+    if buf.shape[0] > 0 and not blank[0]:
+        starts = np.concatenate(([0], starts))
+
+    # first token of each line with any
+    cumul = np.searchsorted(starts, ends)
+    counts = np.diff(cumul, prepend=0)
+    first = (cumul - counts)[counts > 0]
+
+    return int(np.count_nonzero(buf[starts[first]] != ord("#")))
+
+
+def _convert_tokens(
+    text: bytes,
+    ntokens: int,
+    index: np.ndarray,
+    first: np.ndarray,
+    offset: int,
+) -> np.ndarray:
+    """Convert whitespace-separated tokens to floating-point values.
+
+    The tokens are converted in bulk; on failure they are
+    converted one by one (only those in `index`) to locate the
+    first invalid one.
+
+    Parameters
+    -----------------------
+    text : bytes
+        Whitespace-separated tokens, without comments.
+    ntokens : int
+        Number of tokens in `text`.
+    index : np.ndarray
+        2D array of the indices of the tokens to convert, 1 row
+        per data row.
+    first : np.ndarray
+        Index of the first token of each data row.
+    offset : int
+        Number of data rows before `text`.
+
+    Returns
+    -----------------------
+    np.ndarray
+        1D array with the values of the tokens (`nan` for the
+        unconverted ones in case of fallback).
+
+    Raises
+    -----------------------
+    ParsingError
+        If any of the tokens in `index` is not a number.
+    """
+    try:
+        with warnings.catch_warnings():
+            # partial reads only warn in older numpy versions
+            warnings.simplefilter("error", DeprecationWarning)
+            values = np.fromstring(text, dtype=np.float64, sep=" ")
+        if values.shape[0] == ntokens:
+            return values
+    except (ValueError, DeprecationWarning):
+        pass
+
+    tokens = text.split()
+    values = np.full(ntokens, np.nan)
+    for irow, row in enumerate(index):
+        for itok in row:
+            try:
+                values[itok] = float(tokens[itok])
+            except ValueError as err:
+                raise ParsingError(
+                    f"could not convert string '{tokens[itok].decode()}'"
+                    f" to float64 at row {offset + irow},"
+                    f" column {itok - first[irow] + 1}."
+                ) from err
+
+    return values
+
+
+def _selected(index: np.ndarray, fields: Optional[list[int]]) -> np.ndarray:
+    """Low-level function, restrict a token index to selected fields.
+
+    Parameters
+    -----------------------
+    index : np.ndarray
+        2D array of the indices of all the tokens, 1 row per
+        data row.
+    fields : Optional[list[int]]
+        List of fields to select (0-indexed), all fields if
+        `None`.
+
+    Returns
+    -----------------------
+    np.ndarray
+        The columns of `index` in `fields` (none if any of them
+        is out of bounds, raised by the caller once all rows are
+        validated).
+    """
+    if fields is None:
+        return index
+
+    try:
+        return index[:, project_fields(fields, index.shape[1])]
+    except ParsingError:
+        return index[:, :0]
+
+
+def tokenize(
+    block: bytes,
+    fields: Optional[list[int]],
+    colnum_test: bool,
+    offset: int,
+    ncols: Optional[int],
+) -> tuple[np.ndarray, Optional[int]]:
+    """Parse a block of complete lines with vectorized tokenization.
+
+    Comments are blanked and tokens located with array
+    operations on the raw bytes; the column count of each row is
+    verified before any conversion. With `colnum_test`, all the
+    tokens are validated but only the selected columns
+    materialized.
+
+    Parameters
+    -----------------------
+    block : bytes
+        The lines to parse.
+    fields : Optional[list[int]]
+        List of fields to parse (0-indexed), all fields if
+        `None`.
+    colnum_test: bool
+        If `True`, checks if all rows have the same number of
+        columns.
+    offset : int
+        Number of data rows before `block`.
+    ncols : Optional[int]
+        Number of columns of the previous rows, if any.
+
+    Returns
+    -----------------------
+    tuple[np.ndarray, Optional[int]]
+        - 2D array storing the parsed rows, only the columns in
+          `fields` (none if any of them is out of bounds).
+        - Number of columns of the rows, if checked.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`.
+    """
+    text = block
+    buf = np.frombuffer(block, dtype=np.uint8)
+    ends = np.append(np.flatnonzero(buf == ord("\n")), buf.shape[0])
+
+    # blanking from the first `#` to the end of each line
+    hashes = np.flatnonzero(buf == ord("#"))
+    if hashes.shape[0] > 0:
+        hlines = np.searchsorted(ends, hashes)
+        firsth = np.concatenate(([True], hlines[1:] != hlines[:-1]))
+
+        buf = buf.copy()
+        if firsth.sum() <= COMMENT_LOOP:
+            for beg, end in zip(hashes[firsth], ends[hlines[firsth]]):
+                buf[beg:end] = ord(" ")
+        else:
+            delta = np.zeros(buf.shape[0] + 1, dtype=np.int8)
+            delta[hashes[firsth]] = 1
+            delta[ends[hlines[firsth]]] = -1
+            buf[np.cumsum(delta[:-1], dtype=np.int8) > 0] = ord(" ")
+        text = buf.tobytes()
+
+    # tokens start at non-blank characters after blank ones
+    blank = buf <= ord(" ")
+    starts = np.flatnonzero(blank[:-1] & ~blank[1:]) + 1
+    if buf.shape[0] > 0 and not blank[0]:
+        starts = np.concatenate(([0], starts))
+
+    # number of tokens and first token of each data row
+    cumul = np.searchsorted(starts, ends)
+    counts = np.diff(cumul, prepend=0)
+    rows = counts > 0
+    counts = counts[rows]
+    first = cumul[rows] - counts
+    nrows = counts.shape[0]
+
+    # row (and message) of the first structural error, if any,
+    # with the tokens of that row converted before the error
+    bad_row, message = nrows, None
+    partial = np.empty((1, 0), dtype=np.int64)
+    if fields is None or colnum_test:
+        if ncols is None and nrows > 0:
+            ncols = int(counts[0])
+
+        bad = np.flatnonzero(counts != ncols)
+        if bad.shape[0] > 0:
+            bad_row = bad[0]
+            message = (
+                f"the number of columns changed from {ncols} to"
+                f" {counts[bad_row]} at row {offset + bad_row + 1}; use"
+                " `usecols` to select a subset and avoid this error"
+            )
+
+        index = first[:bad_row, None] + np.arange(ncols or 1)
+
+        # all columns validated, only the selected ones kept
+        kept = _selected(index, fields)
+    else:
+        cols = np.array(fields)
+        cols = np.where(cols < 0, cols + counts[:, None], cols)
+        missing = (cols < 0) | (cols >= counts[:, None])
+
+        bad = np.flatnonzero(missing.any(axis=1))
+        if bad.shape[0] > 0:
+            bad_row = bad[0]
+            ifield = np.argmax(missing[bad_row])
+            field = fields[ifield]
+            partial = first[bad_row] + cols[bad_row : (bad_row + 1), :ifield]
+            message = (
+                f"invalid column index {field} at row"
+                f" {offset + bad_row + 1} with {counts[bad_row]} columns"
+            )
+
+        index = first[:bad_row, None] + cols[:bad_row]
+        kept = index
+
+    # conversion errors take precedence if in previous rows
+    values = _convert_tokens(text, starts.shape[0], index, first, offset)
+    if message is not None:
+        _convert_tokens(
+            text,
+            starts.shape[0],
+            partial,
+            first[bad_row : (bad_row + 1)],
+            offset + bad_row,
+        )
+        raise ParsingError(message)
+
+    return (values[kept], ncols)
+
+
+def shift_rows(err: Exception, offset: int) -> ParsingError:
+    """Convert a chunk-level parsing error to a file-level one.
+
+    Parameters
+    -----------------------
+    err : Exception
+        The error raised by `np.loadtxt()` or `tokenize()` on a
+        chunk.
+    offset : int
+        Number of data rows before the chunk.
+
+    Returns
+    -----------------------
+    ParsingError
+        Error with row numbers relative to the whole file.
+    """
+    return ParsingError(
+        re.sub(
+            r"at row (\d+)",
+            lambda m: f"at row {int(m.group(1)) + offset}",
+            str(err),
+        )
+    )
+
+
+def _tokens(line: str) -> list[str]:
+    """Low-level function, whitespace-separated tokens of a line.
+
+    Parameters
+    -----------------------
+    line : str
+        The line to split, comments (`#`) excluded.
+
+    Returns
+    -----------------------
+    list[str]
+        The tokens, none for empty and commented lines.
+    """
+    return line.split("#", 1)[0].split()
+
+
+def loadtxt_chunks(
+    f: TextIO,
+    fields: Optional[list[int]],
+    colnum_test: bool,
+    dtype: str,
+    chunk_lines: int = CHUNK_LINES,
+) -> Iterator[np.ndarray]:
+    """Parse lines of a text file with `np.loadtxt()`, chunk by chunk.
+
+    With `colnum_test`, all the columns of each chunk are parsed
+    and checked, but only those in `fields` are kept; an invalid
+    selection is raised once all rows are checked, as for the
+    whole file.
+
+    Parameters
+    -----------------------
+    f : TextIO
+        The opened file.
+    fields : Optional[list[int]]
+        List of fields to parse (0-indexed), all fields if
+        `None`.
+    colnum_test: bool
+        If `True`, checks if all rows have the same number of
+        columns.
+    dtype : str
+        Storage type of the parsed rows.
+    chunk_lines : int, default = CHUNK_LINES
+        Number of lines (including empty and commented ones)
+        parsed at once.
+
+    Yields
+    -----------------------
+    np.ndarray
+        2D array storing the parsed rows of a chunk.
+
+    Raises
+    -----------------------
+    ParsingError
+        Same as `parse_ds()`, with row numbers relative to the
+        whole file.
+    """
+    offset = 0
+    ncols = None
+
+    while lines := list(islice(f, chunk_lines)):
+        if colnum_test and ncols is not None:
+            # the first row of a chunk is checked against the previous
+            # chunks, `np.loadtxt()` checks the following ones against it
+            first = next(
+                (tokens for line in lines if (tokens := _tokens(line))), []
+            )
+            if first and len(first) != ncols:
+                raise ParsingError(
+                    f"the number of columns changed from {ncols} to"
+                    f" {len(first)} at row {offset + 1}; use"
+                    " `usecols` to select a subset and avoid this error"
+                )
+
+        try:
+            with warnings.catch_warnings():
+                # chunks of comments only are legitimate
+                warnings.simplefilter("ignore", UserWarning)
+                chunk = np.loadtxt(
+                    lines,
+                    comments="#",
+                    dtype=dtype,
+                    usecols=None if colnum_test else fields,
+                    ndmin=2,
+                )
+        except ValueError as err:
+            raise shift_rows(err, offset) from err
+
+        if chunk.shape[0] == 0:
+            continue
+
+        if colnum_test and ncols is None:
+            ncols = chunk.shape[1]
+
+        offset += chunk.shape[0]
+
+        if colnum_test and fields is not None:
+            try:
+                # copied, not to keep the unselected columns alive
+                chunk = chunk[:, project_fields(fields, ncols)]
+            except ParsingError:
+                # raised below, once all rows are checked
+                continue
+
+        yield chunk
+
+    if colnum_test and fields is not None:
+        project_fields(fields, ncols or 1)
+
+
+def fill_rows(data: np.ndarray, chunks: Iterable[np.ndarray]) -> None:
+    """Copy parsed chunks into the rows of a preallocated array.
+
+    Used with rows counted beforehand (see `count_rows()`), so
+    that datasets are parsed without concatenating their chunks.
+
+    Parameters
+    -----------------------
+    data : np.ndarray
+        The array to fill, with as many rows as the chunks.
+    chunks : Iterable[np.ndarray]
+        2D arrays of consecutive rows, with as many columns as
+        `data`.
+
+    Raises
+    -----------------------
+    ParsingError
+        If the chunks do not have as many rows as `data` (e.g.,
+        the file was modified after counting them).
+    """
+    filled = 0
+    for chunk in chunks:
+        if filled + chunk.shape[0] > data.shape[0]:
+            raise ParsingError("file modified while parsing")
+        data[filled : (filled + chunk.shape[0])] = chunk
+        filled += chunk.shape[0]
+
+    if filled != data.shape[0]:
+        raise ParsingError("file modified while parsing")
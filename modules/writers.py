@@ -0,0 +1,406 @@
+"""Machine-readable writers of driver results.
+
+Functions
+-----------------------
+record()
+    Return the results of a file as a JSON-serializable dict.
+csv_header()
+    Return the CSV header of the results of a driver.
+csv_rows()
+    Return the results of a file as CSV rows.
+arrays()
+    Return the results of a file as a dict of arrays.
+
+Classes
+-----------------------
+Writer
+    Bulk writer of the results of several files.
+"""
+
+# Copyright (c) 2023 Adriano Angelone
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the
+# Software.
+#
+# This file is part of das.
+#
+# This file may be used under the terms of the GNU General
+# Public License version 3.0 as published by the Free Software
+# Foundation and appearing in the file LICENSE included in the
+# packaging of this file.  Please review the following
+# information to ensure the GNU General Public License version
+# 3.0 requirements will be met:
+# http://www.gnu.org/copyleft/gpl.html.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+# PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import io
+import csv
+import sys
+import json
+from typing import Optional
+
+import numpy as np
+
+from modules.results import Stats
+from modules.results import ScalingStats
+
+
+# FORMATS HANDLED BY `Writer`, AND THEIR KIND
+TEXT_FORMATS = ("jsonl", "csv")
+BINARY_FORMATS = ("npz",)
+
+# CSV HEADERS OF THE DRIVERS
+CSV_HEADERS = {
+    "avs": ["file", "column", "mean", "sem", "se_sem"],
+    "ave": [
+        "file",
+        "column",
+        "bins",
+        "binsize",
+        "mean",
+        "sem",
+        "se_sem",
+        "actime",
+        "actime_error",
+    ],
+    "jck": ["file", "bins", "binsize", "mean", "sem", "se_sem"],
+    "bst": ["file", "bins", "binsize", "mean", "sem", "se_sem"],
+}
+
+
+def _columns(stats: Stats | ScalingStats, fields: Optional[list[int]]):
+    """Low-level function, return the (1-indexed) analyzed columns.
+
+    Parameters
+    -----------------------
+    stats : Stats | ScalingStats
+        The results, 1 per column.
+    fields : Optional[list[int]]
+        The analyzed fields (1-indexed), all if `None`.
+
+    Returns
+    -----------------------
+    list[int]
+        The analyzed columns.
+    """
+    ncols = stats.values.shape[-1]
+    return list(range(1, ncols + 1)) if fields is None else list(fields)
+
+
+def _actimes(actimes: list, ncols: int) -> np.ndarray:
+    """Low-level function, return autocorrelation times as an array.
+
+    Parameters
+    -----------------------
+    actimes : list
+        The autocorrelation times, possibly `(time, error)`
+        pairs (empty if not computed).
+    ncols : int
+        Number of analyzed columns.
+
+    Returns
+    -----------------------
+    np.ndarray
+        Array of shape `(ncols, 2)` storing times and errors
+        (`nan` if not computed).
+    """
+    res = np.full((ncols, 2), np.nan)
+    for icol, t in enumerate(actimes):
+        res[icol, : np.size(t)] = t
+    return res
+
+
+def record(
+    command: str, file: str, res: tuple, fields: Optional[list[int]]
+) -> dict:
+    """Return the results of a file as a JSON-serializable dict.
+
+    Parameters
+    -----------------------
+    command : str
+        The driver which computed the results.
+    file : str
+        Path to the analyzed file.
+    res : tuple
+        The results of the driver.
+    fields : Optional[list[int]]
+        The analyzed fields (1-indexed), all if `None`.
+
+    Returns
+    -----------------------
+    dict
+        Driver, file, report and statistics; per-column lists
+        (indexed as `fields`) for `avs` and `ave`, with bin
+        numbers as inner index for the latter.
+    """
+    stats, report = res[0], res[-1]
+    rec = {"file": file, "driver": command, "report": report}
+
+    if command in ("jck", "bst"):
+        rec["fields"] = fields
+        rec["nbins"] = stats.nbins.tolist()
+        rec["bsize"] = stats.bsize.tolist()
+        values = stats.values
+    else:
+        rec["fields"] = _columns(stats, fields)
+        if command == "ave":
+            rec["nbins"] = stats.nbins.tolist()
+            rec["bsize"] = stats.bsize.tolist()
+            rec["actimes"] = [
+                list(t) if isinstance(t, tuple) else t for t in res[1]
+            ]
+            values = stats.values.transpose((0, 2, 1))
+        else:
+            values = stats.values
+
+    rec["m"], rec["s"], rec["ds"] = values.tolist()
+
+    return rec
+
+
+def csv_header(command: str) -> list[str]:
+    """Return the CSV header of the results of a driver.
+
+    Parameters
+    -----------------------
+    command : str
+        The driver.
+
+    Returns
+    -----------------------
+    list[str]
+        The column names.
+    """
+    return CSV_HEADERS[command]
+
+
+def csv_rows(
+    command: str, file: str, res: tuple, fields: Optional[list[int]]
+) -> list[list]:
+    """Return the results of a file as CSV rows.
+
+    One row per column (`avs`), per column and bin number
+    (`ave`, with the autocorrelation time empty if not
+    computed), or per bin number (`jck`, `bst`).
+
+    Parameters
+    -----------------------
+    command : str
+        The driver which computed the results.
+    file : str
+        Path to the analyzed file.
+    res : tuple
+        The results of the driver.
+    fields : Optional[list[int]]
+        The analyzed fields (1-indexed), all if `None`.
+
+    Returns
+    -----------------------
+    list[list]
+        The rows, as in `csv_header()`.
+    """
+    stats = res[0]
+
+    if command == "avs":
+        cols = _columns(stats, fields)
+        return [[file, c, *v] for c, v in zip(cols, stats.values.T.tolist())]
+
+    nbins, bsize = stats.nbins.tolist(), stats.bsize.tolist()
+
+    if command != "ave":
+        return [
+            [file, nb, bs, *v]
+            for nb, bs, v in zip(nbins, bsize, stats.values.T.tolist())
+        ]
+
+    cols = _columns(stats, fields)
+    values = stats.values.transpose((2, 1, 0)).tolist()
+    actimes = [
+        list(t) if isinstance(t, tuple) else [t, ""] for t in res[1]
+    ] or [["", ""]] * len(cols)
+
+    rows = []
+    for col, col_values, actime in zip(cols, values, actimes):
+        for irow, (nb, bs, v) in enumerate(zip(nbins, bsize, col_values)):
+            extra = actime if irow == 0 else ["", ""]
+            rows.append([file, col, nb, bs, *v, *extra])
+
+    return rows
+
+
+def arrays(
+    command: str, res: tuple, fields: Optional[list[int]]
+) -> dict[str, np.ndarray]:
+    """Return the results of a file as a dict of arrays.
+
+    Parameters
+    -----------------------
+    command : str
+        The driver which computed the results.
+    res : tuple
+        The results of the driver.
+    fields : Optional[list[int]]
+        The analyzed fields (1-indexed), all if `None`.
+
+    Returns
+    -----------------------
+    dict[str, np.ndarray]
+        - `values`: the `values` array of the results (means,
+          SEMs and SE(SEM)s as first index).
+        - `fields`: the analyzed fields.
+        - `nbins`, `bsize`: bin numbers and binsizes (except
+          `avs`).
+        - `actimes`: autocorrelation times and errors, `nan` if
+          not computed (`ave` only).
+    """
+    stats = res[0]
+    res_arrays = {"values": stats.values}
+
+    if command in ("jck", "bst"):
+        res_arrays["fields"] = np.array(fields or [], dtype=np.int64)
+    else:
+        res_arrays["fields"] = np.array(
+            _columns(stats, fields), dtype=np.int64
+        )
+
+    if command != "avs":
+        res_arrays["nbins"] = stats.nbins
+        res_arrays["bsize"] = stats.bsize
+    if command == "ave":
+        res_arrays["actimes"] = _actimes(res[1], len(res_arrays["fields"]))
+
+    return res_arrays
+
+
+class Writer:
+    """Bulk writer of the results of several files.
+
+    Text formats are written file by file, each with a single
+    write on the output; NPZ archives store the arrays of all
+    files, keyed as `<index>/<name>` (see `arrays()`) with the
+    file paths in `files`, and are written when closing.
+
+    Attributes
+    -----------------------
+    fmt : str
+        Output format, `"jsonl"`, `"csv"` or `"npz"`.
+    command : str
+        The driver which computes the results.
+    fields : Optional[list[int]]
+        The analyzed fields (1-indexed), all if `None`.
+    output : Optional[str]
+        Path to the output file (stdout if `None`, text formats
+        only).
+    """
+
+    def __init__(
+        self,
+        fmt: str,
+        command: str,
+        fields: Optional[list[int]],
+        output: Optional[str] = None,
+    ):
+        """Open the output, writing the CSV header if needed.
+
+        Parameters
+        -----------------------
+        fmt : str
+            Output format, `"jsonl"`, `"csv"` or `"npz"`.
+        command : str
+            The driver which computes the results.
+        fields : Optional[list[int]]
+            The analyzed fields (1-indexed), all if `None`.
+        output : Optional[str], default = None
+            Path to the output file (stdout if `None`, text
+            formats only).
+
+        Raises
+        -----------------------
+        ValueError
+            If invalid output format.
+        ValueError
+            If binary format without output file.
+        """
+        if fmt not in TEXT_FORMATS + BINARY_FORMATS:
+            raise ValueError(f"invalid output format '{fmt}'")
+        if fmt in BINARY_FORMATS and output is None:
+            raise ValueError(f"{fmt} output requires an output file")
+
+        self.fmt = fmt
+        self.command = command
+        self.fields = fields
+        self.output = output
+
+        self._files = []
+        self._arrays = {}
+        self._stream = None
+
+        if fmt in TEXT_FORMATS and output is None:
+            self._stream = sys.stdout
+        elif fmt in TEXT_FORMATS:
+            # closed by close()
+            # pylint: disable-next=consider-using-with
+            self._stream = open(output, "w", encoding="utf-8", newline="")
+        if fmt == "csv":
+            self._write_csv([csv_header(command)])
+
+    def __enter__(self) -> "Writer":
+        """Return the writer itself."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Close the writer, see `close()`."""
+        self.close()
+
+    def _write_csv(self, rows: list[list]) -> None:
+        """Write CSV rows on the output, with a single write."""
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        self._stream.write(buffer.getvalue())
+
+    def write(self, file: str, res: tuple) -> None:
+        """Write the results of a file.
+
+        Parameters
+        -----------------------
+        file : str
+            Path to the analyzed file.
+        res : tuple
+            The results of the driver.
+        """
+        if self.fmt == "jsonl":
+            rec = record(self.command, file, res, self.fields)
+            self._stream.write(json.dumps(rec) + "\n")
+        elif self.fmt == "csv":
+            self._write_csv(csv_rows(self.command, file, res, self.fields))
+        else:
+            index = len(self._files)
+            self._files.append(file)
+            for key, arr in arrays(self.command, res, self.fields).items():
+                self._arrays[f"{index}/{key}"] = arr
+
+    def close(self) -> None:
+        """Write the NPZ archive, and close the output file."""
+        if self.fmt == "npz":
+            # written through a file object, np.savez() would append
+            # the extension to a path
+            with open(self.output, "wb") as f:
+                np.savez(
+                    f, files=np.array(self._files, dtype=str), **self._arrays
+                )
+            self._arrays = {}
+        elif self._stream is not None:
+            self._stream.flush()
+            if self._stream is not sys.stdout:
+                self._stream.close()
+            self._stream = None
@@ -0,0 +1,85 @@
+"""Test module for the in-process interface."""
+
+
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+from modules import drivers
+from modules.common import parse_ds
+from modules.common import ParsingError
+from modules.common import TailoringError
+from modules.functionals import susceptibility
+from modules.api import as_dataset
+from modules.api import analyze
+
+
+def test_as_dataset():
+    """Test views of arrays and buffers, and conversions."""
+
+    data = np.arange(12.0).reshape((4, 3))
+    assert as_dataset(data) is data
+    assert np.shares_memory(as_dataset(memoryview(data)), data)
+
+    view = as_dataset(data[:, 1])
+    assert view.shape == (4, 1) and np.shares_memory(view, data)
+
+    single = np.arange(4, dtype=np.float32)
+    assert np.shares_memory(as_dataset(single), single)
+
+    converted = as_dataset(np.arange(4))
+    assert converted.dtype == np.float64 and converted.shape == (4, 1)
+
+    with pytest.raises(ValueError, match="expected a 1D or 2D array"):
+        as_dataset(np.zeros((2, 2, 2)))
+
+
+def test_drivers():
+    """Test the results against the drivers."""
+
+    data = parse_ds("tests/data/jck-01.dat.gz")
+
+    res = analyze(data, "avs", skip=20)
+    assert res == drivers.avs(data, 20)[0]
+
+    res = analyze(memoryview(data), skip=10, actime=True)
+    assert res == tuple(drivers.ave(data, 10, True)[:2])
+
+    res = analyze(data, "jck", fields=[0, 1])
+    assert res == drivers.jck(data[:, :2], 0, susceptibility)[0]
+
+    res = analyze(data, "jck", fields=[0, 1], func="a0 - a1**2")
+    assert res == drivers.jck(data[:, :2], 0, susceptibility)[0]
+
+
+def test_errors():
+    """Test errors on invalid arguments."""
+
+    data = np.zeros((100, 2))
+
+    with pytest.raises(ValueError, match="invalid driver 'bst'"):
+        analyze(data, "bst")
+    with pytest.raises(ValueError, match="invalid skip percentage"):
+        analyze(data, "avs", skip=101)
+    with pytest.raises(ParsingError):
+        analyze(data, fields=[2])
+    with pytest.raises(TailoringError, match="insufficient rows left"):
+        analyze(data, "ave")
+
+
+def test_imports():
+    """Test that the interface neither imports rich nor prints."""
+
+    code = (
+        "import sys\n"
+        "import numpy as np\n"
+        "from modules.api import analyze\n"
+        "analyze(np.ones((4096, 2)), 'jck')\n"
+        "assert not [m for m in sys.modules if m.startswith('rich')]\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True
+    )
+    assert out.stdout == b""
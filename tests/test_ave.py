@@ -1,8 +1,12 @@
 """Test module for ave() driver."""
 
 
+import numpy as np
+import pytest
+
 from modules.common import parse_ds
 from modules.drivers import ave
+from modules.drivers import fft_actimes
 
 
 def test_ave():
@@ -16,80 +20,80 @@ def test_ave():
     assert not actimes
     assert report == "31744/40497 rows"
 
-    assert stats[0].nbins == [1024, 512, 256, 128, 64]
-    assert stats[0].bsize == [31, 62, 124, 248, 496]
-    assert stats[0].m == [
+    assert stats[0].nbins.tolist() == [1024, 512, 256, 128, 64]
+    assert stats[0].bsize.tolist() == [31, 62, 124, 248, 496]
+    assert stats[0].m.tolist() == [
         -0.4995448147996472,
         -0.4995448147996472,
         -0.4995448147996472,
         -0.4995448147996472,
         -0.4995448147996472,
     ]
-    assert stats[0].s == [
+    assert stats[0].s.tolist() == [
         0.0001743365336048138,
         0.0001804272766564555,
         0.00017649019401418475,
         0.00017824435864908882,
         0.0001582510738620892,
     ]
-    assert stats[0].ds == [
+    assert stats[0].ds.tolist() == [
         3.854211934119563e-06,
         5.643866677903565e-06,
         7.815117148541072e-06,
         1.1184045756749872e-05,
         1.409812617811892e-05,
     ]
-    assert stats[1].nbins == stats[0].nbins
-    assert stats[1].bsize == stats[0].bsize
-    assert stats[1].m == [
+    assert stats[1].nbins.tolist() == stats[0].nbins.tolist()
+    assert stats[1].bsize.tolist() == stats[0].bsize.tolist()
+    assert stats[1].m.tolist() == [
         -7.249938210590978,
         -7.249938210590978,
         -7.249938210590978,
         -7.249938210590978,
         -7.249938210590978,
     ]
-    assert stats[1].s == [
+    assert stats[1].s.tolist() == [
         0.00015487978745936192,
         0.00015935176762772726,
         0.00015796910259900911,
         0.00016085464180606504,
         0.00014464381807345806,
     ]
-    assert stats[1].ds == [
+    assert stats[1].ds.tolist() == [
         3.4240644392581373e-06,
         4.984612903577757e-06,
         6.994989435854652e-06,
         1.0092917878463464e-05,
         1.2885895484422392e-05,
     ]
-    assert stats[2].nbins == stats[0].nbins
-    assert stats[2].bsize == stats[0].bsize
-    assert stats[2].m == [
+    assert stats[2].nbins.tolist() == stats[0].nbins.tolist()
+    assert stats[2].bsize.tolist() == stats[0].bsize.tolist()
+    assert stats[2].m.tolist() == [
         -7.749483020854335,
         -7.749483020854335,
         -7.749483020854335,
         -7.749483020854335,
         -7.749483020854335,
     ]
-    assert stats[2].s == [
+    assert stats[2].s.tolist() == [
         6.354113302173723e-05,
         6.286498225846817e-05,
         6.125512011034933e-05,
         6.325707823701933e-05,
         5.849772523448627e-05,
     ]
-    assert stats[2].ds == [
+    assert stats[2].ds.tolist() == [
         1.4047600243962637e-06,
         1.966451997450092e-06,
         2.7124223092635907e-06,
         3.9691020955896445e-06,
         5.211391565073522e-06,
     ]
-    assert stats[3].nbins == stats[0].nbins
-    assert stats[3].bsize == stats[0].bsize
-    assert stats[3].m == stats[1].m
-    assert stats[3].s == stats[1].s
-    assert stats[3].ds == stats[1].ds
+    assert stats[3].nbins.tolist() == stats[0].nbins.tolist()
+    assert stats[3].bsize.tolist() == stats[0].bsize.tolist()
+    assert stats[3].m.tolist() == stats[1].m.tolist()
+    assert stats[3].s.tolist() == stats[1].s.tolist()
+    assert stats[3].ds.tolist() == stats[1].ds.tolist()
 
 
 def test_single_column():
@@ -103,23 +107,23 @@ def test_single_column():
     assert not actimes
     assert report == "31744/40497 rows"
 
-    assert stats[0].nbins == [1024, 512, 256, 128, 64]
-    assert stats[0].bsize == [31, 62, 124, 248, 496]
-    assert stats[0].m == [
+    assert stats[0].nbins.tolist() == [1024, 512, 256, 128, 64]
+    assert stats[0].bsize.tolist() == [31, 62, 124, 248, 496]
+    assert stats[0].m.tolist() == [
         -7.749483020854335,
         -7.749483020854335,
         -7.749483020854335,
         -7.749483020854335,
         -7.749483020854335,
     ]
-    assert stats[0].s == [
+    assert stats[0].s.tolist() == [
         6.354113302173686e-05,
         6.286498225847002e-05,
         6.125512011035135e-05,
         6.325707823702418e-05,
         5.849772523449204e-05,
     ]
-    assert stats[0].ds == [
+    assert stats[0].ds.tolist() == [
         1.4047600243962557e-06,
         1.96645199745015e-06,
         2.71242230926368e-06,
@@ -141,3 +145,44 @@ def test_actime():
         2.0710621509373546,
         1.0661529760486679,
     ]
+
+
+def test_columns():
+    """Test sequence access to the columns of the results."""
+
+    ds = parse_ds("tests/data/ave-01.dat.gz", None, True)
+    stats, _, _ = ave(ds, 20, False)
+
+    assert len(stats) == 4
+    assert stats.values.shape == (3, 5, 4)
+    assert list(stats) == [stats[icol] for icol in range(4)]
+    assert stats[3] == stats[1]
+    assert stats[3].m.tolist() == stats.values[0, :, 3].tolist()
+
+
+def test_fft_actime():
+    """Test the FFT estimator of autocorrelation times."""
+
+    # AR(1) process, with exact tau = (1 + a) / (2 * (1 - a)) = 4.5
+    rng = np.random.default_rng(seed=1)
+    noise = rng.normal(size=(2**16, 2))
+    ds = np.empty_like(noise)
+    ds[0] = noise[0]
+    for t in range(1, ds.shape[0]):
+        ds[t] = 0.8 * ds[t - 1] + noise[t]
+
+    for tau, dtau in fft_actimes(ds + 10.0):
+        assert abs(tau - 4.5) < 3.0 * dtau
+
+    # direct sum of the autocorrelation function, same window
+    ds = rng.normal(size=(200, 1)).cumsum(axis=0)
+    dev = ds[:, 0] - ds[:, 0].mean()
+    acov = np.correlate(dev, dev, "full")[199:]
+    taus = 0.5 + np.cumsum(acov[1:] / acov[0])
+    lag = np.flatnonzero(np.arange(1, 200) >= 5.0 * taus)
+    ref = taus[lag[0]] if lag.shape[0] > 0 else taus[-1]
+    assert fft_actimes(ds)[0][0] == pytest.approx(ref, rel=1e-10)
+
+    ds = parse_ds("tests/data/ave-01.dat.gz", [0, 2], True)
+    _, actimes, _ = ave(ds, 20, True, "fft")
+    assert [round(tau, 2) for tau, _ in actimes] == [1.96, 1.11]
@@ -15,17 +15,17 @@ def test_simple():
 
     assert report == "8000/10000 rows"
 
-    assert stats.m == [
+    assert stats.m.tolist() == [
         0.502596645631248,
         0.498392322922783,
         0.5029735829100479,
     ]
-    assert stats.s == [
+    assert stats.s.tolist() == [
         0.0032166135733013423,
         0.003192300587095481,
         0.0032306606710632837,
     ]
-    assert stats.ds == [
+    assert stats.ds.tolist() == [
         2.543115260732433e-05,
         2.523892956018148e-05,
         2.5542211607335726e-05,
@@ -43,6 +43,6 @@ def test_single_column():
 
     assert report == "8000/10000 rows"
 
-    assert stats.m == [0.5029735829100479]
-    assert stats.s == [0.0032306606710632837]
-    assert stats.ds == [2.5542211607335726e-05]
+    assert stats.m.tolist() == [0.5029735829100479]
+    assert stats.s.tolist() == [0.0032306606710632837]
+    assert stats.ds.tolist() == [2.5542211607335726e-05]
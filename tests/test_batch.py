@@ -0,0 +1,59 @@
+"""Test module for multi-file batch analysis."""
+
+
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.common import ParseConfig
+from modules.parser import build_parser
+from modules.main import expand_files
+from modules.main import analyze
+
+
+def test_expand_files():
+    """Test glob expansion, preserving the order of the arguments."""
+
+    files = expand_files(
+        [
+            "tests/data/pd-03-complete.dat",
+            "tests/data/*.dat.gz",
+            "tests/data/missing-*.dat",
+        ]
+    )
+    assert files == [
+        "tests/data/pd-03-complete.dat",
+        "tests/data/ave-01.dat.gz",
+        "tests/data/avs-01.dat.gz",
+        "tests/data/jck-01.dat.gz",
+        "tests/data/missing-*.dat",
+    ]
+
+
+def test_batch():
+    """Test parallel analysis with failing files."""
+
+    files = [
+        "tests/data/avs-01.dat.gz",
+        "tests/data/pd-02-empty_column.dat",
+        "tests/data/jck-01.dat.gz",
+        "tests/data/missing.dat",
+    ]
+    args = build_parser().parse_args(["avs", "--no-cache", "-s", "20", *files])
+    worker = partial(analyze, args=args, config=ParseConfig(None, True))
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(worker, files))
+
+    assert results == [worker(file) for file in files]
+
+    (stats, report), error = results[0]
+    assert error is None
+    assert report == "8000/10000 rows"
+    assert stats.m[0] == 0.502596645631248
+
+    assert results[1] == (
+        None,
+        "the number of columns changed from 4 to 3 at row 3; use `usecols` to select a subset and avoid this error",
+    )
+    assert results[2][1] is None
+    assert results[3] == (None, "file does not exist")
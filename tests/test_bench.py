@@ -0,0 +1,80 @@
+"""Test module for the benchmark suite."""
+
+
+import sys
+
+import numpy as np
+
+from benchmarks.suite import CORRELATION
+from benchmarks.suite import correlated_dataset
+from benchmarks.suite import run_suite
+from benchmarks.suite import compare
+from modules.drivers import ave
+from modules.main import service
+from modules.parser import build_parser
+
+
+def test_dataset():
+    """Test the shape, the means and the correlation of the data."""
+
+    data = correlated_dataset(2**14, 3)
+    assert data.shape == (2**14, 3)
+    assert np.array_equal(data, correlated_dataset(2**14, 3))
+
+    stats, actimes, _ = ave(data, 0, True)
+    assert np.allclose(stats.values[0, 0], [0, 1, 2], atol=0.05)
+    # moving average over CORRELATION rows
+    assert all(CORRELATION / 4 < t < CORRELATION for t in actimes)
+
+
+def test_suite():
+    """Test that all the cases are measured."""
+
+    results = run_suite([(2**11, 2)])
+
+    assert sorted(results) == sorted(
+        f"{name} 2048x2"
+        for name in [
+            "drop_rows",
+            "rebin",
+            "get_stats",
+            "ave",
+            "print_ave basic",
+            "print_ave fancy",
+            "jck",
+            "parse_ds",
+            "parse_ds gzip",
+            "parse_ds gunzip",
+        ]
+    )
+    assert all(res["time"] >= 0.0 for res in results.values())
+    assert results["parse_ds 2048x2"]["peak"] > 2048 * 2 * 8
+
+
+def test_compare():
+    """Test the detection of regressions."""
+
+    baseline = {
+        "ave 1x1": {"time": 1.0, "peak": 100},
+        "jck 1x1": {"time": 1.0, "peak": 100},
+        "rebin 1x1": {"time": 1e-4, "peak": 100},
+    }
+    results = {
+        "ave 1x1": {"time": 1.2, "peak": 200},
+        "jck 1x1": {"time": 2.0, "peak": 100},
+        "rebin 1x1": {"time": 1e-3, "peak": 100},
+        "get_stats 1x1": {"time": 9.0, "peak": 900},
+    }
+
+    assert compare(results, baseline, 0.25) == [
+        "ave 1x1: peak 100B -> 200B",
+        "jck 1x1: time 1s -> 2s",
+    ]
+
+
+def test_installed(monkeypatch, capsys):
+    """Test `das bench` without the (not installed) benchmarks package."""
+
+    monkeypatch.setitem(sys.modules, "benchmarks", None)
+    assert service(build_parser().parse_args(["bench"])) == 1
+    assert "source tree" in capsys.readouterr().err
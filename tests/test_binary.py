@@ -0,0 +1,114 @@
+"""Test module for binary input formats."""
+
+
+import numpy as np
+import pytest
+
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.common import drop_rows
+from modules.drivers import ave
+from modules.stream import stream_avs
+from modules.drivers import avs
+
+
+@pytest.fixture(name="dataset")
+def fixture_dataset():
+    """Text dataset used as reference."""
+    return parse_ds("tests/data/avs-01.dat.gz", None, True)
+
+
+def test_npy(tmp_path, dataset):
+    """Test memory-mapped `.npy` files."""
+
+    file = str(tmp_path / "ds.npy")
+    np.save(file, dataset)
+
+    ds = parse_ds(file)
+    assert isinstance(ds, np.memmap)
+    assert np.array_equal(ds, dataset)
+
+    # views for evenly spaced fields, copies otherwise
+    for fields in [[1], [0, 1], [0, 2], [-1]]:
+        ds = parse_ds(file, fields)
+        assert isinstance(ds, np.memmap)
+        assert np.array_equal(ds, dataset[:, fields])
+        assert np.shares_memory(drop_rows(ds, 20), ds)
+
+    ds = parse_ds(file, [2, 0])
+    assert not isinstance(ds, np.memmap)
+    assert np.array_equal(ds, dataset[:, [2, 0]])
+
+    with pytest.raises(ParsingError) as err:
+        _ = parse_ds(file, [1, 3])
+    assert str(err.value) == "index 3 is out of bounds for axis 1 with size 3"
+
+
+def test_npy_dtype(tmp_path, dataset):
+    """Test `.npy` files stored as the requested type, without copies."""
+
+    file = str(tmp_path / "ds.npy")
+    np.save(file, dataset.astype(np.float32))
+
+    for fields in [None, [0, 2]]:
+        ds = parse_ds(file, fields, dtype="float32")
+        assert isinstance(ds, np.memmap)
+        assert ds.dtype == np.float32
+        assert ds.filename == str(tmp_path / "ds.npy")
+
+    # converted once, as requested
+    ds = parse_ds(file, [1], dtype="float64")
+    assert not isinstance(ds, np.memmap)
+    assert ds.dtype == np.float64
+    assert np.array_equal(ds, dataset[:, [1]].astype(np.float32))
+
+
+def test_npz(tmp_path, dataset):
+    """Test `.npz` archives."""
+
+    file = str(tmp_path / "ds.npz")
+    np.savez_compressed(file, data=dataset)
+    assert np.array_equal(parse_ds(file, [1]), dataset[:, [1]])
+
+    np.savez(file, data=dataset, other=dataset)
+    with pytest.raises(ParsingError) as err:
+        _ = parse_ds(file)
+    assert str(err.value) == "archive should store a single array"
+
+
+def test_raw(tmp_path, dataset):
+    """Test raw little-endian float64 files."""
+
+    file = str(tmp_path / "ds.f64")
+    dataset.astype("<f8").tofile(file)
+
+    ds = parse_ds(file, columns=3)
+    assert isinstance(ds, np.memmap)
+    assert np.array_equal(ds, dataset)
+
+    with pytest.raises(ParsingError) as err:
+        _ = parse_ds(file)
+    assert str(err.value) == "number of columns required"
+
+    with pytest.raises(ParsingError) as err:
+        _ = parse_ds(file, columns=7)
+    assert str(err.value) == "file size not a multiple of row size"
+
+
+def test_drivers(tmp_path, dataset):
+    """Test drivers on memory-mapped data."""
+
+    file = str(tmp_path / "ds.f64")
+    dataset.tofile(file)
+
+    assert ave(parse_ds(file, [0, 2], columns=3), 20, True) == ave(
+        dataset[:, [0, 2]], 20, True
+    )
+
+    stats, report = stream_avs(
+        file, ParseConfig([1], True, columns=3), 20, 999
+    )
+    ref, ref_report = avs(dataset[:, [1]], 20)
+    assert report == ref_report
+    assert stats.s == pytest.approx(ref.s, rel=1e-12)
@@ -0,0 +1,62 @@
+"""Test module for bst() driver."""
+
+
+import pytest
+
+from modules import drivers
+from modules.functionals import susceptibility
+from modules.common import TailoringError
+from modules.common import parse_ds
+from modules.drivers import BootstrapConfig
+from modules.drivers import bst
+from modules.drivers import jck
+
+
+def test_simple():
+    """Test the bootstrap errors against the jackknife ones."""
+
+    SKIP_PERC = 10
+
+    ds = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+    stats, report = bst(ds, SKIP_PERC, susceptibility, BootstrapConfig())
+    ref, _ = jck(ds, SKIP_PERC, susceptibility)
+
+    assert report == "4096/5000 rows, 1000 replicas"
+    assert stats.nbins.tolist() == ref.nbins.tolist()
+    assert stats.bsize.tolist() == ref.bsize.tolist()
+    assert stats.m == pytest.approx(ref.m, rel=1e-3)
+    assert stats.s == pytest.approx(ref.s, rel=0.1)
+
+
+def test_seed():
+    """Test reproducibility, also with several processes."""
+
+    ds = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+
+    stats, _ = bst(ds, 10, susceptibility, BootstrapConfig(1200, seed=7))
+    assert stats == bst(ds, 10, susceptibility, BootstrapConfig(1200, 7))[0]
+    assert (
+        stats
+        == bst(ds, 10, susceptibility, BootstrapConfig(1200, 7, workers=2))[0]
+    )
+    assert stats != bst(ds, 10, susceptibility, BootstrapConfig(1200, 8))[0]
+
+    with pytest.raises(TailoringError, match="at least 2"):
+        _ = bst(ds, 10, susceptibility, BootstrapConfig(1))
+
+
+def test_budget(monkeypatch):
+    """Test batches sized from the memory budget."""
+
+    ds = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+    ref, _ = bst(ds, 10, susceptibility, BootstrapConfig(1200, seed=7))
+
+    # 100 replicas of 128 bins of 2 columns per batch
+    monkeypatch.setattr(drivers, "BST_BUDGET", 100 * 128 * (2 * 8 + 8))
+    stats, _ = bst(ds, 10, susceptibility, BootstrapConfig(1200, seed=7))
+    assert stats != ref
+    assert stats.s == pytest.approx(ref.s, rel=0.1)
+    assert (
+        stats
+        == bst(ds, 10, susceptibility, BootstrapConfig(1200, 7, workers=2))[0]
+    )
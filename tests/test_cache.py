@@ -0,0 +1,158 @@
+"""Test module for the cache of parsed datasets."""
+
+
+import os
+import shutil
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.cache import entry_name
+from modules.cache import evict
+from modules.cache import cached_parse_ds
+
+
+def test_hit(tmp_path):
+    """Test parsing through the cache, before and after filling it."""
+
+    file = "tests/data/pd-03-complete.dat"
+    cache = str(tmp_path / "cache")
+
+    config = ParseConfig([1, 2], True)
+    ds = cached_parse_ds(file, config, directory=cache)
+    assert np.array_equal(ds, parse_ds(file, [1, 2], True))
+    assert os.listdir(cache) == [entry_name(file, config)]
+
+    ds = cached_parse_ds(file, config, directory=cache)
+    assert isinstance(ds, np.memmap)
+    assert np.array_equal(ds, parse_ds(file, [1, 2], True))
+
+    # 1 entry per file, whatever the selected fields
+    ds = cached_parse_ds(file, ParseConfig([2], False), directory=cache)
+    assert np.array_equal(ds, parse_ds(file, [2], False))
+    assert os.listdir(cache) == [entry_name(file, config)]
+
+    # 1 entry per storage type
+    config = ParseConfig(None, True, dtype="float32")
+    ds = cached_parse_ds(file, config, directory=cache)
+    assert ds.dtype == np.float32
+    assert len(os.listdir(cache)) == 2
+
+    with pytest.raises(ParsingError) as err:
+        _ = cached_parse_ds(file, ParseConfig([3, 4], True), directory=cache)
+    assert str(err.value) == "index 4 is out of bounds for axis 1 with size 4"
+
+
+def test_fields(tmp_path):
+    """Test hits with different fields, from the same entry."""
+
+    file = str(tmp_path / "wide.dat")
+    cache = str(tmp_path / "cache")
+    data = np.random.default_rng(seed=0).normal(size=(2**10, 16))
+    np.savetxt(file, data)
+
+    _ = cached_parse_ds(file, ParseConfig([0, 1], True), directory=cache)
+    entry = os.path.join(cache, os.listdir(cache)[0])
+    os.utime(entry, (0, 0))
+
+    for fields in [[0, 1], [3, 5, 7], [9, 2], [-1]]:
+        ds = cached_parse_ds(file, ParseConfig(fields, True), directory=cache)
+        assert np.array_equal(ds, data[:, fields])
+
+        # hit, refreshing the entry
+        assert os.listdir(cache) == [os.path.basename(entry)]
+        assert os.stat(entry).st_mtime_ns > 0
+        os.utime(entry, (0, 0))
+
+
+def test_bounded_peak(tmp_path):
+    """Test that filling the cache does not load whole files."""
+
+    peaks = []
+    for rows in [2**18, 2**19]:
+        file = str(tmp_path / f"ds-{rows}.dat")
+        np.savetxt(file, np.arange(rows, dtype=np.float64))
+
+        tracemalloc.start()
+        ds = cached_parse_ds(
+            file, ParseConfig(None, True), directory=str(tmp_path / "cache")
+        )
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        assert isinstance(ds, np.memmap)
+        assert np.array_equal(ds[:, 0], np.arange(rows))
+
+    # chunk by chunk, not growing with the number of rows
+    assert peaks[1] < 1.5 * peaks[0]
+
+
+def test_invalidation(tmp_path):
+    """Test invalidation of entries for modified files."""
+
+    file = str(tmp_path / "ds.dat")
+    cache = str(tmp_path / "cache")
+
+    shutil.copy("tests/data/pd-03-complete.dat", file)
+    config = ParseConfig(None, True)
+    _ = cached_parse_ds(file, config, directory=cache)
+    old = entry_name(file, config)
+
+    with open(file, "a", encoding="utf-8") as f:
+        f.write("9 9 9 9\n")
+
+    ds = cached_parse_ds(file, config, directory=cache)
+    assert ds.shape == (4, 4)
+    assert entry_name(file, config) != old
+    assert os.listdir(cache) == [entry_name(file, config)]
+
+
+def test_eviction(tmp_path):
+    """Test eviction of the least recently used entries."""
+
+    cache = str(tmp_path / "cache")
+    files = [
+        "tests/data/pd-03-complete.dat",
+        "tests/data/pd-05-commented.dat",
+        "tests/data/pd-06-empty.dat",
+    ]
+
+    config = ParseConfig(None, True)
+    for i, file in enumerate(files):
+        _ = cached_parse_ds(file, config, directory=cache)
+        # well-separated usage times
+        os.utime(os.path.join(cache, entry_name(file, config)), (i, i))
+
+    # hit on the oldest entry
+    _ = cached_parse_ds(files[0], config, directory=cache)
+
+    # room for 2 entries of 3x4 values
+    evict(cache, 600)
+    assert sorted(os.listdir(cache)) == sorted(
+        [entry_name(files[0], config), entry_name(files[2], config)]
+    )
+
+
+def test_ragged(tmp_path):
+    """Test files which cannot be parsed as a whole."""
+
+    file = "tests/data/pd-02-empty_column.dat"
+    cache = str(tmp_path / "cache")
+
+    # parsed without the cache
+    config = ParseConfig([0, 1], False)
+    for _ in range(2):
+        ds = cached_parse_ds(file, config, directory=cache)
+        assert np.array_equal(ds, np.array([[1, 2], [5, 6], [1, 2]]))
+    assert not os.listdir(cache)
+
+    with pytest.raises(ParsingError) as err:
+        _ = cached_parse_ds(file, ParseConfig([0, 1], True), directory=cache)
+    assert (
+        str(err.value)
+        == "the number of columns changed from 4 to 3 at row 3; use `usecols` to select a subset and avoid this error"
+    )
@@ -0,0 +1,87 @@
+"""Test module for the parsing of compressed files."""
+
+
+import bz2
+import gzip
+import lzma
+
+import numpy as np
+import pytest
+
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.follow import FollowState
+from modules.stream import iter_chunks
+from modules.tokenizer import compression
+from modules.tokenizer import zstandard
+
+
+FILE = "tests/data/pd-03-complete.dat"
+CODECS = {"gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+# FIRST BYTES OF AN EMPTY ZSTD FRAME
+ZSTD_FRAME = b"\x28\xb5\x2f\xfd\x00\x48\x01\x00\x00"
+
+
+def _compressed(tmp_path, codec):
+    """Write `FILE` compressed, with an uninformative extension."""
+    with open(FILE, "rb") as f:
+        path = tmp_path / "data.dat"
+        path.write_bytes(CODECS[codec](f.read()))
+    return str(path)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_magic_bytes(tmp_path, codec):
+    """Test the detection of compressed files by contents."""
+
+    assert compression(_compressed(tmp_path, codec)) == codec
+    assert compression(FILE) is None
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_readers(tmp_path, codec):
+    """Test both readers on compressed files against the plain one."""
+
+    file = _compressed(tmp_path, codec)
+
+    for reader in ["loadtxt", "block"]:
+        for fields, colnum_test in [
+            (None, True),
+            ([1, 3], False),
+            ([2], True),
+        ]:
+            ref = parse_ds(FILE, fields, colnum_test, reader)
+            res = parse_ds(file, fields, colnum_test, reader)
+            assert np.array_equal(res, ref)
+
+    chunks = list(iter_chunks(file, ParseConfig([0, 2], True), 2))
+    assert np.array_equal(np.concatenate(chunks), parse_ds(FILE, [0, 2]))
+
+    with pytest.raises(ParsingError, match="only plain text files"):
+        _ = FollowState(file, ParseConfig())
+
+
+@pytest.mark.skipif(zstandard is not None, reason="zstandard installed")
+def test_missing_zstd(tmp_path):
+    """Test the error on zstd files without the optional codec."""
+
+    file = tmp_path / "data.dat.zst"
+    file.write_bytes(ZSTD_FRAME)
+
+    assert compression(str(file)) == "zstd"
+    with pytest.raises(ParsingError, match="require the `zstandard`"):
+        _ = parse_ds(str(file))
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard not installed")
+def test_zstd(tmp_path):
+    """Test the parsing of zstd files with the optional codec."""
+
+    file = tmp_path / "data.dat.zst"
+    with open(FILE, "rb") as f:
+        file.write_bytes(zstandard.ZstdCompressor().compress(f.read()))
+
+    for reader in ["loadtxt", "block"]:
+        res = parse_ds(str(file), None, True, reader)
+        assert np.array_equal(res, parse_ds(FILE, None, True, reader))
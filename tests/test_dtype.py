@@ -0,0 +1,139 @@
+"""Test module for float32 storage with float64 accumulation."""
+
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from modules.common import MAXBINS
+from modules.common import MINBINS
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.common import rebin
+from modules.common import bin_pyramid
+from modules.common import get_stats
+from modules.drivers import ave
+from modules.drivers import jck
+from modules.functionals import susceptibility
+from modules.cache import cached_parse_ds
+from modules.server import MemoryCache
+
+# UNIT ROUNDOFF OF FLOAT32
+U32 = 2.0**-24
+
+
+def _dataset(rows, cols):
+    """Correlated dataset with a large offset."""
+    rng = np.random.default_rng(seed=0)
+    data = np.cumsum(rng.normal(size=(rows, cols)), axis=0) / 64.0
+    return data + 1000.0
+
+
+def test_parse(tmp_path):
+    """Test that float32 datasets are the rounded float64 ones."""
+
+    binary = str(tmp_path / "data.npy")
+    np.save(binary, parse_ds("tests/data/ave-01.dat.gz"))
+
+    for file in ["tests/data/ave-01.dat.gz", binary]:
+        for reader in ["loadtxt", "block"]:
+            ref = parse_ds(file, [0, 2], True, reader)
+            res = parse_ds(file, [0, 2], True, reader, dtype="float32")
+            assert res.dtype == np.float32
+            assert np.array_equal(res, ref.astype(np.float32))
+
+    with pytest.raises(ValueError) as err:
+        _ = parse_ds("tests/data/ave-01.dat.gz", dtype="float16")
+    assert str(err.value) == "unknown dtype 'float16'"
+
+
+def test_cached_peak(tmp_path):
+    """Test that cached paths parse float32 without float64 copies."""
+
+    file = str(tmp_path / "data.dat")
+    data = _dataset(2**17, 8)
+    np.savetxt(file, data)
+    config = ParseConfig(None, True, dtype="float32")
+
+    parsers = [
+        lambda: cached_parse_ds(file, config, str(tmp_path / "cache")),
+        lambda: MemoryCache(2**30).dataset(file, config),
+    ]
+    for parser in parsers:
+        tracemalloc.start()
+        res = parser()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert res.dtype == np.float32
+        assert np.array_equal(res, parse_ds(file, dtype="float32"))
+        # below the size of the float64 dataset
+        assert peak < 0.75 * data.nbytes
+
+
+def test_storage():
+    """Test that binned arrays keep the storage type."""
+
+    data = _dataset(2**12, 2).astype(np.float32)
+
+    assert rebin(data, MAXBINS).dtype == np.float32
+    _, pyramid = bin_pyramid(data, MAXBINS, MINBINS)
+    assert pyramid.dtype == np.float32
+    assert get_stats(data).values.dtype == np.float64
+
+
+def test_stats_bound():
+    """Test the error bound of means and SEMs of float32 data.
+
+    Storing each value with relative error at most `U32`, the
+    float64 sums bound the error of the mean by `U32 * <|x|>`,
+    and the one of the SEM by `U32 * rms(x) / sqrt(N - 1)`.
+    """
+
+    data = _dataset(2**20, 3)
+    N = data.shape[0]
+
+    ref = get_stats(data)
+    res = get_stats(data.astype(np.float32))
+
+    mean_bound = U32 * np.abs(data).mean(axis=0)
+    sem_bound = U32 * np.sqrt((data**2).mean(axis=0) / (N - 1))
+    assert np.all(np.abs(res.m - ref.m) <= mean_bound)
+    assert np.all(np.abs(res.s - ref.s) <= sem_bound)
+
+    # float32 sums would be limited by the accumulated roundoff
+    naive = data.astype(np.float32).cumsum(axis=0)[-1] / N
+    assert np.any(np.abs(naive - ref.m) > 100.0 * mean_bound)
+
+
+def test_ave_bound():
+    """Test the error bound of the binsize scaling of float32 data.
+
+    Level `l` (0 for `MAXBINS` bins) is obtained with `l + 2`
+    float32 roundings of the values, each of relative error at
+    most `U32`.
+    """
+
+    data = _dataset(2**16, 2)
+    ref, _, _ = ave(data, 10, False)
+    res, _, _ = ave(data.astype(np.float32), 10, False)
+
+    xmax = np.abs(data).max()
+    diff = np.abs(res.values - ref.values)
+    for ilevel, nbins in enumerate(ref.nbins):
+        bound = (ilevel + 2) * U32 * xmax
+        assert np.all(diff[0, ilevel] <= bound)
+        assert np.all(diff[1, ilevel] <= bound / np.sqrt(nbins - 1))
+
+
+def test_jck():
+    """Test the jackknife on float32 data against float64."""
+
+    ds = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+    ref, _ = jck(ds, 10, susceptibility)
+    res, _ = jck(ds.astype(np.float32), 10, susceptibility)
+
+    assert res.m.dtype == np.float64
+    assert res.m == pytest.approx(ref.m, rel=1e-6)
+    assert res.s == pytest.approx(ref.s, rel=1e-4)
@@ -0,0 +1,104 @@
+"""Test module for the incremental analysis of growing files."""
+
+
+import numpy as np
+import pytest
+
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import TailoringError
+from modules.common import parse_ds
+from modules.drivers import avs
+from modules.stream import online_ave
+from modules.follow import FollowState
+
+
+def test_update(tmp_path):
+    """Test parsing appended lines, with a partial last line."""
+
+    file = tmp_path / "ds.dat"
+    file.write_text("# header\n1 2 3\n4 5 6\n7 8")
+
+    config = ParseConfig([0, 2], True)
+    state = FollowState(str(file), config)
+    assert state.update() == 2
+    assert state.avs()[0] == avs(np.array([[1.0, 3.0], [4.0, 6.0]]), 0)[0]
+
+    with open(file, "a", encoding="utf-8") as f:
+        f.write(" 9\n# comment\n10 11 12\n")
+    assert state.update() == 2
+    assert np.allclose(
+        state.avs()[0].values, avs(parse_ds(str(file), [0, 2]), 0)[0].values
+    )
+    assert state.update() == 0
+
+    with open(file, "a", encoding="utf-8") as f:
+        f.write("13 14\n")
+    with pytest.raises(
+        ParsingError,
+        match="the number of columns changed from 3 to 2 at row 5",
+    ):
+        _ = state.update()
+
+    # replaced file, parsed from the beginning
+    file.write_text("0 0 0\n")
+    assert state.update() == 1
+    with pytest.raises(TailoringError, match="insufficient rows left"):
+        _ = state.avs()
+
+
+def test_incremental(tmp_path):
+    """Test results after many updates against a single pass."""
+
+    data = np.random.default_rng(0).random((5000, 2))
+    file = tmp_path / "ds.dat"
+    file.write_text("")
+
+    state = FollowState(str(file), ParseConfig())
+    for chunk in np.array_split(data, 7):
+        with open(file, "a", encoding="utf-8") as f:
+            np.savetxt(f, chunk)
+        _ = state.update()
+
+    assert state.rows == 5000
+    res = state.ave(True)
+    ref = online_ave(str(file), ParseConfig(), 0, True)
+    assert np.array_equal(res[0].nbins, ref[0].nbins)
+    assert np.allclose(res[0].values, ref[0].values, rtol=1e-12)
+    assert np.allclose(res[1], ref[1], rtol=1e-12)
+
+    # O(log N) values stored per column
+    assert len(state.acc.moments) == 13
+
+
+def test_persistence(tmp_path):
+    """Test restoring a persisted state without parsing again."""
+
+    file = tmp_path / "ds.dat"
+    file.write_text("1 2\n3 4\n")
+    config = ParseConfig(None, True)
+
+    state = FollowState.load(str(tmp_path), str(file), config)
+    assert state.update() == 2
+    state.save(str(tmp_path))
+
+    with open(file, "a", encoding="utf-8") as f:
+        f.write("5 6\n")
+    assert state.update() == 1
+    state.save(str(tmp_path))
+
+    restored = FollowState.load(str(tmp_path), str(file), config)
+    assert restored.rows == 3
+    assert restored.offset == state.offset
+    assert restored.update() == 0
+    assert restored.avs() == state.avs()
+
+    # pending blocks restored, as if never interrupted
+    with open(file, "a", encoding="utf-8") as f:
+        f.write("7 8\n")
+    assert restored.update() == 1
+    assert state.update() == 1
+    assert restored.acc.scaling(minbins=2) == state.acc.scaling(minbins=2)
+
+    with pytest.raises(ParsingError, match="only plain text files"):
+        _ = FollowState("ds.dat.gz", config)
@@ -0,0 +1,86 @@
+"""Test module for compile_expression() and the Expression class."""
+
+
+import sys
+import pickle
+
+import numpy as np
+import pytest
+
+from modules.functionals import susceptibility
+from modules.functionals import compile_expression
+from modules.common import TailoringError
+from modules.common import parse_ds
+from modules.drivers import jck
+from modules.main import main
+
+
+def test_susceptibility():
+    """Test an expression against the built-in susceptibility."""
+
+    SKIP_PERC = 10
+
+    ds = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+    stats, _ = jck(ds, SKIP_PERC, compile_expression("a0 - a1**2"))
+    ref, _ = jck(ds, SKIP_PERC, susceptibility)
+
+    assert stats == ref
+
+
+def test_vectorized():
+    """Test evaluation on arrays of pseudo-averages."""
+
+    func = compile_expression("-sqrt(abs(a1)) / (2 * a0**2) + exp(log(a2))")
+    args = [np.array([1.0, 2.0]), np.array([-4.0, 9.0]), np.array([1.0, 3.0])]
+
+    assert func.nargs == 3
+    assert func(args).tolist() == pytest.approx([0.0, 2.625])
+    assert func([1.0, 4.0, 1.0]) == pytest.approx(0.0)
+
+
+def test_cached():
+    """Test that expressions are compiled once, also across pickling."""
+
+    func = compile_expression("a0 / a1")
+
+    assert compile_expression("a0 / a1") is func
+    assert pickle.loads(pickle.dumps(func)) is func
+
+
+def test_invalid_input():
+    """Test invalid expressions and numbers of arguments."""
+
+    for source, message in [
+        ("a0 +", "invalid expression 'a0 +'"),
+        ("b0 + 1", "unsupported 'b0' in 'b0 + 1'"),
+        ("a0.real", "unsupported 'a0.real' in 'a0.real'"),
+        ("open(a0)", "unsupported 'open(a0)' in 'open(a0)'"),
+        ("a0 // a1", "unsupported 'a0 // a1' in 'a0 // a1'"),
+        ("1 + 2", "no column aliases in '1 + 2'"),
+    ]:
+        with pytest.raises(ValueError) as err:
+            _ = compile_expression(source)
+        assert str(err.value) == message
+
+    with pytest.raises(TailoringError) as err:
+        data = parse_ds("tests/data/jck-01.dat.gz", [1], True)
+        _ = jck(data, 10, compile_expression("a0 / a1"))
+    assert str(err.value) == "invalid number of arguments in 'a0 / a1'"
+
+
+def test_arity(monkeypatch, capsys):
+    """Test the refusal of expressions not matching the fields."""
+
+    file = "tests/data/jck-01.dat.gz"
+    for func, fields, nargs in [("a2", "2,3", 3), ("a0/a1", "2", 2)]:
+        argv = ["das", "jck", file, "-f", fields, "--func", func]
+        monkeypatch.setattr(sys, "argv", argv)
+        with pytest.raises(SystemExit) as err:
+            main()
+        assert err.value.code == 2
+
+        given = len(fields.split(","))
+        assert capsys.readouterr().err.endswith(
+            f"error: --func '{func}' takes {nargs} field(s),"
+            f" {given} given with --fields\n"
+        )
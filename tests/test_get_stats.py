@@ -1,6 +1,9 @@
 """Test module for get_stats() function."""
 
 
+from math import sqrt
+
+import modules.common
 from modules.common import Stats
 from modules.common import parse_ds
 from modules.common import drop_rows
@@ -42,3 +45,19 @@ def test_single_col():
         s=[1.637770333919462],
         ds=[0.6686169389950505],
     )
+
+
+def test_column_groups(monkeypatch):
+    """Test wide datasets, reduced in several groups of columns."""
+
+    ds = parse_ds("tests/data/ave-01.dat.gz", None, True)
+    ref = get_stats(ds)
+
+    monkeypatch.setattr(modules.common, "STATS_BLOCK", ds.shape[0])
+    res = get_stats(ds)
+    assert res == ref
+
+    for icol in range(ds.shape[1]):
+        col = ds[:, icol]
+        assert res.m[icol] == col.mean()
+        assert res.s[icol] == col.std(ddof=1) / sqrt(ds.shape[0])
@@ -0,0 +1,66 @@
+"""Test module for the per-stage instrumentation."""
+
+
+import pickle
+import tracemalloc
+
+import numpy as np
+
+from modules import instrument
+from modules.functionals import susceptibility
+from modules.common import parse_ds
+from modules.drivers import jck
+
+
+def test_disabled():
+    """Test that nothing is recorded nor traced by default."""
+
+    before = instrument.records()
+    _ = jck(
+        parse_ds("tests/data/jck-01.dat.gz", [2, 3], True), 10, susceptibility
+    )
+
+    assert instrument.records() == before
+    assert not tracemalloc.is_tracing()
+
+
+def test_stages():
+    """Test the stages of a jackknife analysis."""
+
+    instrument.enable()
+    try:
+        data = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+        with instrument.stage("driver"):
+            _ = jck(data, 10, susceptibility)
+        _ = jck(data, 10, susceptibility)
+    finally:
+        instrument.disable()
+
+    records = instrument.records()
+    assert list(records) == [
+        "parse",
+        "driver",
+        "tailor",
+        "bin",
+        "functional",
+        "stats",
+    ]
+    assert records["parse"]["calls"] == 1
+    assert records["parse"]["peak"] > data.nbytes
+    # nested stages attributed to the outermost one
+    assert records["driver"]["calls"] == 1
+    assert records["functional"]["calls"] == 2
+    assert all(rec["time"] >= 0.0 for rec in records.values())
+    assert not tracemalloc.is_tracing()
+
+    # nothing recorded after disabling
+    _ = jck(data, 10, susceptibility)
+    assert instrument.records() == records
+
+
+def test_decorated():
+    """Test that decorated functions keep their identity."""
+
+    assert susceptibility.__name__ == "susceptibility"
+    assert pickle.loads(pickle.dumps(susceptibility)) is susceptibility
+    assert susceptibility([np.array([2.0]), np.array([1.0])]).tolist() == [1.0]
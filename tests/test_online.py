@@ -0,0 +1,90 @@
+"""Test module for the online logarithmic binning."""
+
+
+import numpy as np
+import pytest
+
+from modules.common import TailoringError
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.common import drop_rows
+from modules.stream import LogBinAccumulator
+from modules.stream import online_ave
+
+
+def test_blocking():
+    """Test each level against explicit blocking of the rows."""
+
+    ds = parse_ds("tests/data/ave-01.dat.gz", None, True)
+
+    acc = LogBinAccumulator()
+    for start in range(0, ds.shape[0], 999):
+        acc.add(ds[start : (start + 999)])
+    res = acc.scaling()
+
+    assert acc.rows == 40497
+    assert res.nbins.tolist() == [
+        40497,
+        20248,
+        10124,
+        5062,
+        2531,
+        1265,
+        632,
+        316,
+        158,
+        79,
+    ]
+    assert res.bsize.tolist() == [2**level for level in range(10)]
+
+    for level, (nbins, bsize) in enumerate(zip(res.nbins, res.bsize)):
+        binned = ds[: (nbins * bsize)].reshape((nbins, bsize, -1)).mean(axis=1)
+        sem = binned.std(axis=0, ddof=1) / np.sqrt(nbins)
+
+        assert res.values[0, level] == pytest.approx(binned.mean(axis=0))
+        assert res.values[1, level] == pytest.approx(sem, rel=1e-10)
+
+    with pytest.raises(TailoringError, match="insufficient rows"):
+        _ = acc.scaling(minbins=50000)
+
+
+def test_checkpoint(tmp_path):
+    """Test restoring a checkpoint, then accumulating further rows."""
+
+    ds = parse_ds("tests/data/ave-01.dat.gz", [0, 2], True)
+    file = str(tmp_path / "acc.npz")
+
+    ref = LogBinAccumulator()
+    ref.add(ds)
+
+    acc = LogBinAccumulator()
+    acc.add(ds[:12345])
+    acc.save(file)
+
+    restored = LogBinAccumulator.load(file)
+    restored.add(ds[12345:])
+    res, ref_res = restored.scaling(), ref.scaling()
+    assert np.array_equal(res.nbins, ref_res.nbins)
+    assert np.allclose(res.values, ref_res.values, rtol=1e-12, atol=0.0)
+    assert restored.rows == ref.rows
+    assert [p is None for p in restored.pending] == [
+        p is None for p in ref.pending
+    ]
+
+
+def test_online_ave():
+    """Test the file driver, with skipped rows."""
+
+    config = ParseConfig([0, 2], True)
+    res, actimes, report = online_ave(
+        "tests/data/ave-01.dat.gz", config, 20, True, chunk_lines=1000
+    )
+
+    assert report == "32398/40497 rows"
+    assert len(res) == 2
+    assert len(actimes) == 2
+
+    ds = drop_rows(
+        parse_ds("tests/data/ave-01.dat.gz", [0, 2], True), 20, None
+    )
+    assert res.values[0, 0] == pytest.approx(ds.mean(axis=0), rel=1e-12)
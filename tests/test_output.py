@@ -0,0 +1,120 @@
+"""Test module for the machine-readable output formats."""
+
+
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from modules.parser import build_parser
+from modules.main import analyze
+from modules.main import output_format
+from modules.main import parse_config
+from modules.main import print_batch
+
+
+FILES = ["tests/data/jck-01.dat.gz", "tests/data/missing.dat"]
+
+
+def _run(argv: list[str]) -> tuple[list[tuple], int]:
+    """Analyze FILES and write their results as requested."""
+    args = build_parser().parse_args([*argv, "--no-cache", *FILES])
+    assert output_format(args) is None
+
+    config = parse_config(args)
+    results = [analyze(file, args, config) for file in FILES]
+
+    return results, print_batch(FILES, results, args)
+
+
+def test_jsonl(capsys):
+    """Test JSON lines, 1 per analyzed file."""
+
+    results, status = _run(
+        ["ave", "-t", "-f", "2,3", "--output-format", "jsonl"]
+    )
+    stats, actimes, report = results[0][0]
+
+    out, err = capsys.readouterr()
+    assert status == 1 and "missing.dat" in err
+
+    (rec,) = [json.loads(line) for line in out.splitlines()]
+    assert rec["file"] == FILES[0] and rec["report"] == report
+    assert rec["fields"] == [2, 3] and rec["actimes"] == actimes
+    assert rec["nbins"] == stats.nbins.tolist()
+    assert np.array_equal(rec["m"], stats.values[0].T)
+    assert np.array_equal(rec["ds"], stats.values[2].T)
+
+
+def test_csv(tmp_path):
+    """Test CSV rows, written on a file."""
+
+    output = str(tmp_path / "out.csv")
+    results, _ = _run(["avs", "--output-format", "csv", "--output", output])
+    stats = results[0][0][0]
+
+    with open(output, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+
+    assert rows[0] == ["file", "column", "mean", "sem", "se_sem"]
+    assert [int(row[1]) for row in rows[1:]] == [1, 2, 3, 4]
+    assert np.array_equal(
+        np.array([row[2:] for row in rows[1:]], dtype=float), stats.values.T
+    )
+
+    results, _ = _run(
+        ["jck", "-f", "1,2", "--output-format", "csv", "--output", output]
+    )
+    stats = results[0][0][0]
+
+    with open(output, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+
+    assert len(rows) == len(stats.nbins) + 1
+    assert np.array_equal(
+        np.array([row[3:] for row in rows[1:]], dtype=float), stats.values.T
+    )
+
+
+def test_npz(tmp_path):
+    """Test NPZ archives storing the result arrays."""
+
+    output = str(tmp_path / "out")
+    results, _ = _run(
+        ["ave", "--fft", "--output-format", "npz", "--output", output]
+    )
+    stats, actimes, _ = results[0][0]
+
+    with np.load(output) as archive:
+        assert list(archive["files"]) == FILES[:1]
+        assert np.array_equal(archive["0/values"], stats.values)
+        assert np.array_equal(archive["0/nbins"], stats.nbins)
+        assert np.array_equal(archive["0/fields"], [1, 2, 3, 4])
+        assert np.array_equal(archive["0/actimes"], actimes)
+
+
+def test_table_output(tmp_path, capsys):
+    """Test table and basic output written on a file."""
+
+    output = tmp_path / "out.txt"
+    _run(["avs", "-b", "--output", str(output)])
+
+    assert capsys.readouterr().out == ""
+    assert output.read_text(encoding="utf-8").splitlines()[1].startswith("1 +")
+
+
+@pytest.mark.parametrize(
+    "argv,error",
+    [
+        (["-b", "--output-format", "csv"], "-b/--basic conflicts"),
+        (["--output-format", "npz"], "npz requires --output"),
+        (["--follow", "--output-format", "jsonl"], "--follow prints"),
+        (["--follow", "--output", "out.txt"], "--follow prints"),
+    ],
+)
+def test_conflicts(argv, error):
+    """Test the conflicting output options."""
+
+    args = build_parser().parse_args(["avs", *argv, FILES[0]])
+    assert error in output_format(args)
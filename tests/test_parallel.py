@@ -0,0 +1,111 @@
+"""Test module for the parallel parsing of text files."""
+
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from modules.common import ParsingError
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.parallel import parse_parallel
+from modules.parallel import split_spans
+
+from tests.test_readers import FILES
+from tests.test_readers import FIELDS
+
+
+def _parse(func, file, fields, colnum_test):
+    """Return the parsed dataset, or the error message."""
+    try:
+        return func(file, fields, colnum_test)
+    except ParsingError as err:
+        return str(err)
+
+
+def _parallel(file, fields, colnum_test):
+    """Parse with a range of (at least) 8 bytes per process."""
+    return parse_parallel(file, ParseConfig(fields, colnum_test), 4, 8)
+
+
+def test_spans(tmp_path):
+    """Test the alignment of the ranges to line boundaries."""
+
+    file = tmp_path / "data.dat"
+    file.write_bytes(b"1 2\n3 4\n# comment\n\n5 6\n7 8")
+
+    spans = split_spans(str(file), 4, 4)
+    assert spans[0][0] == 0
+    assert spans[-1][1] == file.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(spans[:-1], spans[1:]))
+
+    content = file.read_bytes()
+    assert all(content[a - 1 : a] == b"\n" for a, _ in spans[1:])
+
+
+# compressed files are parsed serially
+@pytest.mark.parametrize("file", [f for f in FILES if not f.endswith(".gz")])
+def test_serial(file):
+    """Test parallel parsing against the serial one."""
+
+    for fields in FIELDS:
+        for colnum_test in [True, False]:
+            ref = _parse(parse_ds, file, fields, colnum_test)
+            res = _parse(_parallel, file, fields, colnum_test)
+
+            if isinstance(ref, str):
+                assert res == ref
+            else:
+                assert np.array_equal(res, ref)
+
+
+def test_errors(tmp_path):
+    """Test row numbers of errors in later ranges."""
+
+    data = np.arange(2000.0).reshape((1000, 2))
+    file = tmp_path / "data.dat"
+    np.savetxt(file, data)
+    ref = parse_ds(str(file), [1], True)
+
+    res = parse_parallel(str(file), ParseConfig([1], True), 4, 1024)
+    assert np.array_equal(res, ref)
+
+    lines = file.read_text(encoding="utf-8").splitlines(keepends=True)
+    for bad in ["1.0\n", "1.0 x\n"]:
+        for row in [1, 500, 999]:
+            file.write_text(
+                "".join(lines[:row] + [bad] + lines[(row + 1) :]),
+                encoding="utf-8",
+            )
+            ref = _parse(parse_ds, str(file), [1], True)
+            res = _parse(
+                lambda *args: parse_parallel(
+                    str(file), ParseConfig([1], True), 4, 1024
+                ),
+                str(file),
+                [1],
+                True,
+            )
+            assert isinstance(ref, str)
+            assert res == ref
+
+
+def test_shared_buffer(tmp_path):
+    """Test that the workers write the dataset in place."""
+
+    data = np.random.default_rng(seed=0).normal(size=(2**16, 4))
+    file = tmp_path / "data.dat"
+    np.savetxt(file, data)
+
+    for dtype in ["float64", "float32"]:
+        config = ParseConfig(None, True, dtype=dtype)
+        tracemalloc.start()
+        res = parse_parallel(str(file), config, 4, 2**16)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert res.dtype == dtype
+        assert np.array_equal(res, parse_ds(str(file), dtype=dtype))
+        # no copy of the dataset in the calling process
+        assert peak < res.nbytes / 4
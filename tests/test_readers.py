@@ -0,0 +1,133 @@
+"""Test module for the `parse_ds()` reader backends."""
+
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from modules.common import ParsingError
+from modules.common import parse_ds
+from modules.tokenizer import FILL_LINES
+from modules.tokenizer import loadtxt_chunks
+
+
+FILES = [
+    "tests/data/pd-01-empty_lines.dat",
+    "tests/data/pd-02-empty_column.dat",
+    "tests/data/pd-03-complete.dat",
+    "tests/data/pd-04-single_column.dat",
+    "tests/data/pd-05-commented.dat",
+    "tests/data/pd-06-empty.dat",
+    "tests/data/pd-07-spurious.dat",
+    "tests/data/avs-01.dat.gz",
+]
+FIELDS = [None, [0], [2], [0, 1], [1, 3], [3, 4], [-1]]
+
+
+def _parse(file, fields, colnum_test, reader):
+    """Return the parsed dataset, or the error message."""
+    try:
+        return parse_ds(file, fields, colnum_test, reader)
+    except ParsingError as err:
+        return str(err)
+
+
+@pytest.mark.parametrize("file", FILES)
+def test_block_reader(file):
+    """Test the block reader against `np.loadtxt()`."""
+
+    for fields in FIELDS:
+        for colnum_test in [True, False]:
+            ref = _parse(file, fields, colnum_test, "loadtxt")
+            res = _parse(file, fields, colnum_test, "block")
+
+            if isinstance(ref, str):
+                assert res == ref
+            else:
+                assert np.array_equal(res, ref)
+
+
+def test_unknown_reader():
+    """Test the request of a missing backend."""
+
+    with pytest.raises(ValueError) as err:
+        _ = parse_ds("tests/data/pd-03-complete.dat", None, True, "none")
+    assert str(err.value) == "unknown reader 'none'"
+
+
+@pytest.mark.parametrize("reader", ["loadtxt", "block"])
+def test_projected_check(tmp_path, reader):
+    """Test the column number test on a subset of wide rows."""
+
+    file = tmp_path / "wide.dat"
+    data = np.random.default_rng(seed=0).normal(size=(2000, 200))
+    np.savetxt(file, data)
+
+    ref = parse_ds(str(file), None, True, reader)[:, [3, -1]]
+    res = parse_ds(str(file), [3, -1], True, reader)
+    assert res.shape == (2000, 2)
+    assert np.array_equal(res, ref)
+
+    with open(file, "a", encoding="utf-8") as f:
+        f.write("1.0 2.0\n")
+    with pytest.raises(ParsingError, match="number of columns changed"):
+        parse_ds(str(file), [3, -1], True, reader)
+
+
+def test_projected_memory(tmp_path):
+    """Test that only the selected columns are kept in memory."""
+
+    file = tmp_path / "wide.dat"
+    data = np.random.default_rng(seed=0).normal(size=(2000, 200))
+    np.savetxt(file, data)
+
+    with open(file, "r", encoding="utf-8") as f:
+        tracemalloc.start()
+        chunks = list(loadtxt_chunks(f, [3, -1], True, "float64", 100))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    assert np.array_equal(np.concatenate(chunks), data[:, [3, -1]])
+    assert peak < data.nbytes / 2
+
+
+def test_preallocated_memory(tmp_path):
+    """Test that selected columns are not concatenated from chunks."""
+
+    file = tmp_path / "long.dat"
+    data = np.random.default_rng(seed=0).normal(size=(2**18, 2))
+    np.savetxt(file, data)
+
+    # one chunk at a time, as the parsing of the whole file
+    with open(file, "r", encoding="utf-8") as f:
+        tracemalloc.start()
+        for _ in loadtxt_chunks(f, [0, 1], True, "float64", FILL_LINES):
+            pass
+        _, chunk_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    tracemalloc.start()
+    res = parse_ds(str(file), [0, 1], True)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert np.array_equal(res, data)
+    # a single copy of the dataset besides the chunk
+    assert peak < chunk_peak + 1.25 * data.nbytes
+
+
+@pytest.mark.parametrize("tail", ["1\n", "1\n1 2 3\n", "# 1 2\n\n1\n"])
+def test_chunk_boundary(tmp_path, tail):
+    """Test a column change on the first row of a chunk."""
+
+    file = tmp_path / "boundary.dat"
+    with open(file, "w", encoding="utf-8") as f:
+        f.write("1 2 3\n" * 2**16 + tail)
+
+    for reader in ["loadtxt", "block"]:
+        with pytest.raises(ParsingError) as err:
+            _ = parse_ds(str(file), [0], True, reader)
+        assert str(err.value).startswith(
+            "the number of columns changed from 3 to 1 at row 65537;"
+        )
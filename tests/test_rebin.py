@@ -1,4 +1,4 @@
-"""Test module for rebin() function."""
+"""Test module for rebin() and bin_pyramid() functions."""
 
 
 import numpy as np
@@ -8,6 +8,9 @@ from modules.common import TailoringError
 from modules.common import parse_ds
 from modules.common import drop_rows
 from modules.common import rebin
+from modules.common import bin_pyramid
+from modules.common import pyramid_stats
+from modules.common import get_stats
 
 
 def test_successful():
@@ -92,3 +95,41 @@ def test_single():
             ]
         ),
     )
+
+
+def test_out_buffer():
+    """Test binning into a preallocated buffer."""
+
+    ds = parse_ds("tests/data/rb-01-short.dat", None, True)
+    ds = drop_rows(ds, skip_perc=30, nbins=8)
+
+    buffer = np.zeros((4, 3))
+    ds1 = rebin(ds, nbins=4, out=buffer)
+    assert ds1 is buffer
+    assert np.array_equal(buffer, rebin(ds, nbins=4))
+
+
+def test_bin_pyramid():
+    """Test the pyramid of all levels against successive halvings."""
+
+    ds = parse_ds("tests/data/ave-01.dat.gz", None, True)
+    ds = drop_rows(ds, skip_perc=20, nbins=64)
+
+    levels, pyramid = bin_pyramid(ds, maxbins=64, minbins=8)
+    assert levels == [64, 32, 16, 8]
+    assert pyramid.shape == (4, 120)
+
+    start = 0
+    binned = rebin(ds, nbins=64)
+    m, s, ds_ = pyramid_stats(levels, pyramid)
+    for ilevel, nbins in enumerate(levels):
+        if ilevel > 0:
+            binned = rebin(binned, nbins=nbins)
+        assert np.array_equal(pyramid[:, start : (start + nbins)], binned.T)
+        start += nbins
+
+        # bit-exact with the per-level statistics
+        ref = get_stats(binned)
+        assert np.array_equal(m[ilevel], ref.m)
+        assert np.array_equal(s[ilevel], ref.s)
+        assert np.array_equal(ds_[ilevel], ref.ds)
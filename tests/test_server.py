@@ -0,0 +1,176 @@
+"""Test module for the analysis daemon and its client."""
+
+
+import os
+import sys
+import json
+import shutil
+import threading
+
+import numpy as np
+import pytest
+
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.drivers import avs
+from modules.drivers import ave
+from modules.drivers import jck
+from modules.functionals import susceptibility
+from modules.parser import build_parser
+from modules.main import analyze
+from modules.main import parse_config
+from modules.main import remote
+from modules.remote import check_owner
+from modules.remote import request
+from modules.results import to_json
+from modules.results import from_json
+from modules.server import DasServer
+from modules.server import MemoryCache
+
+
+FILES = [
+    "tests/data/jck-01.dat.gz",
+    "tests/data/pd-02-empty_column.dat",
+    "tests/data/missing.dat",
+]
+
+
+@pytest.fixture(name="server")
+def fixture_server(tmp_path):
+    """Daemon serving in a thread, on a temporary socket."""
+
+    server = DasServer(str(tmp_path / "das.sock"), MemoryCache(2**26))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _local(argv, files):
+    """Analyze files in this process, without caches."""
+    args = build_parser().parse_args([*argv, "--no-cache", *files])
+    config = parse_config(args)
+    return [analyze(file, args, config) for file in files]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["avs", "-s", "20"],
+        ["ave", "-t"],
+        ["jck", "-f", "2,3"],
+        ["bst", "-f", "2,3", "-r", "50"],
+    ],
+)
+def test_remote(server, argv):
+    """Test results of the daemon against local ones, twice."""
+
+    files = [os.path.abspath(f) for f in FILES]
+    ref = _local(argv, FILES)
+
+    for _ in range(2):
+        reply = request(server.server_address, [*argv, *FILES], files)
+        assert reply["results"] == ref
+
+    assert len(server.cache) > 0
+
+
+def test_unserved(server):
+    """Test the refusal of commands without datasets."""
+
+    reply = request(server.server_address, ["bench"], [])
+    assert reply == {"error": "'bench' is not served"}
+
+
+def test_failure(server, monkeypatch, capsys):
+    """Test the report of unexpected errors to the client."""
+
+    def fail(forwarded):
+        raise RuntimeError(f"cannot analyze {forwarded['files']}")
+
+    monkeypatch.setattr(server, "analyze", fail)
+    reply = request(server.server_address, ["avs"], ["a.dat"])
+    assert reply == {"error": "RuntimeError: cannot analyze ['a.dat']"}
+
+    monkeypatch.setenv("DAS_SOCKET", server.server_address)
+    monkeypatch.setattr(sys, "argv", ["das", "--remote", "avs", "a.dat"])
+    args = build_parser().parse_args(sys.argv[1:])
+    assert remote(["a.dat"], args) == 1
+    assert capsys.readouterr().err.endswith(
+        f"das: RuntimeError: cannot analyze ['{os.path.abspath('a.dat')}']\n"
+    )
+
+
+def test_ownership(tmp_path, monkeypatch):
+    """Test the refusal of sockets of other users."""
+
+    path = str(tmp_path / "das.sock")
+    check_owner(path)
+
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+    with pytest.raises(PermissionError, match="belongs to another user"):
+        check_owner(path)
+    with pytest.raises(PermissionError, match="belongs to another user"):
+        request(path, ["avs"], [])
+
+
+def test_invalidation(tmp_path):
+    """Test the invalidation of entries of modified files."""
+
+    file = tmp_path / "data.dat"
+    np.savetxt(file, np.arange(8.0).reshape((4, 2)))
+
+    cache = MemoryCache(2**20)
+    config = ParseConfig([1], True)
+    assert np.array_equal(
+        cache.dataset(str(file), config), [[1], [3], [5], [7]]
+    )
+    # only the selected column is stored
+    assert cache.nbytes == 32
+
+    np.savetxt(file, np.arange(4.0).reshape((2, 2)))
+    os.utime(file, ns=(0, 0))
+    assert np.array_equal(cache.dataset(str(file), config), [[1], [3]])
+    assert cache.nbytes == 16
+
+
+def test_eviction(tmp_path):
+    """Test the eviction of least recently used entries."""
+
+    config = ParseConfig()
+    files = []
+    for i in range(3):
+        files.append(str(tmp_path / f"data-{i}.dat"))
+        shutil.copy("tests/data/pd-03-complete.dat", files[-1])
+
+    data = MemoryCache(2**20).dataset(files[0], config)
+    cache = MemoryCache(2 * data.nbytes)
+
+    kept = {}
+    for file in [files[0], files[1], files[0], files[2]]:
+        kept[file] = cache.dataset(file, config)
+
+    # files[1] least recently used, the others still served as hits
+    assert cache.nbytes == 2 * data.nbytes
+    assert len(cache) == 2
+    assert cache.dataset(files[0], config) is kept[files[0]]
+    assert cache.dataset(files[2], config) is kept[files[2]]
+    assert cache.dataset(files[1], config) is not kept[files[1]]
+
+
+def test_codec():
+    """Test the JSON round trip of driver results."""
+
+    ds = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+    results = [
+        (avs(ds, 20), None),
+        (ave(ds, 20, True, "fft"), None),
+        (jck(ds, 20, susceptibility), None),
+        (None, "file does not exist"),
+    ]
+
+    assert from_json(json.loads(json.dumps(to_json(results)))) == results
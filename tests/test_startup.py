@@ -0,0 +1,93 @@
+"""Test module for the start-up time of the command line."""
+
+
+import sys
+import subprocess
+
+from benchmarks.startup import import_times
+
+# MODULES TOO SLOW TO IMPORT BEFORE A DRIVER RUNS
+HEAVY = [
+    "numpy",
+    "rich",
+    "multiprocessing",
+    "concurrent.futures",
+    "modules.drivers",
+]
+
+
+def _loaded(code: str) -> list[str]:
+    """Low-level function, modules loaded by Python code.
+
+    Parameters
+    -----------------------
+    code : str
+        Code run by a fresh interpreter.
+
+    Returns
+    -----------------------
+    list[str]
+        The names in `sys.modules` after running `code`.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-c", f"{code}\nprint(*sys.modules, sep=chr(10))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return proc.stdout.splitlines()
+
+
+def test_heavy_modules():
+    """Test that importing and `--version` load no heavy module."""
+
+    imported = _loaded("import sys\nimport modules.main")
+    version = _loaded(
+        "import sys, runpy\n"
+        "sys.argv = ['das', '--version']\n"
+        "try:\n"
+        "    runpy.run_module('modules.main', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+
+    for loaded in [imported, version]:
+        assert "modules.parser" in loaded
+        for heavy in HEAVY:
+            assert not [
+                name
+                for name in loaded
+                if name == heavy or name.startswith(f"{heavy}.")
+            ]
+
+
+def test_version():
+    """Test that printing the version imports no driver nor numpy."""
+
+    times = import_times(("--version",))
+
+    assert not [name for name in times if name.startswith("numpy")]
+    assert not [name for name in times if name.startswith("rich")]
+    assert [name for name in times if name.startswith("modules.")] == [
+        "modules.parser"
+    ]
+
+
+def test_basic():
+    """Test that basic output does not import rich, nor other drivers."""
+
+    # the analyses run in a subprocess, bypassing the cache not to
+    # write entries in the user's cache directory
+
+    times = import_times(
+        ("avs", "-b", "--no-cache", "tests/data/ave-01.dat.gz")
+    )
+
+    assert "modules.drivers" in times
+    assert not [name for name in times if name.startswith("rich")]
+    for name in ["stream", "follow", "functionals"]:
+        assert f"modules.{name}" not in times
+    assert "concurrent.futures.process" not in times
+
+    times = import_times(("avs", "--no-cache", "tests/data/ave-01.dat.gz"))
+    assert "rich.console" in times
@@ -0,0 +1,166 @@
+"""Test module for out-of-core streaming drivers."""
+
+
+import numpy as np
+import pytest
+
+from modules.functionals import susceptibility
+from modules.common import ParsingError
+from modules.common import TailoringError
+from modules.common import ParseConfig
+from modules.common import parse_ds
+from modules.drivers import avs
+from modules.drivers import ave
+from modules.drivers import jck
+from modules.stream import BinAccumulator
+from modules.stream import count_file_rows
+from modules.stream import iter_chunks
+from modules.stream import stream_avs
+from modules.stream import stream_ave
+from modules.stream import stream_jck
+
+
+def test_count_file_rows(tmp_path):
+    """Test row counting with empty and commented lines."""
+
+    assert count_file_rows("tests/data/pd-01-empty_lines.dat") == 2
+    assert count_file_rows("tests/data/pd-05-commented.dat") == 3
+    assert count_file_rows("tests/data/pd-06-empty.dat") == 3
+    assert count_file_rows("tests/data/avs-01.dat.gz") == 10000
+
+    # raw binary files, with their number of columns
+    file = str(tmp_path / "ds.f64")
+    np.arange(12, dtype=np.float64).tofile(file)
+    assert count_file_rows(file, 4) == 3
+
+
+def test_chunks():
+    """Test chunked parsing against whole-file parsing."""
+
+    for fields, colnum_test in [(None, True), ([1, 3], False), ([2], True)]:
+        chunks = list(
+            iter_chunks(
+                "tests/data/pd-06-empty.dat",
+                ParseConfig(fields, colnum_test),
+                2,
+            )
+        )
+        assert len(chunks) == 3
+        assert np.array_equal(
+            np.concatenate(chunks),
+            parse_ds("tests/data/pd-06-empty.dat", fields, colnum_test),
+        )
+
+
+def test_chunk_errors():
+    """Test row numbering of errors across chunks."""
+
+    with pytest.raises(ParsingError) as err:
+        _ = list(
+            iter_chunks(
+                "tests/data/pd-02-empty_column.dat", ParseConfig(None, True), 3
+            )
+        )
+    assert (
+        str(err.value)
+        == "the number of columns changed from 4 to 3 at row 3; use `usecols` to select a subset and avoid this error"
+    )
+
+    with pytest.raises(ParsingError) as err:
+        _ = list(
+            iter_chunks(
+                "tests/data/pd-02-empty_column.dat", ParseConfig([1, 3]), 3
+            )
+        )
+    assert str(err.value) == "invalid column index 3 at row 3 with 3 columns"
+
+    with pytest.raises(ParsingError) as err:
+        _ = list(
+            iter_chunks(
+                "tests/data/pd-07-spurious.dat", ParseConfig(None, True), 2
+            )
+        )
+    assert (
+        str(err.value)
+        == "could not convert string 'ab' to float64 at row 1, column 3."
+    )
+
+
+def test_bin_accumulator():
+    """Test bins filled across chunk boundaries."""
+
+    data = np.arange(24.0).reshape((12, 2))
+
+    acc = BinAccumulator(nbins=4, bsize=3)
+    for chunk in np.split(data, [1, 2, 7]):
+        acc.add(chunk)
+
+    assert np.array_equal(acc.means(), data.reshape((4, 3, 2)).mean(axis=1))
+
+    with pytest.raises(TailoringError, match="more rows than counted"):
+        acc.add(data[:1])
+
+
+def test_avs():
+    """Test streaming `avs` against the in-memory driver."""
+
+    ds = parse_ds("tests/data/avs-01.dat.gz", None, True)
+    ref, ref_report = avs(ds, 20)
+
+    stats, report = stream_avs(
+        "tests/data/avs-01.dat.gz",
+        ParseConfig(None, True),
+        20,
+        chunk_lines=777,
+    )
+
+    assert report == ref_report
+    assert stats.m == pytest.approx(ref.m, rel=1e-12)
+    assert stats.s == pytest.approx(ref.s, rel=1e-12)
+    assert stats.ds == pytest.approx(ref.ds, rel=1e-12)
+
+
+def test_ave():
+    """Test streaming `ave` against the in-memory driver."""
+
+    ds = parse_ds("tests/data/ave-01.dat.gz", [0, 2], True)
+    ref, ref_actimes, ref_report = ave(ds, 20, True)
+
+    stats, actimes, report = stream_ave(
+        "tests/data/ave-01.dat.gz",
+        ParseConfig([0, 2], True),
+        20,
+        True,
+        chunk_lines=1000,
+    )
+
+    assert report == ref_report
+    assert actimes == pytest.approx(ref_actimes, rel=1e-12)
+    for col, ref_col in zip(stats, ref):
+        assert np.array_equal(col.nbins, ref_col.nbins)
+        assert np.array_equal(col.bsize, ref_col.bsize)
+        assert col.m == pytest.approx(ref_col.m, rel=1e-12)
+        assert col.s == pytest.approx(ref_col.s, rel=1e-9)
+        assert col.ds == pytest.approx(ref_col.ds, rel=1e-9)
+
+
+def test_jck():
+    """Test streaming `jck` against the in-memory driver."""
+
+    ds = parse_ds("tests/data/jck-01.dat.gz", [2, 3], True)
+    ref, ref_report = jck(ds, 10, susceptibility)
+
+    stats, report = stream_jck(
+        "tests/data/jck-01.dat.gz",
+        ParseConfig([2, 3], True),
+        10,
+        susceptibility,
+        chunk_lines=999,
+    )
+
+    assert report == ref_report
+    assert np.array_equal(stats.nbins, ref.nbins)
+    assert np.array_equal(stats.bsize, ref.bsize)
+    assert stats.m == pytest.approx(ref.m, rel=1e-12)
+    assert stats.s == pytest.approx(ref.s, rel=1e-9)
+    assert stats.ds == pytest.approx(ref.ds, rel=1e-9)
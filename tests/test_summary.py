@@ -0,0 +1,87 @@
+"""Test module for the summaries of independent runs."""
+
+
+import numpy as np
+import pytest
+
+from modules.common import ParseConfig
+from modules.common import ParsingError
+from modules.drivers import avs
+from modules.stream import online_ave
+from modules.summary import summarize
+from modules.summary import merge_summaries
+
+
+@pytest.fixture(name="runs")
+def fixture_runs(tmp_path):
+    """Dataset split in runs, with their summaries."""
+
+    data = np.random.default_rng(0).random((4096, 3))
+    np.savetxt(tmp_path / "all.dat", data)
+
+    summaries = []
+    for i in range(4):
+        run = str(tmp_path / f"run-{i}.dat")
+        np.savetxt(run, data[(1024 * i) : (1024 * (i + 1))])
+        summaries.append(f"{run}.summary.npz")
+        summarize(run, ParseConfig([0, 2]), 0).save(summaries[-1])
+
+    return tmp_path, data, summaries
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_merge(runs, jobs):
+    """Test merged summaries against the concatenated runs."""
+
+    path, data, summaries = runs
+    summary = merge_summaries(summaries, jobs)
+
+    assert summary.runs == 4 and summary.rows == 4096
+    assert summary.fields == [0, 2]
+
+    stats, report = summary.avs()
+    assert report == "4096/4096 rows, 4 runs"
+    assert np.allclose(
+        stats.values, avs(data[:, [0, 2]], 0)[0].values, rtol=1e-12
+    )
+
+    # runs of 2**10 rows, hence no block spanning 2 runs
+    res, actimes, _ = summary.ave(True)
+    ref = online_ave(str(path / "all.dat"), ParseConfig([0, 2]), 0, True)
+    assert np.array_equal(res.nbins, ref[0].nbins)
+    assert np.allclose(res.values, ref[0].values, rtol=1e-12)
+    assert np.allclose(actimes, ref[1], rtol=1e-12)
+
+
+def test_skip(runs):
+    """Test skipping in each run, and runs of different lengths."""
+
+    path, data, _ = runs
+    np.savetxt(path / "short.dat", data[:100])
+
+    first = summarize(str(path / "all.dat"), ParseConfig(), 50)
+    second = summarize(str(path / "short.dat"), ParseConfig(), 50)
+    first.merge(second)
+
+    assert first.report == "2098/4196 rows, 2 runs"
+    assert np.allclose(
+        first.avs()[0].values,
+        avs(np.concatenate((data[2048:], data[50:100])), 0)[0].values,
+        rtol=1e-12,
+    )
+
+
+def test_errors(runs, tmp_path):
+    """Test merging invalid or incompatible summaries."""
+
+    path, _, summaries = runs
+
+    with pytest.raises(ParsingError, match="not a summary"):
+        merge_summaries([summaries[0], str(path / "all.dat")])
+    with pytest.raises(ParsingError, match="file does not exist"):
+        merge_summaries([str(tmp_path / "missing.npz")])
+
+    other = str(path / "all.summary.npz")
+    summarize(str(path / "all.dat"), ParseConfig(), 0).save(other)
+    with pytest.raises(ParsingError, match="summaries of different fields"):
+        merge_summaries([*summaries, other])